@@ -0,0 +1,192 @@
+"""
+EyeGuardian pipeline benchmark.
+
+Replays recorded clips through the real GlobalCameraMonitor stages (capture →
+inference → preview-encode → persistence) as fast as they can be consumed and
+writes a JSON report so runs can be compared between commits. No webcam or
+display is needed; with no clips a synthetic source is used.
+
+Ground truth for blink accuracy is read from a sidecar next to each clip
+(`clip.mp4` → `clip.json`) holding either {"blinks": 12} or
+{"blink_frames": [31, 97, ...]}.
+
+Usage:
+    python benchmark.py clips/*.mp4 --output bench.json
+    python benchmark.py --synthetic 600 --baseline bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from database import EyeGuardianDB
+from monitor import GlobalCameraMonitor
+from engine.frame_source import SyntheticSource, VideoFileSource, open_frame_source
+
+BENCH_USER = "benchmark@eyeguardian.local"
+# Preview variant exercised during a run (the dashboard's default request)
+BENCH_PREVIEW_FPS = 1000.0
+BENCH_PREVIEW_WIDTH = 640
+
+
+def load_ground_truth(clip_path: str) -> Optional[int]:
+    """Blink count from the clip's JSON sidecar, or None if there is none."""
+    sidecar = os.path.splitext(clip_path)[0] + ".json"
+    if not os.path.isfile(sidecar):
+        return None
+    with open(sidecar) as f:
+        data = json.load(f)
+    if "blink_frames" in data:
+        return len(data["blink_frames"])
+    return int(data["blinks"])
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far, in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    divisor = 1024.0 * 1024.0 if sys.platform == "darwin" else 1024.0
+    return round(peak / divisor, 1)
+
+
+def run_clip(name: str, source_factory, db, preview: bool = True, expected_blinks: Optional[int] = None) -> Dict[str, Any]:
+    """Run one source through the monitor until it ends; returns its report."""
+    monitor = GlobalCameraMonitor(source_factory=source_factory)
+    monitor.stage_latency_samples = None  # whole-run percentiles
+    token = None
+    if preview:
+        token, _ = monitor.preview_demand.add(BENCH_PREVIEW_FPS, BENCH_PREVIEW_WIDTH)
+
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    monitor.start(db, BENCH_USER)
+    for t in monitor.threads:
+        t.join()
+    wall = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    monitor.stop(db)
+    if token is not None:
+        monitor.preview_demand.remove(token)
+
+    stages = monitor.get_stage_stats()
+    frames = next(s["processed"] for s in stages if s["stage"] == "inference")
+    payload = monitor.latest_payload or {}
+    blinks = payload.get("details", {}).get("blink", {}).get("total_blinks", 0)
+    error = monitor.error_state if monitor.error_state != "Frame source ended" else None
+
+    report = {
+        "clip": name,
+        "frames": frames,
+        "wall_seconds": round(wall, 3),
+        "fps": round(frames / wall, 2) if wall > 0 else 0.0,
+        "cpu_seconds": round(cpu, 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "blinks": blinks,
+        "expected_blinks": expected_blinks,
+        "blink_error": (blinks - expected_blinks) if expected_blinks is not None else None,
+        "stages": {s.pop("stage"): s for s in stages},
+        "governor": monitor.governor.snapshot(),
+        "error": error,
+    }
+    return report
+
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip()
+    except Exception:
+        return None
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    previous = {r["clip"]: r for r in (baseline or {}).get("runs", [])}
+    for run in report["runs"]:
+        print(f"\n{run['clip']}: {run['frames']} frames in {run['wall_seconds']}s "
+              f"= {run['fps']} fps, peak RSS {run['peak_rss_mb']} MB")
+        if run["expected_blinks"] is not None:
+            print(f"  blinks {run['blinks']} / expected {run['expected_blinks']} (error {run['blink_error']:+d})")
+        else:
+            print(f"  blinks {run['blinks']} (no ground truth)")
+        for stage, s in run["stages"].items():
+            print(f"  {stage:<12} n={s['processed']:<6} p50={s['p50_ms']:>7.2f}ms "
+                  f"p95={s['p95_ms']:>7.2f}ms p99={s['p99_ms']:>7.2f}ms dropped={s['dropped']}")
+        old = previous.get(run["clip"])
+        if old and old.get("fps"):
+            change = (run["fps"] - old["fps"]) / old["fps"] * 100.0
+            print(f"  vs baseline {baseline.get('revision')}: {old['fps']} → {run['fps']} fps ({change:+.1f}%)")
+        if run["error"]:
+            print(f"  error: {run['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EyeGuardian pipeline benchmark")
+    parser.add_argument("clips", nargs="*", help="video files or image directories to replay")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="also run N synthetic frames (default 300 when no clips are given)")
+    parser.add_argument("--no-preview", action="store_true", help="skip the annotate + JPEG preview stage")
+    parser.add_argument("--output", default="benchmark_results.json", help="where to write the JSON report")
+    parser.add_argument("--baseline", help="previous JSON report to compare fps against")
+    args = parser.parse_args()
+
+    runs = []
+    with tempfile.TemporaryDirectory(prefix="eg-bench-") as tmp:
+        db = EyeGuardianDB(os.path.join(tmp, "bench.db"))
+        try:
+            for clip in args.clips:
+                if os.path.isdir(clip):
+                    factory = lambda clip=clip: open_frame_source(clip, realtime=False)
+                else:
+                    factory = lambda clip=clip: VideoFileSource(clip, realtime=False)
+                print(f"Benchmarking {clip}...")
+                runs.append(run_clip(os.path.basename(clip.rstrip(os.sep)), factory, db,
+                                     preview=not args.no_preview, expected_blinks=load_ground_truth(clip)))
+
+            synthetic = args.synthetic or (0 if args.clips else 300)
+            if synthetic:
+                print(f"Benchmarking {synthetic} synthetic frames...")
+                runs.append(run_clip(f"synthetic-{synthetic}", lambda: SyntheticSource(count=synthetic), db,
+                                     preview=not args.no_preview))
+        finally:
+            db.close()
+
+    report = {
+        "revision": git_revision(),
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "preview": not args.no_preview,
+        "runs": runs,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
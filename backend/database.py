@@ -8,17 +8,36 @@ alerts             – notable events (dry eyes, bad posture, high strain …)
 daily_summaries    – pre-aggregated daily stats for fast charting
 weekly_summaries   – pre-aggregated weekly stats  (ISO week: Mon-Sun)
 monthly_summaries  – pre-aggregated monthly stats (YYYY-MM)
+daily_totals       – running per-(user, day) sums the summaries are derived from
 """
 
+import calendar
+import functools
 import sqlite3
 import os
+import threading
 import time
+from collections import Counter
+from contextlib import contextmanager
 from datetime import datetime, date, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 
 DB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
 DB_PATH = os.path.join(DB_DIR, "eyeguardian.db")
 
+# Write-behind: snapshot/alert rows are queued in memory and written by a
+# background thread, one transaction per batch, once this many rows are
+# waiting or the oldest has waited WRITE_FLUSH_INTERVAL seconds
+WRITE_BATCH_SIZE = 64
+WRITE_FLUSH_INTERVAL = 2.0
+# Attempts per row before a row that keeps failing is dropped (and counted)
+WRITE_MAX_ATTEMPTS = 5
+# Query-only connections for API/insights reads; under WAL they run in
+# parallel with each other and with the writer
+READ_POOL_SIZE = 4
+# Seconds a connection waits on a lock held by another one before failing
+BUSY_TIMEOUT = 10.0
+
 # ---------------------------------------------------------------------------
 # Schema
 # ---------------------------------------------------------------------------
@@ -27,6 +46,7 @@ CREATE TABLE IF NOT EXISTS sessions (
     id              INTEGER PRIMARY KEY AUTOINCREMENT,
     user_email      TEXT,                      -- email of the logged-in user
     started_at      TEXT    NOT NULL,          -- ISO-8601
+    started_ts      INTEGER,                   -- started_at as epoch seconds (see _epoch)
     ended_at        TEXT,                      -- ISO-8601, NULL while active
     duration_seconds INTEGER                   -- filled on session end
 );
@@ -36,6 +56,7 @@ CREATE TABLE IF NOT EXISTS snapshots (
     session_id       INTEGER NOT NULL REFERENCES sessions(id),
     user_email       TEXT,                     -- email of the logged-in user
     timestamp        TEXT    NOT NULL,         -- ISO-8601
+    ts               INTEGER,                  -- timestamp as epoch seconds (see _epoch)
 
     -- eye / blink
     blink_rate       INTEGER,
@@ -77,6 +98,7 @@ CREATE TABLE IF NOT EXISTS alerts (
     session_id   INTEGER NOT NULL REFERENCES sessions(id),
     user_email   TEXT,                         -- email of the logged-in user
     timestamp    TEXT    NOT NULL,
+    ts           INTEGER,                      -- timestamp as epoch seconds (see _epoch)
     alert_type   TEXT    NOT NULL,              -- e.g. high_strain, dry_eyes …
     severity     TEXT    NOT NULL,              -- warning | danger
     message      TEXT
@@ -139,11 +161,35 @@ CREATE TABLE IF NOT EXISTS monthly_summaries (
     UNIQUE(user_email, year, month)
 );
 
+-- Running sums/counts per (user, day), updated in the same transaction as the
+-- snapshots/alerts/sessions they count; summaries are derived from these so
+-- closing a session never rescans history. user_email is '' when unknown so
+-- the key also holds for anonymous rows. *_n counts non-NULL values (AVG).
+CREATE TABLE IF NOT EXISTS daily_totals (
+    user_email            TEXT    NOT NULL DEFAULT '',
+    date                  TEXT    NOT NULL,     -- YYYY-MM-DD
+    session_seconds       INTEGER DEFAULT 0,    -- by session start date
+    snapshot_count        INTEGER DEFAULT 0,
+    blink_rate_sum        REAL    DEFAULT 0,
+    blink_rate_n          INTEGER DEFAULT 0,
+    distance_sum          REAL    DEFAULT 0,
+    distance_n            INTEGER DEFAULT 0,
+    posture_score_sum     REAL    DEFAULT 0,
+    posture_score_n       INTEGER DEFAULT 0,
+    brightness_sum        REAL    DEFAULT 0,
+    brightness_n          INTEGER DEFAULT 0,
+    strain_sum            REAL    DEFAULT 0,
+    strain_n              INTEGER DEFAULT 0,
+    redness_sum           REAL    DEFAULT 0,
+    redness_n             INTEGER DEFAULT 0,
+    dry_count             INTEGER DEFAULT 0,
+    bad_posture_count     INTEGER DEFAULT 0,
+    alert_count           INTEGER DEFAULT 0,
+    PRIMARY KEY (user_email, date)
+);
+
 CREATE INDEX IF NOT EXISTS idx_snapshots_session  ON snapshots(session_id);
-CREATE INDEX IF NOT EXISTS idx_snapshots_user     ON snapshots(user_email);
-CREATE INDEX IF NOT EXISTS idx_snapshots_ts       ON snapshots(timestamp);
 CREATE INDEX IF NOT EXISTS idx_alerts_session     ON alerts(session_id);
-CREATE INDEX IF NOT EXISTS idx_alerts_user        ON alerts(user_email);
 CREATE INDEX IF NOT EXISTS idx_daily_date         ON daily_summaries(date);
 CREATE INDEX IF NOT EXISTS idx_daily_user         ON daily_summaries(user_email);
 CREATE INDEX IF NOT EXISTS idx_weekly_yw          ON weekly_summaries(year, week);
@@ -152,83 +198,612 @@ CREATE INDEX IF NOT EXISTS idx_monthly_ym         ON monthly_summaries(year, mon
 CREATE INDEX IF NOT EXISTS idx_monthly_user       ON monthly_summaries(user_email);
 """
 
+# Time-range indexes; created after _migrate() has added the epoch columns to
+# databases from before they existed. (user_email, ts) serves per-user range
+# queries with one index range scan, (ts) the all-users ones.
+_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_snapshots_user_ts  ON snapshots(user_email, ts);
+CREATE INDEX IF NOT EXISTS idx_snapshots_time     ON snapshots(ts);
+CREATE INDEX IF NOT EXISTS idx_alerts_user_ts     ON alerts(user_email, ts);
+CREATE INDEX IF NOT EXISTS idx_alerts_time        ON alerts(ts);
+CREATE INDEX IF NOT EXISTS idx_sessions_user_ts   ON sessions(user_email, started_ts);
+CREATE INDEX IF NOT EXISTS idx_sessions_time      ON sessions(started_ts);
+CREATE INDEX IF NOT EXISTS idx_totals_date        ON daily_totals(date);
+
+-- Superseded by the composite indexes above
+DROP INDEX IF EXISTS idx_snapshots_user;
+DROP INDEX IF EXISTS idx_snapshots_ts;
+DROP INDEX IF EXISTS idx_alerts_user;
+"""
+
+# (table, epoch column, ISO text column) pairs added by _migrate()
+_EPOCH_COLUMNS = (
+    ("sessions", "started_ts", "started_at"),
+    ("snapshots", "ts", "timestamp"),
+    ("alerts", "ts", "timestamp"),
+)
+
+
+def _epoch(dt: datetime) -> int:
+    """
+    Epoch seconds of a naive local timestamp read as UTC – the same value
+    SQLite's strftime('%s', ...) gives for the stored ISO text, so backfilled
+    and freshly written rows agree and day boundaries ignore DST.
+    """
+    return calendar.timegm(dt.timetuple())
+
+
+def _day_range(start: date, end: date) -> Tuple[int, int]:
+    """[first second of `start`, first second after `end`) in _epoch() seconds."""
+    return calendar.timegm(start.timetuple()), calendar.timegm((end + timedelta(days=1)).timetuple())
+
+
+# Order of the parameters insert_snapshot() queues
+_SNAPSHOT_COLUMNS = (
+    "session_id", "user_email", "timestamp",
+    "blink_rate", "ear", "total_blinks", "incomplete_blinks", "is_dry",
+    "distance_cm", "distance_risk",
+    "brightness", "light_level", "light_risk",
+    "head_position", "posture_overall", "pitch", "yaw", "roll",
+    "posture_risk", "posture_score",
+    "redness", "redness_level",
+    "strain_index", "risk_score", "risk_level",
+    "ts",
+)
+
+_SNAPSHOT_INSERT_SQL = "INSERT INTO snapshots ({}) VALUES ({})".format(
+    ", ".join(_SNAPSHOT_COLUMNS), ", ".join("?" * len(_SNAPSHOT_COLUMNS)),
+)
+
+_ALERT_INSERT_SQL = """
+INSERT INTO alerts (session_id, user_email, timestamp, alert_type, severity, message, ts)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+_WRITE_SQL = {"snapshot": _SNAPSHOT_INSERT_SQL, "alert": _ALERT_INSERT_SQL}
+
+# daily_totals prefix -> (snapshots column, summary column) for each averaged metric
+_TOTAL_AVERAGES = {
+    "blink_rate": ("blink_rate", "avg_blink_rate"),
+    "distance": ("distance_cm", "avg_distance_cm"),
+    "posture_score": ("posture_score", "avg_posture_score"),
+    "brightness": ("brightness", "avg_brightness"),
+    "strain": ("strain_index", "avg_strain_index"),
+    "redness": ("redness", "avg_redness"),
+}
+
+_TOTAL_COUNTERS = (
+    ("session_seconds", "snapshot_count")
+    + tuple(f"{prefix}_{part}" for prefix in _TOTAL_AVERAGES for part in ("sum", "n"))
+    + ("dry_count", "bad_posture_count", "alert_count")
+)
+
+_TOTALS_ADD_SQL = """
+INSERT INTO daily_totals (user_email, date, {columns}) VALUES (?, ?, {params})
+ON CONFLICT(user_email, date) DO UPDATE SET {updates}
+""".format(
+    columns=", ".join(_TOTAL_COUNTERS),
+    params=", ".join("?" * len(_TOTAL_COUNTERS)),
+    updates=", ".join(f"{c} = {c} + excluded.{c}" for c in _TOTAL_COUNTERS),
+)
+
+# Summary columns aggregated over a group of daily_totals rows, in the order
+# of the summary upserts' columns (daily summaries omit days_active)
+_TOTALS_AGGREGATES = """
+COALESCE(SUM(session_seconds), 0) / 60.0 AS total_min,
+{averages},
+COALESCE(SUM(alert_count), 0) AS alert_count,
+COALESCE(SUM(dry_count), 0) * 0.5 AS dry_min,
+COALESCE(SUM(bad_posture_count), 0) * 0.5 AS bad_posture_min""".format(averages=",\n".join(
+    f"SUM({prefix}_sum) / NULLIF(SUM({prefix}_n), 0) AS {summary}"
+    for prefix, (_, summary) in _TOTAL_AVERAGES.items()
+))
+# Distinct dates: rows for all users (user_email NULL) span several users per day
+_DAYS_ACTIVE = "COUNT(DISTINCT CASE WHEN snapshot_count > 0 THEN date END) AS days_active"
+
+# Summary columns derived from a range of daily_totals rows
+_TOTALS_SUMMARY_SQL = f"""
+SELECT {_TOTALS_AGGREGATES},
+{_DAYS_ACTIVE}
+  FROM daily_totals
+ WHERE date >= ? AND date <= ?
+"""
+
+# Monday of the ISO week containing daily_totals.date; the ISO year/week
+# are those of that week's Thursday
+_WEEK_START_SQL = "date(date, '-' || ((CAST(strftime('%w', date) AS INTEGER) + 6) % 7) || ' days')"
+_ISO_YEAR_SQL = "CAST(strftime('%Y', week_start, '+3 days') AS INTEGER)"
+_ISO_WEEK_SQL = "(CAST(strftime('%j', week_start, '+3 days') AS INTEGER) - 1) / 7 + 1"
+
+# Summary upserts; {source} is a VALUES row or a grouped daily_totals SELECT
+_DAILY_UPSERT = """
+INSERT INTO daily_summaries (
+    user_email, date, total_session_minutes,
+    avg_blink_rate, avg_distance_cm, avg_posture_score,
+    avg_brightness, avg_strain_index, avg_redness,
+    alert_count, dry_eye_minutes, bad_posture_minutes
+)
+{source}
+ON CONFLICT(user_email, date) DO UPDATE SET
+    total_session_minutes = excluded.total_session_minutes,
+    avg_blink_rate        = excluded.avg_blink_rate,
+    avg_distance_cm       = excluded.avg_distance_cm,
+    avg_posture_score     = excluded.avg_posture_score,
+    avg_brightness        = excluded.avg_brightness,
+    avg_strain_index      = excluded.avg_strain_index,
+    avg_redness           = excluded.avg_redness,
+    alert_count           = excluded.alert_count,
+    dry_eye_minutes       = excluded.dry_eye_minutes,
+    bad_posture_minutes   = excluded.bad_posture_minutes
+"""
+_DAILY_UPSERT_SQL = _DAILY_UPSERT.format(source="VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+_WEEKLY_UPSERT = """
+INSERT INTO weekly_summaries (
+    user_email, year, week, week_start, week_end,
+    total_session_minutes,
+    avg_blink_rate, avg_distance_cm, avg_posture_score,
+    avg_brightness, avg_strain_index, avg_redness,
+    alert_count, dry_eye_minutes, bad_posture_minutes, days_active
+)
+{source}
+ON CONFLICT(user_email, year, week) DO UPDATE SET
+    week_start            = excluded.week_start,
+    week_end              = excluded.week_end,
+    total_session_minutes = excluded.total_session_minutes,
+    avg_blink_rate        = excluded.avg_blink_rate,
+    avg_distance_cm       = excluded.avg_distance_cm,
+    avg_posture_score     = excluded.avg_posture_score,
+    avg_brightness        = excluded.avg_brightness,
+    avg_strain_index      = excluded.avg_strain_index,
+    avg_redness           = excluded.avg_redness,
+    alert_count           = excluded.alert_count,
+    dry_eye_minutes       = excluded.dry_eye_minutes,
+    bad_posture_minutes   = excluded.bad_posture_minutes,
+    days_active           = excluded.days_active
+"""
+_WEEKLY_UPSERT_SQL = _WEEKLY_UPSERT.format(source="VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+_MONTHLY_UPSERT = """
+INSERT INTO monthly_summaries (
+    user_email, year, month,
+    total_session_minutes,
+    avg_blink_rate, avg_distance_cm, avg_posture_score,
+    avg_brightness, avg_strain_index, avg_redness,
+    alert_count, dry_eye_minutes, bad_posture_minutes, days_active
+)
+{source}
+ON CONFLICT(user_email, year, month) DO UPDATE SET
+    total_session_minutes = excluded.total_session_minutes,
+    avg_blink_rate        = excluded.avg_blink_rate,
+    avg_distance_cm       = excluded.avg_distance_cm,
+    avg_posture_score     = excluded.avg_posture_score,
+    avg_brightness        = excluded.avg_brightness,
+    avg_strain_index      = excluded.avg_strain_index,
+    avg_redness           = excluded.avg_redness,
+    alert_count           = excluded.alert_count,
+    dry_eye_minutes       = excluded.dry_eye_minutes,
+    bad_posture_minutes   = excluded.bad_posture_minutes,
+    days_active           = excluded.days_active
+"""
+_MONTHLY_UPSERT_SQL = _MONTHLY_UPSERT.format(source="VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+# Per period: (summary table, upsert template, key columns selected after
+# user_email, GROUP BY expression, has days_active, prune condition matching
+# a summary row to its daily_totals rows `t`)
+_SUMMARY_PERIODS = {
+    "daily": (
+        "daily_summaries", _DAILY_UPSERT, "date", "date", False,
+        "t.date = daily_summaries.date",
+    ),
+    "weekly": (
+        "weekly_summaries", _WEEKLY_UPSERT,
+        f"{_ISO_YEAR_SQL}, {_ISO_WEEK_SQL}, week_start, date(week_start, '+6 days')",
+        "week_start", True,
+        "t.date BETWEEN weekly_summaries.week_start AND weekly_summaries.week_end",
+    ),
+    "monthly": (
+        "monthly_summaries", _MONTHLY_UPSERT,
+        "CAST(substr(date, 1, 4) AS INTEGER), CAST(substr(date, 6, 2) AS INTEGER)",
+        "substr(date, 1, 7)", True,
+        "substr(t.date, 1, 7) = printf('%04d-%02d', monthly_summaries.year, monthly_summaries.month)",
+    ),
+}
+
+
+# ---------------------------------------------------------------------------
+# Connections
+# ---------------------------------------------------------------------------
+class ConnectionManager:
+    """
+    One writer connection plus a bounded pool of query-only reader
+    connections. Callers serialize their use of writer(); reader() hands each
+    caller its own connection (waiting while all `readers` are busy), so
+    dashboard queries never share a connection with ingestion or each other.
+    """
+
+    def __init__(self, db_path: str, readers: int = READ_POOL_SIZE):
+        self.db_path = db_path
+        self.max_readers = readers
+        self._writer: Optional[sqlite3.Connection] = None
+        self._idle: List[sqlite3.Connection] = []
+        self._open_readers = 0
+        self._slots = threading.BoundedSemaphore(readers)
+        self._lock = threading.Lock()
+        # Bumped by close(); readers from an older generation are discarded
+        self._generation = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=BUSY_TIMEOUT)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def writer(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._writer is None:
+                conn = self._connect()
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA foreign_keys=ON")
+                self._writer = conn
+            return self._writer
+
+    @contextmanager
+    def reader(self):
+        """Borrow a query-only connection for the duration of the block."""
+        self._slots.acquire()
+        try:
+            with self._lock:
+                generation = self._generation
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                # The writer sets WAL mode (persistent in the file) first
+                self.writer()
+                conn = self._connect()
+                conn.execute("PRAGMA query_only=ON")
+                with self._lock:
+                    self._open_readers += 1
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                with self._lock:
+                    if generation == self._generation:
+                        self._idle.append(conn)
+                        conn = None
+                    else:
+                        self._open_readers -= 1
+                if conn is not None:
+                    conn.close()
+        finally:
+            self._slots.release()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "readers_open": self._open_readers,
+                "readers_idle": len(self._idle),
+                "readers_max": self.max_readers,
+            }
+
+    def close(self):
+        """Close the writer and idle readers; borrowed readers close on return."""
+        with self._lock:
+            self._generation += 1
+            conns, self._idle = self._idle, []
+            self._open_readers -= len(conns)
+            writer, self._writer = self._writer, None
+        for conn in conns:
+            conn.close()
+        if writer is not None:
+            try:
+                # Fold the WAL back into the main file before exiting
+                writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error as e:
+                print(f"[DB] WAL checkpoint failed: {e}")
+            writer.close()
+
+
+def _writes(method):
+    """Run `method` holding the instance's write lock (one writer at a time)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._write_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 # ---------------------------------------------------------------------------
 # Database helper
 # ---------------------------------------------------------------------------
 class EyeGuardianDB:
-    """Thin wrapper around SQLite for EyeGuardian data storage."""
-
-    def __init__(self, db_path: str = DB_PATH):
+    """
+    Thin wrapper around SQLite for EyeGuardian data storage.
+
+    Writes go through a single writer connection (see ConnectionManager);
+    the get_* queries borrow pooled read-only connections, so they are safe
+    to call from any thread and run concurrently with ingestion.
+
+    Summaries are maintained incrementally: every write also adds to the
+    per-(user, day) running sums in daily_totals, and end_session() derives
+    the day/week/month rows from at most 31 of those rows. The scanning
+    _rebuild_* methods and rebuild_daily_totals() remain for repair.
+
+    Snapshots and alerts are written behind: insert_snapshot()/insert_alert()
+    only queue the row, and a background thread commits queued rows in
+    batches. flush() forces pending rows to disk (end_session() and close()
+    call it), so summaries and shutdown never miss queued data. A failed
+    batch is retried row by row; rows that still fail go back to the front
+    of the queue and are only dropped after WRITE_MAX_ATTEMPTS. Pass
+    write_behind=False to write every row immediately (errors then raise).
+    """
+
+    def __init__(
+        self,
+        db_path: str = DB_PATH,
+        write_behind: bool = True,
+        batch_size: int = WRITE_BATCH_SIZE,
+        flush_interval: float = WRITE_FLUSH_INTERVAL,
+        read_pool_size: int = READ_POOL_SIZE,
+    ):
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         self.db_path = db_path
-        self._conn: Optional[sqlite3.Connection] = None
+        self._connections = ConnectionManager(db_path, read_pool_size)
+        self.write_behind = write_behind
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Serializes use of the writer connection (writer thread, session
+        # calls, summary rebuilds)
+        self._write_lock = threading.RLock()
+        # Pending (kind, params, attempts) rows, guarded by the condition
+        self._pending: List[tuple] = []
+        self._pending_cond = threading.Condition()
+        self._writer: Optional[threading.Thread] = None
+        self._closing = False
+        self._write_stats = {
+            "batches": 0,
+            "rows_written": 0,
+            "errors": 0,
+            "retried_rows": 0,
+            "dropped_rows": 0,
+            "last_batch_rows": 0,
+            "last_batch_ms": 0.0,
+        }
         self._ensure_schema()
 
     # -- connection management -----------------------------------------------
 
     def _get_conn(self) -> sqlite3.Connection:
-        if self._conn is None:
-            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            self._conn.row_factory = sqlite3.Row
-            self._conn.execute("PRAGMA journal_mode=WAL")
-            self._conn.execute("PRAGMA foreign_keys=ON")
-        return self._conn
+        """The writer connection; hold self._write_lock while using it."""
+        return self._connections.writer()
 
+    def _read(self):
+        """Context manager borrowing a pooled read-only connection."""
+        return self._connections.reader()
+
+    @_writes
     def _ensure_schema(self):
         conn = self._get_conn()
+        had_totals = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_totals'"
+        ).fetchone()
         conn.executescript(_SCHEMA_SQL)
         conn.commit()
+        self._migrate(conn)
+        conn.executescript(_INDEX_SQL)
+        conn.commit()
+        if not had_totals:
+            # Database from before incremental summaries: backfill once
+            self.rebuild_daily_totals()
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection):
+        """Add and backfill the epoch columns on databases created before them."""
+        for table, column, iso_column in _EPOCH_COLUMNS:
+            existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER")
+            conn.execute(
+                f"UPDATE {table} SET {column} = CAST(strftime('%s', {iso_column}) AS INTEGER) "
+                f"WHERE {column} IS NULL"
+            )
+        conn.commit()
 
     def close(self):
-        if self._conn:
-            self._conn.close()
-            self._conn = None
+        """Flush queued rows, stop the writer thread and close all connections."""
+        with self._pending_cond:
+            self._closing = True
+            self._pending_cond.notify_all()
+        writer = self._writer
+        if writer is not None:
+            writer.join()
+        # Each failed pass moves every row closer to WRITE_MAX_ATTEMPTS, so
+        # this ends with the queue written or (counted as) dropped
+        for _ in range(WRITE_MAX_ATTEMPTS):
+            if self.flush():
+                break
+        with self._write_lock:
+            self._connections.close()
+        # Later calls lazily reopen connections (and the writer thread)
+        with self._pending_cond:
+            self._writer = None
+            self._closing = False
+
+    # -- write-behind ----------------------------------------------------------
+
+    def _enqueue_write(self, kind: str, params: tuple):
+        """Queue one snapshot/alert row; never touches the disk on the caller's thread."""
+        if not self.write_behind:
+            with self._write_lock:
+                self._commit_rows([(kind, params, 0)])
+            return
+        with self._pending_cond:
+            self._pending.append((kind, params, 0))
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._writer_loop, name="eg-db-writer", daemon=True)
+                self._writer.start()
+            if len(self._pending) >= self.batch_size:
+                self._pending_cond.notify_all()
+
+    def _writer_loop(self):
+        try:
+            failed = False
+            while True:
+                with self._pending_cond:
+                    # Wait for a full batch, the flush interval or close();
+                    # after a failure always wait the interval before retrying
+                    deadline = time.time() + self.flush_interval
+                    while not self._closing and (failed or len(self._pending) < self.batch_size):
+                        remaining = deadline - time.time()
+                        if remaining <= 0:
+                            break
+                        self._pending_cond.wait(remaining)
+                    closing = self._closing
+                try:
+                    failed = not self.flush()
+                except Exception as e:
+                    failed = True
+                    print(f"[DB] Write-behind flush failed: {e}")
+                if closing:
+                    return
+        finally:
+            # Let the next enqueue start a fresh writer should this one die
+            with self._pending_cond:
+                if self._writer is threading.current_thread():
+                    self._writer = None
+
+    def flush(self) -> bool:
+        """
+        Commit every queued row now. Returns True once they are all on disk;
+        False if some failed and were put back in the queue (or dropped).
+        """
+        # Taking the batch under the write lock keeps batches in order and
+        # guarantees rows queued before this call are committed on return
+        with self._write_lock:
+            with self._pending_cond:
+                batch, self._pending = self._pending, []
+            return self._write_batch(batch) if batch else True
+
+    def _write_batch(self, batch: List[tuple]) -> bool:
+        """Write `batch` in one transaction, falling back to row by row on failure."""
+        try:
+            self._commit_rows(batch)
+            return True
+        except Exception as e:
+            self._write_stats["errors"] += 1
+            print(f"[DB] Failed to write batch of {len(batch)} rows: {e}")
+        if len(batch) == 1:
+            failed = batch
+        else:
+            # Isolate the failing rows so one bad row cannot sink the others
+            failed = []
+            for row in batch:
+                try:
+                    self._commit_rows([row])
+                except Exception:
+                    failed.append(row)
+        if not failed:
+            return True
+        retry = [(kind, params, attempts + 1) for kind, params, attempts in failed
+                 if attempts + 1 < WRITE_MAX_ATTEMPTS]
+        dropped = len(failed) - len(retry)
+        stats = self._write_stats
+        stats["retried_rows"] += len(retry)
+        if dropped:
+            stats["dropped_rows"] += dropped
+            print(f"[DB] Dropped {dropped} rows after {WRITE_MAX_ATTEMPTS} failed attempts")
+        with self._pending_cond:
+            self._pending[:0] = retry
+        return False
+
+    def _commit_rows(self, batch: List[tuple]):
+        """One transaction for `batch` of (kind, params, attempts); raises on failure."""
+        started = time.perf_counter()
+        rows: Dict[str, List[tuple]] = {}
+        for kind, params, _ in batch:
+            rows.setdefault(kind, []).append(params)
+        conn = self._get_conn()
+        with conn:  # one transaction: commit, or roll back on error
+            for kind, params in rows.items():
+                conn.executemany(_WRITE_SQL[kind], params)
+            self._add_daily_totals(conn, self._batch_increments(rows))
+        stats = self._write_stats
+        stats["batches"] += 1
+        stats["rows_written"] += len(batch)
+        stats["last_batch_rows"] = len(batch)
+        stats["last_batch_ms"] = round((time.perf_counter() - started) * 1000.0, 2)
+
+    @property
+    def pending_writes(self) -> int:
+        """Rows queued but not yet committed."""
+        return len(self._pending)
+
+    def get_write_stats(self) -> Dict[str, Any]:
+        """Write-behind queue depth and batch counters."""
+        return dict(self._write_stats, queue_depth=self.pending_writes)
+
+    def get_connection_stats(self) -> Dict[str, int]:
+        """Reader pool usage."""
+        return self._connections.stats()
 
     # -- sessions ------------------------------------------------------------
 
     def start_session(self, user_email: str = None) -> int:
         """Create a new monitoring session. Returns the session id."""
-        conn = self._get_conn()
-        cur = conn.execute(
-            "INSERT INTO sessions (user_email, started_at) VALUES (?, ?)",
-            (user_email, datetime.now().isoformat()),
-        )
-        conn.commit()
-        return cur.lastrowid  # type: ignore[return-value]
+        with self._write_lock:
+            conn = self._get_conn()
+            now = datetime.now()
+            cur = conn.execute(
+                "INSERT INTO sessions (user_email, started_at, started_ts) VALUES (?, ?, ?)",
+                (user_email, now.isoformat(), _epoch(now)),
+            )
+            conn.commit()
+            return cur.lastrowid  # type: ignore[return-value]
 
     def end_session(self, session_id: int):
         """Mark a session as ended and compute duration."""
-        conn = self._get_conn()
-        now = datetime.now().isoformat()
-        
-        # Get user_email from session before updating
-        row = conn.execute("SELECT user_email FROM sessions WHERE id = ?", (session_id,)).fetchone()
-        user_email = row["user_email"] if row else None
-        
-        conn.execute(
-            """
-            UPDATE sessions
-               SET ended_at         = ?,
-                   duration_seconds = CAST(
-                       (julianday(?) - julianday(started_at)) * 86400 AS INTEGER
-                   )
-             WHERE id = ?
-            """,
-            (now, now, session_id),
-        )
-        conn.commit()
-        # Rebuild all summaries for today
-        today = date.today()
-        self._rebuild_daily_summary(today.isoformat(), user_email)
-        self._rebuild_weekly_summary(today, user_email)
-        self._rebuild_monthly_summary(today.year, today.month, user_email)
+        with self._write_lock:
+            # Summaries below must see every snapshot/alert queued so far
+            self.flush()
+            conn = self._get_conn()
+            now = datetime.now().isoformat()
+
+            # Get user_email from session before updating
+            row = conn.execute("SELECT user_email, started_at FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            user_email = row["user_email"] if row else None
+
+            conn.execute(
+                """
+                UPDATE sessions
+                   SET ended_at         = ?,
+                       duration_seconds = CAST(
+                           (julianday(?) - julianday(started_at)) * 86400 AS INTEGER
+                       )
+                 WHERE id = ?
+                """,
+                (now, now, session_id),
+            )
+            today = date.today()
+            started = today
+            if row:
+                started = date.fromisoformat(row["started_at"][:10])
+                duration = conn.execute(
+                    "SELECT duration_seconds FROM sessions WHERE id = ?", (session_id,)
+                ).fetchone()["duration_seconds"]
+                # Session minutes count towards the day the session started
+                self._add_daily_totals(conn, {(user_email, started.isoformat()): {"session_seconds": duration or 0}})
+            conn.commit()
+            # Re-derive today's summaries (and the start day's, for sessions
+            # spanning midnight) from the running totals
+            self._refresh_summaries(today, user_email)
+            if started != today:
+                self._refresh_summaries(started, user_email)
 
     # -- snapshots -----------------------------------------------------------
 
     def insert_snapshot(self, session_id: int, payload: Dict[str, Any], user_email: str = None):
         """
-        Persist one metric snapshot.
+        Queue one metric snapshot for writing (see flush()).
         `payload` should match the JSON structure already sent over the WS.
         """
         details = payload.get("details") or {}
@@ -239,58 +814,35 @@ class EyeGuardianDB:
         redness = details.get("redness", {})
         fusion = details.get("risk_fusion", {})
 
-        conn = self._get_conn()
-        conn.execute(
-            """
-            INSERT INTO snapshots (
-                session_id, user_email, timestamp,
-                blink_rate, ear, total_blinks, incomplete_blinks, is_dry,
-                distance_cm, distance_risk,
-                brightness, light_level, light_risk,
-                head_position, posture_overall, pitch, yaw, roll,
-                posture_risk, posture_score,
-                redness, redness_level,
-                strain_index, risk_score, risk_level
-            ) VALUES (
-                ?, ?, ?,
-                ?, ?, ?, ?, ?,
-                ?, ?,
-                ?, ?, ?,
-                ?, ?, ?, ?, ?,
-                ?, ?,
-                ?, ?,
-                ?, ?, ?
-            )
-            """,
-            (
-                session_id,
-                user_email,
-                datetime.now().isoformat(),
-                payload.get("blink_rate"),
-                blink.get("ear"),
-                blink.get("total_blinks"),
-                blink.get("incomplete_blinks"),
-                int(blink.get("is_dry", False)),
-                payload.get("distance_cm"),
-                distance.get("risk_score"),
-                light.get("brightness"),
-                light.get("level"),
-                light.get("risk"),
-                posture.get("head_position"),
-                posture.get("overall"),
-                posture.get("pitch"),
-                posture.get("yaw"),
-                posture.get("roll"),
-                posture.get("risk"),
-                payload.get("posture_score"),
-                payload.get("redness"),
-                redness.get("level"),
-                payload.get("overall_strain_index"),
-                fusion.get("score"),
-                fusion.get("level"),
-            ),
-        )
-        conn.commit()
+        now = datetime.now()
+        self._enqueue_write("snapshot", (
+            session_id,
+            user_email,
+            now.isoformat(),
+            payload.get("blink_rate"),
+            blink.get("ear"),
+            blink.get("total_blinks"),
+            blink.get("incomplete_blinks"),
+            int(blink.get("is_dry", False)),
+            payload.get("distance_cm"),
+            distance.get("risk_score"),
+            light.get("brightness"),
+            light.get("level"),
+            light.get("risk"),
+            posture.get("head_position"),
+            posture.get("overall"),
+            posture.get("pitch"),
+            posture.get("yaw"),
+            posture.get("roll"),
+            posture.get("risk"),
+            payload.get("posture_score"),
+            payload.get("redness"),
+            redness.get("level"),
+            payload.get("overall_strain_index"),
+            fusion.get("score"),
+            fusion.get("level"),
+            _epoch(now),
+        ))
 
     # -- alerts --------------------------------------------------------------
 
@@ -302,21 +854,213 @@ class EyeGuardianDB:
         message: str,
         user_email: str = None,
     ):
+        now = datetime.now()
+        self._enqueue_write(
+            "alert",
+            (session_id, user_email, now.isoformat(), alert_type, severity, message, _epoch(now)),
+        )
+
+    # -- incremental summaries -----------------------------------------------
+
+    @staticmethod
+    def _batch_increments(rows: Dict[str, List[tuple]]) -> Dict[tuple, Counter]:
+        """daily_totals deltas for one batch of queued snapshot/alert rows."""
+        increments: Dict[tuple, Counter] = {}
+        for params in rows.get("snapshot", ()):
+            snap = dict(zip(_SNAPSHOT_COLUMNS, params))
+            deltas = increments.setdefault((snap["user_email"], snap["timestamp"][:10]), Counter())
+            deltas["snapshot_count"] += 1
+            for prefix, (column, _) in _TOTAL_AVERAGES.items():
+                if snap[column] is not None:
+                    deltas[f"{prefix}_sum"] += snap[column]
+                    deltas[f"{prefix}_n"] += 1
+            if snap["is_dry"] == 1:
+                deltas["dry_count"] += 1
+            if snap["posture_risk"] is not None and snap["posture_risk"] >= 0.5:
+                deltas["bad_posture_count"] += 1
+        for _, user_email, timestamp, *_ in rows.get("alert", ()):
+            increments.setdefault((user_email, timestamp[:10]), Counter())["alert_count"] += 1
+        return increments
+
+    @staticmethod
+    def _add_daily_totals(conn: sqlite3.Connection, increments: Dict[tuple, Dict[str, float]]):
+        """Add {(user_email, date): {counter: delta}} onto daily_totals (caller commits)."""
+        if increments:
+            conn.executemany(_TOTALS_ADD_SQL, [
+                (user_email or "", day) + tuple(deltas.get(c, 0) for c in _TOTAL_COUNTERS)
+                for (user_email, day), deltas in increments.items()
+            ])
+
+    @_writes
+    def _refresh_summaries(self, d: date, user_email: str = None):
+        """Derive the daily, weekly and monthly rows containing `d` from daily_totals."""
         conn = self._get_conn()
+
+        def totals(start: date, end: date):
+            sql, params = _TOTALS_SUMMARY_SQL, [start.isoformat(), end.isoformat()]
+            if user_email:
+                sql += "   AND user_email = ?"
+                params.append(user_email)
+            row = conn.execute(sql, params).fetchone()
+            averages = tuple(row[summary] for _, summary in _TOTAL_AVERAGES.values())
+            return (row["total_min"],) + averages + (row["alert_count"], row["dry_min"], row["bad_posture_min"]), row["days_active"]
+
+        day, _ = totals(d, d)
+        conn.execute(_DAILY_UPSERT_SQL, (user_email, d.isoformat()) + day)
+
+        iso_year, iso_week, _ = d.isocalendar()
+        week_start, week_end = self._iso_week_range(d)
+        week, days_active = totals(week_start, week_end)
         conn.execute(
-            """
-            INSERT INTO alerts (session_id, user_email, timestamp, alert_type, severity, message)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            (session_id, user_email, datetime.now().isoformat(), alert_type, severity, message),
+            _WEEKLY_UPSERT_SQL,
+            (user_email, iso_year, iso_week, week_start.isoformat(), week_end.isoformat()) + week + (days_active,),
         )
+
+        month_start = d.replace(day=1)
+        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        month, days_active = totals(month_start, month_end)
+        conn.execute(_MONTHLY_UPSERT_SQL, (user_email, d.year, d.month) + month + (days_active,))
         conn.commit()
 
-    # -- daily summaries -----------------------------------------------------
+    @_writes
+    def rebuild_daily_totals(self, user_email: str = None):
+        """
+        Recompute daily_totals from snapshots, alerts and sessions (all users,
+        or just `user_email`) – for repair, or after rows were written
+        directly to the tables.
+        """
+        self.flush()
+        conn = self._get_conn()
+        with conn:
+            self._recompute_daily_totals(conn, user_email)
+
+    @staticmethod
+    def _recompute_daily_totals(conn: sqlite3.Connection, user_email: str = None) -> int:
+        """rebuild_daily_totals() inside the caller's transaction; returns the row count."""
+        where, params = ("WHERE user_email = ?", (user_email,)) if user_email else ("WHERE 1", ())
+        sums = ",\n                   ".join(
+            f"COALESCE(SUM({column}), 0), COUNT({column})" for column, _ in _TOTAL_AVERAGES.values()
+        )
+        averaged = ", ".join(f"{prefix}_sum, {prefix}_n" for prefix in _TOTAL_AVERAGES)
+        if user_email:
+            conn.execute("DELETE FROM daily_totals WHERE user_email = ?", (user_email,))
+        else:
+            conn.execute("DELETE FROM daily_totals")
+        conn.execute(
+            f"""
+            INSERT INTO daily_totals (
+                user_email, date, snapshot_count, {averaged},
+                dry_count, bad_posture_count
+            )
+            SELECT COALESCE(user_email, ''), substr(timestamp, 1, 10), COUNT(*),
+                   {sums},
+                   SUM(CASE WHEN is_dry = 1 THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN posture_risk >= 0.5 THEN 1 ELSE 0 END)
+              FROM snapshots
+             {where}
+             GROUP BY 1, 2
+            """,
+            params,
+        )
+        conn.execute(
+            f"""
+            INSERT INTO daily_totals (user_email, date, alert_count)
+            SELECT COALESCE(user_email, ''), substr(timestamp, 1, 10), COUNT(*)
+              FROM alerts
+             {where}
+             GROUP BY 1, 2
+            ON CONFLICT(user_email, date) DO UPDATE SET alert_count = excluded.alert_count
+            """,
+            params,
+        )
+        conn.execute(
+            f"""
+            INSERT INTO daily_totals (user_email, date, session_seconds)
+            SELECT COALESCE(user_email, ''), substr(started_at, 1, 10), SUM(duration_seconds)
+              FROM sessions
+             {where} AND duration_seconds IS NOT NULL
+             GROUP BY 1, 2
+            ON CONFLICT(user_email, date) DO UPDATE SET session_seconds = excluded.session_seconds
+            """,
+            params,
+        )
+        where = "WHERE user_email = ?" if user_email else ""
+        return conn.execute(f"SELECT COUNT(*) FROM daily_totals {where}", params).fetchone()[0]
 
+    @_writes
+    def rebuild_all_summaries(self, prune: bool = False, progress=None) -> Dict[str, Any]:
+        """
+        Recompute daily_totals and every daily, weekly and monthly summary
+        for all users and periods from the raw tables: one grouped
+        INSERT ... SELECT per table, all in a single transaction. Rows for
+        anonymous data (user_email NULL) aggregate all users, like
+        end_session() does for them.
+
+        prune=True also deletes summary rows with no underlying data (e.g.
+        hand-written rows from seed_data.py). `progress(step, done, total)`
+        is called after each step.
+        """
+        self.flush()
+        conn = self._get_conn()
+        started = time.perf_counter()
+        steps = ["daily_totals"] + list(_SUMMARY_PERIODS) + (["prune"] if prune else [])
+        report: Dict[str, Any] = {}
+
+        def done(step, rows):
+            report[step] = rows
+            if progress:
+                progress(step, len(report), len(steps))
+
+        with conn:
+            done("daily_totals", self._recompute_daily_totals(conn))
+            for period, (table, template, keys, group, with_days, match) in _SUMMARY_PERIODS.items():
+                columns = _TOTALS_AGGREGATES + (",\n" + _DAYS_ACTIVE if with_days else "")
+                source = f"(SELECT *, {_WEEK_START_SQL} AS week_start FROM daily_totals)"
+                rows = conn.execute(template.format(source=f"""
+                    SELECT user_email, {keys}, {columns}
+                      FROM {source}
+                     WHERE user_email != ''
+                     GROUP BY user_email, {group}
+                """)).rowcount
+                # NULL user_email never conflicts, so replace the NULL rows of
+                # every period that has anonymous data
+                conn.execute(f"""
+                    DELETE FROM {table}
+                     WHERE user_email IS NULL
+                       AND EXISTS (SELECT 1 FROM daily_totals t WHERE {match} AND t.user_email = '')
+                """)
+                rows += conn.execute(template.format(source=f"""
+                    SELECT NULL, {keys}, {columns}
+                      FROM {source}
+                     WHERE 1
+                     GROUP BY {group}
+                    HAVING SUM(user_email = '') > 0
+                """)).rowcount
+                done(period, rows)
+            if prune:
+                pruned = 0
+                for table, _, _, _, _, match in _SUMMARY_PERIODS.values():
+                    pruned += conn.execute(f"""
+                        DELETE FROM {table}
+                         WHERE NOT EXISTS (
+                               SELECT 1 FROM daily_totals t
+                                WHERE {match}
+                                  AND (t.user_email = {table}.user_email OR {table}.user_email IS NULL)
+                         )
+                    """).rowcount
+                done("prune", pruned)
+
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        return report
+
+    # -- daily summaries (full rescans, kept for repair) ----------------------
+
+    @_writes
     def _rebuild_daily_summary(self, iso_date: str, user_email: str = None):
         """Recompute the daily summary row for `iso_date` (YYYY-MM-DD)."""
         conn = self._get_conn()
+        day = date.fromisoformat(iso_date)
+        lo, hi = _day_range(day, day)
 
         # Total session minutes today
         if user_email:
@@ -324,21 +1068,21 @@ class EyeGuardianDB:
                 """
                 SELECT COALESCE(SUM(duration_seconds), 0) / 60.0 AS total_min
                   FROM sessions
-                 WHERE started_at LIKE ? || '%'
+                 WHERE started_ts >= ? AND started_ts < ?
                    AND duration_seconds IS NOT NULL
                    AND user_email = ?
                 """,
-                (iso_date, user_email),
+                (lo, hi, user_email),
             ).fetchone()
         else:
             row = conn.execute(
                 """
                 SELECT COALESCE(SUM(duration_seconds), 0) / 60.0 AS total_min
                   FROM sessions
-                 WHERE started_at LIKE ? || '%'
+                 WHERE started_ts >= ? AND started_ts < ?
                    AND duration_seconds IS NOT NULL
                 """,
-                (iso_date,),
+                (lo, hi),
             ).fetchone()
         total_min = row["total_min"] if row else 0
 
@@ -357,10 +1101,10 @@ class EyeGuardianDB:
                     SUM(CASE WHEN posture_risk >= 0.5 THEN 1 ELSE 0 END) AS bad_posture_count,
                     COUNT(*) AS total_snaps
                   FROM snapshots
-                 WHERE timestamp LIKE ? || '%'
+                 WHERE ts >= ? AND ts < ?
                    AND user_email = ?
                 """,
-                (iso_date, user_email),
+                (lo, hi, user_email),
             ).fetchone()
         else:
             avgs = conn.execute(
@@ -376,20 +1120,20 @@ class EyeGuardianDB:
                     SUM(CASE WHEN posture_risk >= 0.5 THEN 1 ELSE 0 END) AS bad_posture_count,
                     COUNT(*) AS total_snaps
                   FROM snapshots
-                 WHERE timestamp LIKE ? || '%'
+                 WHERE ts >= ? AND ts < ?
                 """,
-                (iso_date,),
+                (lo, hi),
             ).fetchone()
 
         if user_email:
             alert_count_row = conn.execute(
-                "SELECT COUNT(*) AS cnt FROM alerts WHERE timestamp LIKE ? || '%' AND user_email = ?",
-                (iso_date, user_email),
+                "SELECT COUNT(*) AS cnt FROM alerts WHERE ts >= ? AND ts < ? AND user_email = ?",
+                (lo, hi, user_email),
             ).fetchone()
         else:
             alert_count_row = conn.execute(
-                "SELECT COUNT(*) AS cnt FROM alerts WHERE timestamp LIKE ? || '%'",
-                (iso_date,),
+                "SELECT COUNT(*) AS cnt FROM alerts WHERE ts >= ? AND ts < ?",
+                (lo, hi),
             ).fetchone()
         alert_count = alert_count_row["cnt"] if alert_count_row else 0
 
@@ -399,25 +1143,7 @@ class EyeGuardianDB:
         bad_posture_min = (avgs["bad_posture_count"] or 0) * 0.5 if avgs else 0
 
         conn.execute(
-            """
-            INSERT INTO daily_summaries (
-                user_email, date, total_session_minutes,
-                avg_blink_rate, avg_distance_cm, avg_posture_score,
-                avg_brightness, avg_strain_index, avg_redness,
-                alert_count, dry_eye_minutes, bad_posture_minutes
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(user_email, date) DO UPDATE SET
-                total_session_minutes = excluded.total_session_minutes,
-                avg_blink_rate        = excluded.avg_blink_rate,
-                avg_distance_cm       = excluded.avg_distance_cm,
-                avg_posture_score     = excluded.avg_posture_score,
-                avg_brightness        = excluded.avg_brightness,
-                avg_strain_index      = excluded.avg_strain_index,
-                avg_redness           = excluded.avg_redness,
-                alert_count           = excluded.alert_count,
-                dry_eye_minutes       = excluded.dry_eye_minutes,
-                bad_posture_minutes   = excluded.bad_posture_minutes
-            """,
+            _DAILY_UPSERT_SQL,
             (
                 user_email,
                 iso_date,
@@ -444,12 +1170,14 @@ class EyeGuardianDB:
         week_end = week_start + timedelta(days=6)           # Sunday
         return week_start, week_end
 
+    @_writes
     def _rebuild_weekly_summary(self, d: date, user_email: str = None):
         """Recompute the weekly summary row for the ISO week containing `d`."""
         iso_year, iso_week, _ = d.isocalendar()
         week_start, week_end = self._iso_week_range(d)
         start_str = week_start.isoformat()
         end_str = week_end.isoformat()
+        lo, hi = _day_range(week_start, week_end)
 
         conn = self._get_conn()
 
@@ -458,21 +1186,21 @@ class EyeGuardianDB:
                 """
                 SELECT COALESCE(SUM(duration_seconds), 0) / 60.0 AS total_min
                   FROM sessions
-                 WHERE started_at >= ? AND started_at <= ? || 'T23:59:59'
+                 WHERE started_ts >= ? AND started_ts < ?
                    AND duration_seconds IS NOT NULL
                    AND user_email = ?
                 """,
-                (start_str, end_str, user_email),
+                (lo, hi, user_email),
             ).fetchone()
         else:
             row = conn.execute(
                 """
                 SELECT COALESCE(SUM(duration_seconds), 0) / 60.0 AS total_min
                   FROM sessions
-                 WHERE started_at >= ? AND started_at <= ? || 'T23:59:59'
+                 WHERE started_ts >= ? AND started_ts < ?
                    AND duration_seconds IS NOT NULL
                 """,
-                (start_str, end_str),
+                (lo, hi),
             ).fetchone()
         total_min = row["total_min"] if row else 0
 
@@ -490,10 +1218,10 @@ class EyeGuardianDB:
                     SUM(CASE WHEN posture_risk >= 0.5 THEN 1 ELSE 0 END) AS bad_posture_count,
                     COUNT(DISTINCT substr(timestamp, 1, 10)) AS days_active
                   FROM snapshots
-                 WHERE timestamp >= ? AND timestamp <= ? || 'T23:59:59'
+                 WHERE ts >= ? AND ts < ?
                    AND user_email = ?
                 """,
-                (start_str, end_str, user_email),
+                (lo, hi, user_email),
             ).fetchone()
         else:
             avgs = conn.execute(
@@ -509,20 +1237,20 @@ class EyeGuardianDB:
                     SUM(CASE WHEN posture_risk >= 0.5 THEN 1 ELSE 0 END) AS bad_posture_count,
                     COUNT(DISTINCT substr(timestamp, 1, 10)) AS days_active
                   FROM snapshots
-                 WHERE timestamp >= ? AND timestamp <= ? || 'T23:59:59'
+                 WHERE ts >= ? AND ts < ?
                 """,
-                (start_str, end_str),
+                (lo, hi),
             ).fetchone()
 
         if user_email:
             alert_row = conn.execute(
-                "SELECT COUNT(*) AS cnt FROM alerts WHERE timestamp >= ? AND timestamp <= ? || 'T23:59:59' AND user_email = ?",
-                (start_str, end_str, user_email),
+                "SELECT COUNT(*) AS cnt FROM alerts WHERE ts >= ? AND ts < ? AND user_email = ?",
+                (lo, hi, user_email),
             ).fetchone()
         else:
             alert_row = conn.execute(
-                "SELECT COUNT(*) AS cnt FROM alerts WHERE timestamp >= ? AND timestamp <= ? || 'T23:59:59'",
-                (start_str, end_str),
+                "SELECT COUNT(*) AS cnt FROM alerts WHERE ts >= ? AND ts < ?",
+                (lo, hi),
             ).fetchone()
         alert_count = alert_row["cnt"] if alert_row else 0
 
@@ -531,29 +1259,7 @@ class EyeGuardianDB:
         days_active = avgs["days_active"] if avgs else 0
 
         conn.execute(
-            """
-            INSERT INTO weekly_summaries (
-                user_email, year, week, week_start, week_end,
-                total_session_minutes,
-                avg_blink_rate, avg_distance_cm, avg_posture_score,
-                avg_brightness, avg_strain_index, avg_redness,
-                alert_count, dry_eye_minutes, bad_posture_minutes, days_active
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(user_email, year, week) DO UPDATE SET
-                week_start            = excluded.week_start,
-                week_end              = excluded.week_end,
-                total_session_minutes = excluded.total_session_minutes,
-                avg_blink_rate        = excluded.avg_blink_rate,
-                avg_distance_cm       = excluded.avg_distance_cm,
-                avg_posture_score     = excluded.avg_posture_score,
-                avg_brightness        = excluded.avg_brightness,
-                avg_strain_index      = excluded.avg_strain_index,
-                avg_redness           = excluded.avg_redness,
-                alert_count           = excluded.alert_count,
-                dry_eye_minutes       = excluded.dry_eye_minutes,
-                bad_posture_minutes   = excluded.bad_posture_minutes,
-                days_active           = excluded.days_active
-            """,
+            _WEEKLY_UPSERT_SQL,
             (
                 user_email,
                 iso_year, iso_week, start_str, end_str,
@@ -574,15 +1280,15 @@ class EyeGuardianDB:
 
     # -- monthly summaries ---------------------------------------------------
 
+    @_writes
     def _rebuild_monthly_summary(self, year: int, month: int, user_email: str = None):
         """Recompute the monthly summary row for the given year/month."""
         # Date range for the month
-        month_start = date(year, month, 1).isoformat()
         if month == 12:
             month_end = date(year + 1, 1, 1) - timedelta(days=1)
         else:
             month_end = date(year, month + 1, 1) - timedelta(days=1)
-        month_end_str = month_end.isoformat()
+        lo, hi = _day_range(date(year, month, 1), month_end)
 
         conn = self._get_conn()
 
@@ -591,21 +1297,21 @@ class EyeGuardianDB:
                 """
                 SELECT COALESCE(SUM(duration_seconds), 0) / 60.0 AS total_min
                   FROM sessions
-                 WHERE started_at >= ? AND started_at <= ? || 'T23:59:59'
+                 WHERE started_ts >= ? AND started_ts < ?
                    AND duration_seconds IS NOT NULL
                    AND user_email = ?
                 """,
-                (month_start, month_end_str, user_email),
+                (lo, hi, user_email),
             ).fetchone()
         else:
             row = conn.execute(
                 """
                 SELECT COALESCE(SUM(duration_seconds), 0) / 60.0 AS total_min
                   FROM sessions
-                 WHERE started_at >= ? AND started_at <= ? || 'T23:59:59'
+                 WHERE started_ts >= ? AND started_ts < ?
                    AND duration_seconds IS NOT NULL
                 """,
-                (month_start, month_end_str),
+                (lo, hi),
             ).fetchone()
         total_min = row["total_min"] if row else 0
 
@@ -623,10 +1329,10 @@ class EyeGuardianDB:
                     SUM(CASE WHEN posture_risk >= 0.5 THEN 1 ELSE 0 END) AS bad_posture_count,
                     COUNT(DISTINCT substr(timestamp, 1, 10)) AS days_active
                   FROM snapshots
-                 WHERE timestamp >= ? AND timestamp <= ? || 'T23:59:59'
+                 WHERE ts >= ? AND ts < ?
                    AND user_email = ?
                 """,
-                (month_start, month_end_str, user_email),
+                (lo, hi, user_email),
             ).fetchone()
         else:
             avgs = conn.execute(
@@ -642,20 +1348,20 @@ class EyeGuardianDB:
                     SUM(CASE WHEN posture_risk >= 0.5 THEN 1 ELSE 0 END) AS bad_posture_count,
                     COUNT(DISTINCT substr(timestamp, 1, 10)) AS days_active
                   FROM snapshots
-                 WHERE timestamp >= ? AND timestamp <= ? || 'T23:59:59'
+                 WHERE ts >= ? AND ts < ?
                 """,
-                (month_start, month_end_str),
+                (lo, hi),
             ).fetchone()
 
         if user_email:
             alert_row = conn.execute(
-                "SELECT COUNT(*) AS cnt FROM alerts WHERE timestamp >= ? AND timestamp <= ? || 'T23:59:59' AND user_email = ?",
-                (month_start, month_end_str, user_email),
+                "SELECT COUNT(*) AS cnt FROM alerts WHERE ts >= ? AND ts < ? AND user_email = ?",
+                (lo, hi, user_email),
             ).fetchone()
         else:
             alert_row = conn.execute(
-                "SELECT COUNT(*) AS cnt FROM alerts WHERE timestamp >= ? AND timestamp <= ? || 'T23:59:59'",
-                (month_start, month_end_str),
+                "SELECT COUNT(*) AS cnt FROM alerts WHERE ts >= ? AND ts < ?",
+                (lo, hi),
             ).fetchone()
         alert_count = alert_row["cnt"] if alert_row else 0
 
@@ -664,27 +1370,7 @@ class EyeGuardianDB:
         days_active = avgs["days_active"] if avgs else 0
 
         conn.execute(
-            """
-            INSERT INTO monthly_summaries (
-                user_email, year, month,
-                total_session_minutes,
-                avg_blink_rate, avg_distance_cm, avg_posture_score,
-                avg_brightness, avg_strain_index, avg_redness,
-                alert_count, dry_eye_minutes, bad_posture_minutes, days_active
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(user_email, year, month) DO UPDATE SET
-                total_session_minutes = excluded.total_session_minutes,
-                avg_blink_rate        = excluded.avg_blink_rate,
-                avg_distance_cm       = excluded.avg_distance_cm,
-                avg_posture_score     = excluded.avg_posture_score,
-                avg_brightness        = excluded.avg_brightness,
-                avg_strain_index      = excluded.avg_strain_index,
-                avg_redness           = excluded.avg_redness,
-                alert_count           = excluded.alert_count,
-                dry_eye_minutes       = excluded.dry_eye_minutes,
-                bad_posture_minutes   = excluded.bad_posture_minutes,
-                days_active           = excluded.days_active
-            """,
+            _MONTHLY_UPSERT_SQL,
             (
                 user_email,
                 year, month,
@@ -706,89 +1392,117 @@ class EyeGuardianDB:
     # -- query helpers (for future API / AI analysis) ------------------------
 
     def get_sessions(self, limit: int = 20) -> List[Dict]:
-        conn = self._get_conn()
-        rows = conn.execute(
-            "SELECT * FROM sessions ORDER BY id DESC LIMIT ?", (limit,)
-        ).fetchall()
-        return [dict(r) for r in rows]
+        with self._read() as conn:
+            rows = conn.execute(
+                "SELECT * FROM sessions ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+            return [dict(r) for r in rows]
 
-    def get_snapshots(
-        self, session_id: Optional[int] = None, limit: int = 500
+    def _select_recent(
+        self,
+        table: str,
+        session_id: Optional[int],
+        limit: int,
+        user_email: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
     ) -> List[Dict]:
-        conn = self._get_conn()
+        """
+        Newest rows of snapshots/alerts, optionally for one session, one user
+        and/or the inclusive YYYY-MM-DD range start..end. Time filters go
+        through the epoch `ts` column, so (user_email, ts) answers them with
+        one index range scan.
+        """
+        where, params = [], []
         if session_id:
-            rows = conn.execute(
-                "SELECT * FROM snapshots WHERE session_id = ? ORDER BY id DESC LIMIT ?",
-                (session_id, limit),
-            ).fetchall()
-        else:
-            rows = conn.execute(
-                "SELECT * FROM snapshots ORDER BY id DESC LIMIT ?", (limit,)
-            ).fetchall()
-        return [dict(r) for r in rows]
+            where.append("session_id = ?")
+            params.append(session_id)
+        if user_email:
+            where.append("user_email = ?")
+            params.append(user_email)
+        if start or end:
+            lo, hi = _day_range(
+                date.fromisoformat(start) if start else date(1970, 1, 1),
+                date.fromisoformat(end) if end else date(9998, 12, 31),
+            )
+            where.append("ts >= ? AND ts < ?")
+            params += [lo, hi]
+        order = "ts DESC, id DESC" if (user_email or start or end) and not session_id else "id DESC"
+        sql = f"SELECT * FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order} LIMIT ?"
+        with self._read() as conn:
+            rows = conn.execute(sql, params + [limit]).fetchall()
+            return [dict(r) for r in rows]
+
+    def get_snapshots(
+        self,
+        session_id: Optional[int] = None,
+        limit: int = 500,
+        user_email: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> List[Dict]:
+        return self._select_recent("snapshots", session_id, limit, user_email, start, end)
 
     def get_alerts(
-        self, session_id: Optional[int] = None, limit: int = 100
+        self,
+        session_id: Optional[int] = None,
+        limit: int = 100,
+        user_email: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
     ) -> List[Dict]:
-        conn = self._get_conn()
-        if session_id:
-            rows = conn.execute(
-                "SELECT * FROM alerts WHERE session_id = ? ORDER BY id DESC LIMIT ?",
-                (session_id, limit),
-            ).fetchall()
-        else:
-            rows = conn.execute(
-                "SELECT * FROM alerts ORDER BY id DESC LIMIT ?", (limit,)
-            ).fetchall()
-        return [dict(r) for r in rows]
+        return self._select_recent("alerts", session_id, limit, user_email, start, end)
 
     def get_daily_summaries(self, days: int = 30) -> List[Dict]:
-        conn = self._get_conn()
-        rows = conn.execute(
-            "SELECT * FROM daily_summaries ORDER BY date DESC LIMIT ?", (days,)
-        ).fetchall()
-        return [dict(r) for r in rows]
+        with self._read() as conn:
+            rows = conn.execute(
+                "SELECT * FROM daily_summaries ORDER BY date DESC LIMIT ?", (days,)
+            ).fetchall()
+            return [dict(r) for r in rows]
 
     def get_daily_summary(self, iso_date: str) -> Optional[Dict]:
-        conn = self._get_conn()
-        row = conn.execute(
-            "SELECT * FROM daily_summaries WHERE date = ?", (iso_date,)
-        ).fetchone()
-        return dict(row) if row else None
+        with self._read() as conn:
+            row = conn.execute(
+                "SELECT * FROM daily_summaries WHERE date = ?", (iso_date,)
+            ).fetchone()
+            return dict(row) if row else None
 
     def get_weekly_summaries(self, weeks: int = 12) -> List[Dict]:
         """Return recent weekly summaries (default: last 12 weeks)."""
-        conn = self._get_conn()
-        rows = conn.execute(
-            "SELECT * FROM weekly_summaries ORDER BY year DESC, week DESC LIMIT ?",
-            (weeks,),
-        ).fetchall()
-        return [dict(r) for r in rows]
+        with self._read() as conn:
+            rows = conn.execute(
+                "SELECT * FROM weekly_summaries ORDER BY year DESC, week DESC LIMIT ?",
+                (weeks,),
+            ).fetchall()
+            return [dict(r) for r in rows]
 
     def get_weekly_summary(self, year: int, week: int) -> Optional[Dict]:
-        conn = self._get_conn()
-        row = conn.execute(
-            "SELECT * FROM weekly_summaries WHERE year = ? AND week = ?",
-            (year, week),
-        ).fetchone()
-        return dict(row) if row else None
+        with self._read() as conn:
+            row = conn.execute(
+                "SELECT * FROM weekly_summaries WHERE year = ? AND week = ?",
+                (year, week),
+            ).fetchone()
+            return dict(row) if row else None
 
     def get_monthly_summaries(self, months: int = 12) -> List[Dict]:
         """Return recent monthly summaries (default: last 12 months)."""
-        conn = self._get_conn()
-        rows = conn.execute(
-            "SELECT * FROM monthly_summaries ORDER BY year DESC, month DESC LIMIT ?",
-            (months,),
-        ).fetchall()
-        return [dict(r) for r in rows]
+        with self._read() as conn:
+            rows = conn.execute(
+                "SELECT * FROM monthly_summaries ORDER BY year DESC, month DESC LIMIT ?",
+                (months,),
+            ).fetchall()
+            return [dict(r) for r in rows]
 
     def get_monthly_summary(self, year: int, month: int) -> Optional[Dict]:
-        conn = self._get_conn()
-        row = conn.execute(
-            "SELECT * FROM monthly_summaries WHERE year = ? AND month = ?",
-            (year, month),
-        ).fetchone()
-        return dict(row) if row else None
+        with self._read() as conn:
+            row = conn.execute(
+                "SELECT * FROM monthly_summaries WHERE year = ? AND month = ?",
+                (year, month),
+            ).fetchone()
+            return dict(row) if row else None
 
     # -- insights data (replaces dummy_insights_data.json) --------------------
 
@@ -798,29 +1512,28 @@ class EyeGuardianDB:
         the old dummy_insights_data.json so the AI insights manager can
         use it as a drop-in replacement.
         """
-        conn = self._get_conn()
-
-        # Most recent weekly summary
-        if user_email:
-            w_row = conn.execute(
-                "SELECT * FROM weekly_summaries WHERE user_email = ? ORDER BY year DESC, week DESC LIMIT 1",
-                (user_email,)
-            ).fetchone()
-        else:
-            w_row = conn.execute(
-                "SELECT * FROM weekly_summaries ORDER BY year DESC, week DESC LIMIT 1"
-            ).fetchone()
-
-        # Most recent monthly summary
-        if user_email:
-            m_row = conn.execute(
-                "SELECT * FROM monthly_summaries WHERE user_email = ? ORDER BY year DESC, month DESC LIMIT 1",
-                (user_email,)
-            ).fetchone()
-        else:
-            m_row = conn.execute(
-                "SELECT * FROM monthly_summaries ORDER BY year DESC, month DESC LIMIT 1"
-            ).fetchone()
+        with self._read() as conn:
+            # Most recent weekly summary
+            if user_email:
+                w_row = conn.execute(
+                    "SELECT * FROM weekly_summaries WHERE user_email = ? ORDER BY year DESC, week DESC LIMIT 1",
+                    (user_email,)
+                ).fetchone()
+            else:
+                w_row = conn.execute(
+                    "SELECT * FROM weekly_summaries ORDER BY year DESC, week DESC LIMIT 1"
+                ).fetchone()
+
+            # Most recent monthly summary
+            if user_email:
+                m_row = conn.execute(
+                    "SELECT * FROM monthly_summaries WHERE user_email = ? ORDER BY year DESC, month DESC LIMIT 1",
+                    (user_email,)
+                ).fetchone()
+            else:
+                m_row = conn.execute(
+                    "SELECT * FROM monthly_summaries ORDER BY year DESC, month DESC LIMIT 1"
+                ).fetchone()
 
         def _summary_dict(row) -> Dict[str, Any]:
             if row is None:
@@ -1,15 +1,24 @@
 
+import argparse
 import cv2
 import time
 from engine.eye_processor import EyeGuardianEngine
+from engine.frame_source import open_frame_source
 
 def main():
+    parser = argparse.ArgumentParser(description="EyeGuardian Debug Visualizer")
+    parser.add_argument("--source", default="0",
+                        help='camera index, video file, image directory or "synthetic[:WxH]"')
+    parser.add_argument("--fast", action="store_true",
+                        help="replay recorded sources as fast as possible instead of in real time")
+    args = parser.parse_args()
+
     print("Launching EyeGuardian Debug Visualizer...")
     
-    # Initialize Camera
-    cap = cv2.VideoCapture(0)
+    # Initialize frame source
+    cap = open_frame_source(args.source, realtime=not args.fast)
     if not cap.isOpened():
-        print("Error: Could not open camera.")
+        print("Error: Could not open frame source.")
         return
 
     # Initialize Engine
@@ -0,0 +1,68 @@
+"""
+Sliding-Window Blink-Rate Counter
+
+Keeps blink timestamps in per-window deques that are pruned incrementally as
+time advances, so the 1-minute, 10-minute and session blink rates are served
+in (amortized) constant time instead of rescanning the whole history on every
+frame.
+"""
+
+import time
+from collections import deque, namedtuple
+from typing import Optional
+
+# blinks in the last minute, per-minute rates over 1 min / 10 min / session
+BlinkRates = namedtuple(
+    "BlinkRates", ["last_minute", "per_minute_1m", "per_minute_10m", "per_minute_session"]
+)
+
+
+class SlidingWindowCounter:
+    """Number of events in the trailing `window` seconds."""
+
+    def __init__(self, window: float):
+        self.window = window
+        self._events = deque()
+
+    def add(self, timestamp: float):
+        self._events.append(timestamp)
+        self._prune(timestamp)
+
+    def count(self, now: float) -> int:
+        self._prune(now)
+        return len(self._events)
+
+    def _prune(self, now: float):
+        # Each event is appended and popped at most once
+        cutoff = now - self.window
+        events = self._events
+        while events and events[0] < cutoff:
+            events.popleft()
+
+
+class BlinkRateCounter:
+    """Shared blink-rate source for the eye engine and the camera monitor."""
+
+    def __init__(self, session_start: Optional[float] = None):
+        self._one_minute = SlidingWindowCounter(60.0)
+        self._ten_minutes = SlidingWindowCounter(600.0)
+        self.session_start = session_start if session_start is not None else time.time()
+        self.total = 0
+
+    def add(self, timestamp: Optional[float] = None):
+        timestamp = timestamp if timestamp is not None else time.time()
+        self._one_minute.add(timestamp)
+        self._ten_minutes.add(timestamp)
+        self.total += 1
+
+    def rates(self, now: Optional[float] = None) -> BlinkRates:
+        now = now if now is not None else time.time()
+        last_minute = self._one_minute.count(now)
+        last_ten = self._ten_minutes.count(now)
+        session_minutes = max((now - self.session_start) / 60.0, 1.0 / 60.0)
+        return BlinkRates(
+            last_minute=last_minute,
+            per_minute_1m=float(last_minute),
+            per_minute_10m=last_ten / 10.0,
+            per_minute_session=self.total / session_minutes,
+        )
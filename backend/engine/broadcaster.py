@@ -0,0 +1,136 @@
+"""
+Payload Broadcaster
+
+Hands versioned payloads from the camera pipeline threads to asyncio
+subscribers (the /ws/health-stream connections). Subscribers sleep on an
+event until a newer version exists instead of polling, and the sequence
+number lets clients detect updates they skipped.
+"""
+
+import asyncio
+import json
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+
+class PayloadBroadcaster:
+    """Thread-safe publisher (pipeline side) / asyncio waiter (server side)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event: Optional[asyncio.Event] = None
+        self._scheduled = False
+        self._subscribers = 0
+
+        # Latest state as seen by the event loop
+        self.version = 0
+        self.payload: Any = None
+        self.error: Optional[str] = None
+
+        # Latest state as published by the pipeline, not yet delivered
+        self._pending: Tuple[int, Any, Optional[str]] = (0, None, None)
+
+        # JSON text of the current version, per variant, shared by all clients
+        self._text_version = -1
+        self._text_cache: Dict[Any, str] = {}
+
+    # -- subscriber side (event loop) ----------------------------------------
+
+    def add_subscriber(self):
+        """Register a subscriber; must be called from the event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._loop is not loop:
+                self._loop = loop
+                self._event = asyncio.Event()
+            self._subscribers += 1
+            # Pick up anything published while nobody was listening
+            self.version, self.payload, self.error = self._pending
+
+    def remove_subscriber(self):
+        with self._lock:
+            self._subscribers = max(0, self._subscribers - 1)
+
+    @property
+    def subscriber_count(self) -> int:
+        return self._subscribers
+
+    async def wait_for_update(self, after_version: int, timeout: Optional[float] = None):
+        """
+        Wait until a version newer than `after_version` (or an error) exists.
+        Returns (version, payload, error); payload is None on timeout.
+        """
+        if self.version <= after_version and self.error is None:
+            event = self._event
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return self.version, None, self.error
+        if self.version <= after_version:
+            return self.version, None, self.error
+        return self.version, self.payload, self.error
+
+    def latest(self):
+        return self.version, self.payload, self.error
+
+    def serialized(self, version: int, payload: Dict[str, Any], frame=None, frame_key=None) -> str:
+        """
+        JSON text for `payload` with `frame` (a data URL or None) as
+        camera_frame. Serialized once per version and `frame_key` no matter
+        how many subscribers send it. Event loop only.
+        """
+        if version != self._text_version:
+            self._text_version = version
+            self._text_cache = {}
+        text = self._text_cache.get(frame_key)
+        if text is None:
+            if frame is not None:
+                payload = dict(payload, camera_frame=frame)
+            text = json.dumps(payload)
+            self._text_cache[frame_key] = text
+        return text
+
+    # -- publisher side (any thread) -----------------------------------------
+
+    def publish(self, version: int, payload: Any):
+        self._submit((version, payload, None))
+
+    def publish_error(self, error: str):
+        with self._lock:
+            version, payload, _ = self._pending
+        self._submit((version, payload, error))
+
+    def reset(self):
+        """Clear the error/payload for a new run; versions keep increasing."""
+        with self._lock:
+            version = self._pending[0]
+            self._pending = (version, None, None)
+            self.payload = None
+            self.error = None
+
+    def _submit(self, state):
+        with self._lock:
+            self._pending = state
+            loop = self._loop
+            # With no subscribers the state is just stored; add_subscriber()
+            # picks it up, so idle monitors cost no event loop wakeups.
+            if self._scheduled or self._subscribers == 0 or loop is None or loop.is_closed():
+                return
+            self._scheduled = True
+        try:
+            loop.call_soon_threadsafe(self._deliver)
+        except RuntimeError:
+            # Event loop shut down between the check and the call
+            with self._lock:
+                self._scheduled = False
+
+    def _deliver(self):
+        # Runs on the event loop; coalesces everything published since the
+        # last delivery into a single wakeup.
+        with self._lock:
+            self._scheduled = False
+            self.version, self.payload, self.error = self._pending
+        event = self._event
+        self._event = asyncio.Event()
+        event.set()
@@ -4,15 +4,19 @@ import numpy as np
 import time
 from collections import deque
 
+from engine.face_landmarks import FaceLandmarkStage, draw_face_landmarks
+from engine.frame_context import FrameContext, as_frame_context
+from engine.blink_counter import BlinkRateCounter
+from engine.metrics import STAGE_SECONDS
+
 class EyeGuardianEngine:
-    def __init__(self):
+    def __init__(self, tracking=False, redness_alpha=None):
         self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+        # tracking=True runs inference on a face ROI instead of the full frame
+        # (see FaceLandmarkStage). Created lazily: callers using a shared
+        # FaceLandmarkStage never need their own.
+        self.tracking = tracking
+        self.landmark_stage = None
         
         # Blink state
         self.blink_count = 0
@@ -20,159 +24,195 @@ class EyeGuardianEngine:
         self.is_blinking = False
         self.min_ear_in_blink = 1.0
         
-        self.blink_timestamps = deque(maxlen=2000) 
+        # Windowed counter: 1 min / 10 min / session rates in O(1). The rates
+        # computed once per frame are shared with the monitor via blink_rates.
+        self.blink_counter = BlinkRateCounter()
+        self.blink_rates = self.blink_counter.rates()
         self.redness_history = deque(maxlen=1000)
+        # Optional EWMA weight for new redness samples (None/0 = raw values)
+        self.redness_alpha = redness_alpha
+        self.redness = None
+        # Grown on demand, reused across frames by _get_eyes_redness
+        self._redness_mask = np.zeros((0, 0), dtype=np.uint8)
         
         self.EAR_THRESHOLD_COMPLETE = 0.21
         self.EAR_THRESHOLD_INCOMPLETE = 0.25 
         self.EAR_THRESHOLD_OPEN = 0.28
+
+        # Per-user open-eye EAR: an upper-envelope tracker that rises quickly
+        # and decays slowly, so blinks barely move it. Redness is sampled
+        # whenever the EAR is within REDNESS_OPEN_FRACTION of it – users whose
+        # eyes never reach EAR_THRESHOLD_OPEN still get fresh samples.
+        self.open_ear_baseline = None
+        self.OPEN_EAR_RISE = 0.2
+        self.OPEN_EAR_DECAY = 0.01
+        self.REDNESS_OPEN_FRACTION = 0.85
         
 
         self.RIGHT_EYE_INDICES = [33, 160, 158, 133, 153, 144] 
 
         self.LEFT_EYE_INDICES = [362, 385, 387, 263, 373, 380]
 
-    def _calculate_ear(self, landmarks, w, h):
-        def dist(p1, p2):
-            return np.linalg.norm(np.array(p1) - np.array(p2))
+        # (2, 6) fancy index into the landmark array: left eye, right eye
+        self.EYE_INDICES = np.array([self.LEFT_EYE_INDICES, self.RIGHT_EYE_INDICES])
 
-        coords = []
-        for lm in landmarks:
-            if hasattr(lm, 'x'):
-                coords.append((lm.x * w, lm.y * h))
-            else:
-                coords.append(lm)
+    def _calculate_ear(self, eye_points):
+        """EAR for (..., 6, 2) eye pixel coordinates; works per frame or batched."""
+        v1 = np.linalg.norm(eye_points[..., 1, :] - eye_points[..., 5, :], axis=-1)
+        v2 = np.linalg.norm(eye_points[..., 2, :] - eye_points[..., 4, :], axis=-1)
+        h_dist = np.linalg.norm(eye_points[..., 0, :] - eye_points[..., 3, :], axis=-1)
+        safe = np.where(h_dist == 0, 1.0, h_dist)
+        return np.where(h_dist == 0, 0.0, (v1 + v2) / (2.0 * safe))
 
-        v1 = dist(coords[1], coords[5])
-        v2 = dist(coords[2], coords[4])
-        h_dist = dist(coords[0], coords[3])
-        
-        if h_dist == 0:
-            return 0.0
-            
-        return (v1 + v2) / (2.0 * h_dist)
+    def _get_eyes_redness(self, image, eye_pixels):
+        """
+        Redness (R / (G + B)) over the pixels inside both eye polygons.
 
-    def _get_eye_redness(self, image, landmarks, indices):
-        h, w, _ = image.shape
-        
-        x_vals = [int(landmarks[i].x * w) for i in indices]
-        y_vals = [int(landmarks[i].y * h) for i in indices]
-        
-        min_x, max_x = min(x_vals), max(x_vals)
-        min_y, max_y = min(y_vals), max(y_vals)
-        
+        `eye_pixels` is the (2, 6, 2) pixel array of both eyes. The polygons
+        are rasterized into a reusable mask covering the pair's bounding box,
+        and one masked cv2.mean over that view gives the channel means –
+        no cv2.split copies, and eyelid/skin pixels outside the opening are
+        excluded.
+        """
+        h, w = image.shape[:2]
         pad = 2
-        min_x = max(0, min_x - pad)
+        pixels = eye_pixels.reshape(-1, 2)
+        min_x, min_y = np.maximum(pixels.min(axis=0).astype(np.int32) - pad, 0).tolist()
+        max_x, max_y = pixels.max(axis=0).astype(np.int32).tolist()
         max_x = min(w, max_x + pad)
-        min_y = max(0, min_y - pad)
         max_y = min(h, max_y + pad)
-        
         if max_x <= min_x or max_y <= min_y:
             return 0.0
-            
-        eye_roi = image[min_y:max_y, min_x:max_x]
-        
-        if eye_roi.size == 0:
-            return 0.0
 
-        b, g, r = cv2.split(eye_roi)
+        roi_h, roi_w = max_y - min_y, max_x - min_x
+        if self._redness_mask.shape[0] < roi_h or self._redness_mask.shape[1] < roi_w:
+            self._redness_mask = np.zeros(
+                (max(roi_h, self._redness_mask.shape[0]), max(roi_w, self._redness_mask.shape[1])), dtype=np.uint8
+            )
+        mask = self._redness_mask[:roi_h, :roi_w]
+        mask.fill(0)
+        polygons = (eye_pixels - np.array([min_x, min_y], dtype=eye_pixels.dtype)).astype(np.int32)
+        cv2.fillPoly(mask, list(polygons), 255)
 
-        r_mean = np.mean(r)
-        g_mean = np.mean(g)
-        b_mean = np.mean(b)
-        
+        b_mean, g_mean, r_mean, _ = cv2.mean(image[min_y:max_y, min_x:max_x], mask=mask)
         denominator = g_mean + b_mean
         if denominator == 0:
             return 0.0
-            
         return r_mean / denominator
 
+    def _update_blink_state(self, avg_ear, timestamp):
+        if avg_ear < self.EAR_THRESHOLD_OPEN:
+            if not self.is_blinking:
+                self.is_blinking = True
+                self.min_ear_in_blink = avg_ear
+            else:
+                self.min_ear_in_blink = min(self.min_ear_in_blink, avg_ear)
+        else:
+            # Eyes are open
+            if self.is_blinking:
+                # Just finished a blink
+                self.is_blinking = False
+                if self.min_ear_in_blink < self.EAR_THRESHOLD_COMPLETE:
+                    self.blink_count += 1
+                    self.blink_counter.add(timestamp)
+                elif self.min_ear_in_blink < self.EAR_THRESHOLD_INCOMPLETE:
+                    self.incomplete_blink_count += 1
+
+    def _update_open_ear_baseline(self, avg_ear):
+        if self.open_ear_baseline is None:
+            self.open_ear_baseline = avg_ear
+            return
+        rate = self.OPEN_EAR_RISE if avg_ear > self.open_ear_baseline else self.OPEN_EAR_DECAY
+        self.open_ear_baseline += rate * (avg_ear - self.open_ear_baseline)
+
+    def _eyes_open(self, avg_ear):
+        """True when the eyes are open enough for a redness sample."""
+        threshold = self.EAR_THRESHOLD_OPEN
+        if self.open_ear_baseline is not None:
+            threshold = min(threshold, self.REDNESS_OPEN_FRACTION * self.open_ear_baseline)
+        return avg_ear >= threshold
+
+    def process_points_batch(self, points, w, h, timestamps=None):
+        """
+        Offline reprocessing: EAR + blink detection for a (frames, N, 3) array
+        of normalized landmarks from a w x h video. EAR is computed for all
+        frames in one vectorized pass; the blink state machine then runs over
+        the sequence. `timestamps` (seconds, one per frame) default to now.
+        Returns the per-frame average EAR as a (frames,) array.
+        """
+        points = np.asarray(points, dtype=np.float32)
+        eye_pixels = points[:, self.EYE_INDICES, :2] * np.array([w, h], dtype=np.float32)
+        avg_ears = self._calculate_ear(eye_pixels).mean(axis=1)
+        for i, avg_ear in enumerate(avg_ears.tolist()):
+            timestamp = float(timestamps[i]) if timestamps is not None else time.time()
+            self._update_blink_state(avg_ear, timestamp)
+        return avg_ears
+
     def process_frame(self, image, return_annotated=False):
-        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        results = self.face_mesh.process(rgb_image)
-        
+        if self.landmark_stage is None:
+            self.landmark_stage = FaceLandmarkStage(tracking=self.tracking)
+        ctx = as_frame_context(image)
+        face = self.landmark_stage.detect(ctx)
+        return self.process_landmarks(ctx, face, return_annotated=return_annotated)
+
+    def process_landmarks(self, image, face, return_annotated=False):
+        """
+        Blink / redness analysis from landmarks computed elsewhere
+        (e.g. a shared FaceLandmarkStage). `face` is a FaceLandmarks or None;
+        `image` is a BGR frame or its FrameContext.
+        """
+        if isinstance(image, FrameContext):
+            image = image.frame
         h, w, _ = image.shape
         data = {
             'blinks': self.blink_count,
             'incomplete_blinks': self.incomplete_blink_count,
             'redness': 0.0,
             'is_dry': False,
-            'ear': 0.0
+            'ear': 0.0,
+            'blink_rate': 0,
         }
         
         annotated_image = image.copy() if return_annotated else None
 
-        if results.multi_face_landmarks:
-            face_landmarks = results.multi_face_landmarks[0].landmark
-            
+        if face is not None:
             # Draw landmarks if requested
             if return_annotated:
-                mp_drawing = mp.solutions.drawing_utils
-                mp_drawing_styles = mp.solutions.drawing_styles
-                mp_drawing.draw_landmarks(
-                    image=annotated_image,
-                    landmark_list=results.multi_face_landmarks[0],
-                    connections=self.mp_face_mesh.FACEMESH_TESSELATION,
-                    landmark_drawing_spec=None,
-                    connection_drawing_spec=mp_drawing_styles.get_default_face_mesh_tesselation_style())
-                mp_drawing.draw_landmarks(
-                    image=annotated_image,
-                    landmark_list=results.multi_face_landmarks[0],
-                    connections=self.mp_face_mesh.FACEMESH_CONTOURS,
-                    landmark_drawing_spec=None,
-                    connection_drawing_spec=mp_drawing_styles.get_default_face_mesh_contours_style())
-                mp_drawing.draw_landmarks(
-                    image=annotated_image,
-                    landmark_list=results.multi_face_landmarks[0],
-                    connections=self.mp_face_mesh.FACEMESH_IRISES,
-                    landmark_drawing_spec=None,
-                    connection_drawing_spec=mp_drawing_styles.get_default_face_mesh_iris_connections_style())
-
-            # 1. EAR Calculation
-            left_lms = [face_landmarks[i] for i in self.LEFT_EYE_INDICES]
-            right_lms = [face_landmarks[i] for i in self.RIGHT_EYE_INDICES]
-            
-            ear_left = self._calculate_ear(left_lms, w, h)
-            ear_right = self._calculate_ear(right_lms, w, h)
+                draw_face_landmarks(annotated_image, face)
+
+            # 1. EAR Calculation – both eyes in one vectorized pass over
+            # the (N, 2) pixel array (row 0: left eye, row 1: right eye)
+            eye_pixels = face.pixel_points(w, h)[self.EYE_INDICES]
+            ear_left, ear_right = self._calculate_ear(eye_pixels).tolist()
             avg_ear = (ear_left + ear_right) / 2.0
             data['ear'] = float(avg_ear)
             
             # Blink Logic
-            if avg_ear < self.EAR_THRESHOLD_OPEN:
-                if not self.is_blinking:
-                    self.is_blinking = True
-                    self.min_ear_in_blink = avg_ear
-                else:
-                    self.min_ear_in_blink = min(self.min_ear_in_blink, avg_ear)
-            else:
-                # Eyes are open
-                if self.is_blinking:
-                    # Just finished a blink
-                    self.is_blinking = False
-                    if self.min_ear_in_blink < self.EAR_THRESHOLD_COMPLETE:
-                        self.blink_count += 1
-                        self.blink_timestamps.append(time.time())
-                    elif self.min_ear_in_blink < self.EAR_THRESHOLD_INCOMPLETE:
-                        self.incomplete_blink_count += 1
+            self._update_blink_state(avg_ear, time.time())
+            self._update_open_ear_baseline(avg_ear)
+            data['ear_open'] = float(self.open_ear_baseline)
             
             # Update counts in return data
             data['blinks'] = self.blink_count
             data['incomplete_blinks'] = self.incomplete_blink_count
             
-            # 2. Redness Detection
-            # We average the redness of both eyes
-            redness_l = self._get_eye_redness(image, face_landmarks, self.LEFT_EYE_INDICES)
-            redness_r = self._get_eye_redness(image, face_landmarks, self.RIGHT_EYE_INDICES)
-            avg_redness = (redness_l + redness_r) / 2.0
+            # 2. Redness Detection – both eyes in one masked pass. Skipped
+            # while the lids are closing (relative to this user's open EAR),
+            # when the polygons are mostly lid.
+            if self._eyes_open(avg_ear) or self.redness is None:
+                with STAGE_SECONDS.time("redness"):
+                    sample = self._get_eyes_redness(image, eye_pixels)
+                if self.redness_alpha and self.redness is not None:
+                    sample = self.redness_alpha * sample + (1.0 - self.redness_alpha) * self.redness
+                self.redness = sample
+                self.redness_history.append(sample)
+            data['redness'] = float(self.redness)
             
-            self.redness_history.append(avg_redness)
-            data['redness'] = float(avg_redness)
-            
-            now = time.time()
-            recent_blinks = sum(1 for t in self.blink_timestamps if now - t <= 60)
+        self.blink_rates = self.blink_counter.rates()
+        data['blink_rate'] = self.blink_rates.last_minute
 
-            if recent_blinks < 12:
-                data['is_dry'] = True
+        if face is not None and self.blink_rates.last_minute < 12:
+            data['is_dry'] = True
             
         if return_annotated:
              return data, annotated_image
@@ -184,11 +224,7 @@ class EyeGuardianEngine:
         window_data: Optional list of data points if provided externally, 
                      otherwise uses internal history.
         """
-        now = time.time()
-        ten_min_ago = now - 600
-        
-        valid_blinks = [t for t in self.blink_timestamps if t >= ten_min_ago]
-        blink_rate_10m = len(valid_blinks) / 10.0 if len(valid_blinks) > 0 else 0
+        blink_rate_10m = self.blink_counter.rates().per_minute_10m
         avg_redness = 0.0
         if self.redness_history:
             avg_redness = sum(self.redness_history) / len(self.redness_history)
@@ -0,0 +1,305 @@
+"""
+Shared Face Landmark Stage
+
+Runs ONE face-landmark model per frame and hands the result to every analyzer
+that needs it (blink/redness in EyeGuardianEngine, head pose + distance in
+PostureAnalyzer), instead of each analyzer running its own model.
+"""
+
+import os
+import time
+from collections import namedtuple
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import cv2
+import mediapipe as mp
+import numpy as np
+from mediapipe.tasks import python as mp_python
+from mediapipe.tasks.python import vision
+from mediapipe.framework.formats import landmark_pb2
+
+from engine.frame_context import as_frame_context
+
+
+# Lightweight landmark view of a row of FaceLandmarks.points
+Landmark = namedtuple("Landmark", ["x", "y", "z"])
+
+# Client-side overlay: normalized x/y in [0, 1] are sent as little-endian
+# uint16 pairs, i.e. value / LANDMARK_QUANT_SCALE recovers the coordinate
+LANDMARK_QUANT_SCALE = 65535
+
+
+class FaceLandmarks:
+    """
+    Landmarks (and optional head-pose matrix) for one face in one frame.
+
+    Built either from MediaPipe landmark objects or from an (N, 3) array; the
+    other representation is derived lazily, at most once per frame.
+    """
+
+    def __init__(self, landmarks=None, transformation_matrix=None, landmark_list=None, points=None):
+        # Sequence of normalized landmarks exposing .x / .y / .z
+        self._landmarks = landmarks
+        # Contiguous (N, 3) float32 array of normalized x, y, z
+        self._points = points
+        # 4x4 facial transformation matrix (Tasks API only), else None
+        self.transformation_matrix = transformation_matrix
+        self._landmark_list = landmark_list
+        self._pixel_cache = None
+
+    @property
+    def points(self) -> np.ndarray:
+        """(N, 3) float32 normalized coordinates, converted once per frame."""
+        if self._points is None:
+            self._points = np.array(
+                [(lm.x, lm.y, lm.z) for lm in self._landmarks], dtype=np.float32
+            )
+        return self._points
+
+    @property
+    def landmarks(self):
+        if self._landmarks is None:
+            self._landmarks = [Landmark(*p) for p in self._points.tolist()]
+        return self._landmarks
+
+    def pixel_points(self, w: int, h: int) -> np.ndarray:
+        """(N, 2) float32 pixel coordinates for a w x h frame (cached)."""
+        cache = self._pixel_cache
+        if cache is None or cache[0] != (w, h):
+            pixels = self.points[:, :2] * np.array([w, h], dtype=np.float32)
+            self._pixel_cache = cache = ((w, h), pixels)
+        return cache[1]
+
+    def quantized_xy(self) -> np.ndarray:
+        """(N, 2) little-endian uint16 x/y, for streaming to client-side overlays."""
+        xy = np.clip(self.points[:, :2], 0.0, 1.0) * LANDMARK_QUANT_SCALE + 0.5
+        return xy.astype("<u2")
+
+    def as_landmark_list(self):
+        """NormalizedLandmarkList proto for mp drawing_utils (built lazily)."""
+        if self._landmark_list is None:
+            proto = landmark_pb2.NormalizedLandmarkList()
+            proto.landmark.extend(
+                landmark_pb2.NormalizedLandmark(x=x, y=y, z=z)
+                for x, y, z in self.points.tolist()
+            )
+            self._landmark_list = proto
+        return self._landmark_list
+
+
+def draw_face_landmarks(image, face):
+    """Draw tessellation, contours and irises for `face` onto `image` in place."""
+    mp_face_mesh = mp.solutions.face_mesh
+    mp_drawing = mp.solutions.drawing_utils
+    mp_drawing_styles = mp.solutions.drawing_styles
+    landmark_list = face.as_landmark_list()
+    mp_drawing.draw_landmarks(
+        image=image,
+        landmark_list=landmark_list,
+        connections=mp_face_mesh.FACEMESH_TESSELATION,
+        landmark_drawing_spec=None,
+        connection_drawing_spec=mp_drawing_styles.get_default_face_mesh_tesselation_style())
+    mp_drawing.draw_landmarks(
+        image=image,
+        landmark_list=landmark_list,
+        connections=mp_face_mesh.FACEMESH_CONTOURS,
+        landmark_drawing_spec=None,
+        connection_drawing_spec=mp_drawing_styles.get_default_face_mesh_contours_style())
+    mp_drawing.draw_landmarks(
+        image=image,
+        landmark_list=landmark_list,
+        connections=mp_face_mesh.FACEMESH_IRISES,
+        landmark_drawing_spec=None,
+        connection_drawing_spec=mp_drawing_styles.get_default_face_mesh_iris_connections_style())
+    return image
+
+
+@lru_cache(maxsize=1)
+def landmark_topology():
+    """
+    Mesh connections (landmark index pairs) the client needs to draw the same
+    overlay as draw_face_landmarks from streamed coordinates. Static, so
+    clients fetch it once.
+    """
+    mp_face_mesh = mp.solutions.face_mesh
+    return {
+        "num_landmarks": 478,
+        "quantization": {"dtype": "uint16", "byte_order": "little", "layout": "x0,y0,x1,y1,...", "scale": LANDMARK_QUANT_SCALE},
+        "tessellation": sorted(list(c) for c in mp_face_mesh.FACEMESH_TESSELATION),
+        "contours": sorted(list(c) for c in mp_face_mesh.FACEMESH_CONTOURS),
+        "irises": sorted(list(c) for c in mp_face_mesh.FACEMESH_IRISES),
+    }
+
+
+class FaceLandmarkStage:
+    """
+    Single landmark model shared by all per-frame analyzers.
+
+    Uses the Tasks FaceLandmarker (478 landmarks + transformation matrix) when
+    the .task model is available, otherwise falls back to the legacy FaceMesh
+    solution (same landmark topology, but no head pose).
+
+    With `tracking=True` the stage crops a padded box around the previous
+    frame's face, runs inference on that crop (downscaled to at most
+    `roi_max_side` px) and maps the landmarks back to frame coordinates.
+    Full-frame detection only runs when the face is lost or every
+    `redetect_interval` frames. The model then runs per image (IMAGE mode,
+    static FaceMesh): its own frame-to-frame tracking would be fed crops that
+    jump between ROI and full frame. Without `tracking` the model runs in
+    VIDEO / tracking mode and follows the face itself.
+    """
+
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        tracking: bool = False,
+        roi_padding: float = 0.35,
+        roi_max_side: Optional[int] = 320,
+        redetect_interval: int = 30,
+    ):
+        self.landmarker = None
+        self.face_mesh = None
+        self._last_timestamp_ms = 0
+
+        self.tracking = tracking
+        self.roi_padding = roi_padding
+        self.roi_max_side = roi_max_side
+        self.redetect_interval = redetect_interval
+        # (x0, y0, x1, y1) in frame pixels, from the previous frame's landmarks
+        self._roi: Optional[Tuple[int, int, int, int]] = None
+        self._frames_since_full = 0
+        self.full_detections = 0
+        self.roi_detections = 0
+
+        if model_path and os.path.exists(model_path):
+            # Read as bytes – some MediaPipe versions mangle model_asset_path
+            with open(model_path, "rb") as f:
+                model_data = f.read()
+            options = vision.FaceLandmarkerOptions(
+                base_options=mp_python.BaseOptions(model_asset_buffer=model_data),
+                running_mode=vision.RunningMode.IMAGE if tracking else vision.RunningMode.VIDEO,
+                output_facial_transformation_matrixes=True,
+                num_faces=1,
+            )
+            self.landmarker = vision.FaceLandmarker.create_from_options(options)
+        else:
+            self.face_mesh = mp.solutions.face_mesh.FaceMesh(
+                static_image_mode=tracking,
+                max_num_faces=1,
+                refine_landmarks=True,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5,
+            )
+
+    @property
+    def has_pose(self) -> bool:
+        """True if results carry a transformation matrix (posture is possible)."""
+        return self.landmarker is not None
+
+    def detect(self, frame, rgb=None) -> Optional[FaceLandmarks]:
+        """
+        Run the model on a BGR frame or FrameContext. Returns None if no face
+        is found. Full-frame detection uses the context's (memoized)
+        inference-resolution RGB unless `rgb` is given.
+        """
+        frame = as_frame_context(frame)
+        if not self.tracking:
+            return self._detect_full(frame, rgb)
+
+        face = None
+        if self._roi is not None and self._frames_since_full < self.redetect_interval:
+            face = self._detect_roi(frame, self._roi)
+            self._frames_since_full += 1
+        if face is None:
+            # Lost the face (or periodic re-detection): search the whole frame
+            face = self._detect_full(frame, rgb)
+            self._frames_since_full = 0
+
+        h, w = frame.shape[:2]
+        self._roi = self._roi_from_landmarks(face, w, h) if face is not None else None
+        return face
+
+    def reset_tracking(self):
+        self._roi = None
+        self._frames_since_full = 0
+
+    def _detect_full(self, ctx, rgb=None) -> Optional[FaceLandmarks]:
+        if rgb is None:
+            rgb = ctx.inference_rgb
+        self.full_detections += 1
+        return self._infer(rgb)
+
+    def _detect_roi(self, ctx, roi) -> Optional[FaceLandmarks]:
+        x0, y0, x1, y1 = roi
+        crop = ctx.frame[y0:y1, x0:x1]
+        crop_h, crop_w = crop.shape[:2]
+        if crop_w < 16 or crop_h < 16:
+            return None
+
+        # Normalized landmark coordinates don't depend on the input scale
+        if self.roi_max_side and max(crop_w, crop_h) > self.roi_max_side:
+            scale = self.roi_max_side / float(max(crop_w, crop_h))
+            crop = cv2.resize(crop, (max(1, int(crop_w * scale)), max(1, int(crop_h * scale))),
+                              interpolation=cv2.INTER_AREA)
+
+        self.roi_detections += 1
+        face = self._infer(cv2.cvtColor(crop, cv2.COLOR_BGR2RGB))
+        if face is None:
+            return None
+
+        h, w = ctx.shape[:2]
+        sx, sy = crop_w / float(w), crop_h / float(h)
+        # Crop-normalized -> frame-normalized, in one vector op
+        points = face.points * np.array([sx, sy, sx], dtype=np.float32)
+        points[:, 0] += x0 / float(w)
+        points[:, 1] += y0 / float(h)
+        # Rotation (all posture uses) is unaffected by the crop
+        return FaceLandmarks(transformation_matrix=face.transformation_matrix, points=points)
+
+    def _roi_from_landmarks(self, face, w, h):
+        pixels = face.pixel_points(w, h)
+        min_x, min_y = pixels.min(axis=0).tolist()
+        max_x, max_y = pixels.max(axis=0).tolist()
+        # Square box around the face, padded to absorb motion between frames
+        side = max(max_x - min_x, max_y - min_y) * (1.0 + 2.0 * self.roi_padding)
+        cx, cy = (min_x + max_x) / 2.0, (min_y + max_y) / 2.0
+        x0 = max(0, int(cx - side / 2.0))
+        y0 = max(0, int(cy - side / 2.0))
+        x1 = min(w, int(cx + side / 2.0))
+        y1 = min(h, int(cy + side / 2.0))
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return x0, y0, x1, y1
+
+    def _infer(self, rgb) -> Optional[FaceLandmarks]:
+        if self.landmarker is not None:
+            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+            if self.tracking:
+                # IMAGE mode: every crop is independent
+                result = self.landmarker.detect(mp_image)
+            else:
+                # VIDEO mode requires strictly increasing timestamps
+                timestamp_ms = max(self._last_timestamp_ms + 1, int(time.monotonic() * 1000))
+                self._last_timestamp_ms = timestamp_ms
+                result = self.landmarker.detect_for_video(mp_image, timestamp_ms)
+            if not result.face_landmarks:
+                return None
+            matrix = None
+            if result.facial_transformation_matrixes:
+                matrix = result.facial_transformation_matrixes[0]
+            return FaceLandmarks(result.face_landmarks[0], matrix)
+
+        results = self.face_mesh.process(rgb)
+        if not results.multi_face_landmarks:
+            return None
+        landmark_list = results.multi_face_landmarks[0]
+        return FaceLandmarks(landmark_list.landmark, landmark_list=landmark_list)
+
+    def close(self):
+        if self.landmarker is not None:
+            self.landmarker.close()
+            self.landmarker = None
+        if self.face_mesh is not None:
+            self.face_mesh.close()
+            self.face_mesh = None
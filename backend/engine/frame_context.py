@@ -0,0 +1,113 @@
+"""
+Per-Frame Context
+
+One FrameContext is created per captured frame and handed to every analyzer
+instead of the raw BGR array. Derived buffers – RGB, gray, the downscaled
+preview and the inference-resolution input – are computed lazily the first
+time someone asks for them and memoized, so each colour conversion or resize
+happens at most once per frame no matter how many stages need it.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class FrameContext:
+    """A BGR frame plus lazily computed, memoized derived buffers."""
+
+    __slots__ = ("frame", "preview_size", "inference_width", "_cache")
+
+    def __init__(
+        self,
+        frame,
+        preview_size: Optional[Tuple[int, int]] = None,
+        inference_width: Optional[int] = None,
+    ):
+        self.frame = frame
+        # (width, height) box the default preview is fitted into
+        self.preview_size = preview_size
+        # Width full-frame inference runs at; landmarks are normalized, so
+        # the model's input scale does not change the results' coordinates
+        self.inference_width = inference_width
+        self._cache: Dict = {}
+
+    @property
+    def shape(self):
+        return self.frame.shape
+
+    @property
+    def width(self) -> int:
+        return self.frame.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.frame.shape[0]
+
+    def _memo(self, key, compute):
+        value = self._cache.get(key)
+        if value is None:
+            value = self._cache[key] = compute()
+        return value
+
+    @property
+    def rgb(self):
+        return self._memo("rgb", lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB))
+
+    @property
+    def gray(self):
+        return self._memo("gray", lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY))
+
+    def resized(self, width: int):
+        """BGR frame downscaled to `width` (aspect kept); the frame itself if not smaller."""
+        if not width or width >= self.width:
+            return self.frame
+
+        def compute():
+            height = max(1, int(round(self.height * width / float(self.width))))
+            return cv2.resize(self.frame, (width, height), interpolation=cv2.INTER_AREA)
+
+        return self._memo(("bgr", width), compute)
+
+    def rgb_at(self, width: int):
+        """RGB of resized(width)."""
+        if not width or width >= self.width:
+            return self.rgb
+        return self._memo(("rgb", width), lambda: cv2.cvtColor(self.resized(width), cv2.COLOR_BGR2RGB))
+
+    def gray_at(self, width: int):
+        """Gray of resized(width)."""
+        if not width or width >= self.width:
+            return self.gray
+        return self._memo(("gray", width), lambda: cv2.cvtColor(self.resized(width), cv2.COLOR_BGR2GRAY))
+
+    def luma_sample(self, stride: int):
+        """Gray of every `stride`-th pixel in both axes – a cheap luminance sample."""
+        if stride <= 1:
+            return self.gray
+
+        def compute():
+            sample = np.ascontiguousarray(self.frame[::stride, ::stride])
+            return cv2.cvtColor(sample, cv2.COLOR_BGR2GRAY)
+
+        return self._memo(("luma", stride), compute)
+
+    @property
+    def preview(self):
+        """BGR frame fitted into preview_size (the full frame if it already fits)."""
+        if not self.preview_size:
+            return self.frame
+        box_w, box_h = self.preview_size
+        scale = min(box_w / float(self.width), box_h / float(self.height))
+        return self.resized(int(self.width * scale)) if scale < 1.0 else self.frame
+
+    @property
+    def inference_rgb(self):
+        """RGB input for full-frame landmark detection."""
+        return self.rgb_at(self.inference_width)
+
+
+def as_frame_context(frame) -> FrameContext:
+    """Wrap a raw BGR frame; FrameContexts pass through unchanged."""
+    return frame if isinstance(frame, FrameContext) else FrameContext(frame)
@@ -0,0 +1,183 @@
+"""
+Shared-Memory Frame Ring
+
+A fixed number of frame slots in one multiprocessing.shared_memory block, so
+frames move between pipeline stages (and worker processes) as sequence
+numbers instead of fresh arrays or pickles. The capture stage writes straight
+into a preallocated slot (cv2.flip(..., dst=slot)) and consumers read
+zero-copy views, so steady-state frame memory is `slots` frames no matter how
+many consumers there are.
+
+Layout: an int64 header followed by the slots
+
+    [next_seq | slot_seq × slots | pinned_seq × readers] [slot 0] [slot 1] …
+
+Every consumer owns a reader cursor. pin() publishes the sequence number the
+reader is about to use and then checks the slot still holds it; claim() never
+reuses a slot whose current frame is pinned by any reader (the writer drops
+the new frame instead). unpin() re-checks the slot, so a reader learns after
+the fact whether its frame was replaced while it was being read (see pin()).
+"""
+
+import sys
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+EMPTY = -1
+
+
+class SharedFrameRing:
+    """Single-writer, multi-reader ring of uint8 frames in shared memory."""
+
+    def __init__(self, slots: int = 4, readers: int = 2, refs: int = 1):
+        self.slots = slots
+        self.readers = readers
+        self.shape: Optional[Tuple[int, ...]] = None
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._header = None
+        self._frames = None
+        self._owner = True
+        # In-process users; the block is freed when the last one releases it
+        self._refs = refs
+        self._lock = threading.Lock()
+
+    # -- setup ----------------------------------------------------------------
+
+    @property
+    def allocated(self) -> bool:
+        return self._shm is not None
+
+    @property
+    def header_size(self) -> int:
+        return 8 * (1 + self.slots + self.readers)
+
+    def allocate(self, shape: Tuple[int, ...]):
+        """Create the shared block for frames of `shape` (writer side, once)."""
+        size = self.header_size + self.slots * int(np.prod(shape))
+        self._map(shared_memory.SharedMemory(create=True, size=size), tuple(shape))
+        self._header[0] = 0
+        self._header[1:] = EMPTY
+
+    @classmethod
+    def attach(cls, descriptor) -> "SharedFrameRing":
+        """Map an existing ring from its descriptor (reader side, e.g. a worker process)."""
+        name, shape, slots, readers = descriptor
+        ring = cls(slots, readers)
+        ring._owner = False
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=name)
+            _untrack(shm)
+        ring._map(shm, tuple(shape))
+        return ring
+
+    @property
+    def descriptor(self):
+        """Picklable (name, shape, slots, readers) for attach()."""
+        return (self._shm.name, self.shape, self.slots, self.readers)
+
+    def _map(self, shm, shape):
+        self._shm = shm
+        self.shape = shape
+        self._header = np.ndarray((1 + self.slots + self.readers,), dtype=np.int64, buffer=shm.buf)
+        self._frames = np.ndarray(
+            (self.slots,) + shape, dtype=np.uint8, buffer=shm.buf, offset=self.header_size
+        )
+
+    # -- writer ---------------------------------------------------------------
+
+    def claim(self):
+        """
+        Reserve the next slot. Returns (seq, writable view), or None if the
+        frame it would replace is pinned by a reader (drop the new frame).
+        """
+        header = self._header
+        seq = int(header[0])
+        index = 1 + seq % self.slots
+        previous = int(header[index])
+        # Invalidate first so a reader pinning `previous` now sees it is gone
+        header[index] = EMPTY
+        if previous != EMPTY and (header[1 + self.slots:] == previous).any():
+            header[index] = previous
+            return None
+        return seq, self._frames[seq % self.slots]
+
+    def publish(self, seq: int):
+        """Make the frame written into claim()'s slot visible to readers."""
+        self._header[1 + seq % self.slots] = seq
+        self._header[0] = seq + 1
+
+    # -- readers --------------------------------------------------------------
+
+    def pin(self, reader: int, seq: int):
+        """
+        Zero-copy view of frame `seq` held for `reader`, or None if it was replaced.
+
+        The pin is a hint, not a lock: this store-then-load and claim()'s
+        invalidate-then-check are unsynchronized, and across processes the
+        CPU may reorder them, so a racing claim() can still reuse the slot.
+        Every reader must therefore end with unpin() and discard whatever it
+        derived from the frame when unpin() returns False.
+        """
+        header = self._header
+        cursor = 1 + self.slots + reader
+        header[cursor] = seq
+        if header[1 + seq % self.slots] != seq:
+            header[cursor] = EMPTY
+            return None
+        return self._frames[seq % self.slots]
+
+    def valid(self, seq: int) -> bool:
+        """True if the slot still holds frame `seq`."""
+        return self._header[1 + seq % self.slots] == seq
+
+    def unpin(self, reader: int) -> bool:
+        """Release `reader`'s pin; True if its frame stayed intact until now."""
+        cursor = 1 + self.slots + reader
+        seq = int(self._header[cursor])
+        intact = seq != EMPTY and self.valid(seq)
+        self._header[cursor] = EMPTY
+        return intact
+
+    # -- lifetime -------------------------------------------------------------
+
+    def release(self):
+        """Drop one in-process user; the last one closes (and the owner unlinks) the block."""
+        with self._lock:
+            self._refs -= 1
+            last = self._refs <= 0
+        if last:
+            self.close()
+
+    def close(self):
+        shm, self._shm = self._shm, None
+        if shm is None:
+            return
+        self._header = None
+        self._frames = None
+        try:
+            shm.close()
+        except BufferError:
+            # A consumer still holds a view; the mapping goes away with it
+            pass
+        if self._owner:
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _untrack(shm):
+    """
+    Stop this process's resource tracker from unlinking an attached block
+    when the process exits (Python < 3.13 registers every attach). A tracker
+    inherited from the creating process (spawn) holds the creator's own
+    registration, which must survive, so only a private tracker is told.
+    """
+    tracker = getattr(resource_tracker, "_resource_tracker", None)
+    if getattr(tracker, "_pid", None) is not None:
+        resource_tracker.unregister(shm._name, "shared_memory")
@@ -0,0 +1,213 @@
+"""
+Frame Sources
+
+Pluggable replacements for a hard-coded cv2.VideoCapture(0), so the pipeline
+and debug tools can run on headless CI boxes and be benchmarked reproducibly.
+Every source mirrors the small VideoCapture surface the code already uses
+(isOpened / read / release):
+
+  CameraSource          – live webcam (paced by the device)
+  VideoFileSource       – recorded clip
+  ImageDirectorySource  – sorted directory of still images
+  ArraySource           – in-memory ring of NumPy frames
+  SyntheticSource       – procedurally generated frames
+
+Non-camera sources are either `realtime` (frames follow the wall clock at the
+source's fps, skipping frames when the consumer falls behind, like a webcam
+would) or run as fast as the consumer reads.
+"""
+
+import os
+import time
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class FrameSource:
+    """Base class: a VideoCapture-like producer of BGR frames."""
+
+    # True if the device delivers frames at its own pace (live camera)
+    live = False
+
+    def __init__(self, fps: float = 30.0, realtime: bool = True, loop: bool = False):
+        self.fps = fps
+        self.realtime = realtime
+        self.loop = loop
+        self._start: Optional[float] = None
+        self._next_index = 0
+
+    def isOpened(self) -> bool:
+        return True
+
+    def read(self):
+        """Returns (ok, frame) like cv2.VideoCapture.read()."""
+        index = self._next_index
+        if self.realtime:
+            now = time.monotonic()
+            if self._start is None:
+                self._start = now
+            due = int((now - self._start) * self.fps)
+            if due < index:
+                # Ahead of the clock: wait for this frame's slot
+                time.sleep((index - due) / self.fps)
+            else:
+                # Behind the clock: drop frames we missed, as a camera would
+                index = due
+        frame = self._frame_at(index)
+        if frame is None and self.loop and index > 0:
+            self._rewind()
+            self._start = time.monotonic() if self.realtime else None
+            index = 0
+            frame = self._frame_at(index)
+        if frame is None:
+            return False, None
+        self._next_index = index + 1
+        return True, frame
+
+    def _frame_at(self, index: int):
+        """Frame number `index`, or None past the end."""
+        raise NotImplementedError
+
+    def _rewind(self):
+        """Prepare to serve frame 0 again (loop=True)."""
+
+    def release(self):
+        pass
+
+
+class CameraSource(FrameSource):
+    live = True
+
+    def __init__(self, device: int = 0):
+        super().__init__(realtime=True)
+        self.cap = cv2.VideoCapture(device)
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def read(self):
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path: str, realtime: bool = True, loop: bool = False):
+        self.cap = cv2.VideoCapture(path)
+        fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        super().__init__(fps=fps, realtime=realtime, loop=loop)
+        self._position = 0
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def _frame_at(self, index: int):
+        # Sequential decode; skipped frames are grabbed but not decoded
+        while self._position < index:
+            if not self.cap.grab():
+                return None
+            self._position += 1
+        ok, frame = self.cap.read()
+        if not ok:
+            return None
+        self._position += 1
+        return frame
+
+    def _rewind(self):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self._position = 0
+
+    def release(self):
+        self.cap.release()
+
+
+class ArraySource(FrameSource):
+    """In-memory ring: an (F, H, W, 3) array or a sequence of frames."""
+
+    def __init__(self, frames, fps: float = 30.0, realtime: bool = False, loop: bool = True):
+        super().__init__(fps=fps, realtime=realtime, loop=loop)
+        self.frames = frames
+
+    def isOpened(self) -> bool:
+        return len(self.frames) > 0
+
+    def _frame_at(self, index: int):
+        if index >= len(self.frames):
+            return None
+        return self.frames[index]
+
+
+class ImageDirectorySource(ArraySource):
+    """Sorted still images from a directory, decoded lazily."""
+
+    def __init__(self, path: str, fps: float = 30.0, realtime: bool = True, loop: bool = False):
+        files: List[str] = sorted(
+            os.path.join(path, name)
+            for name in os.listdir(path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        super().__init__(files, fps=fps, realtime=realtime, loop=loop)
+
+    def _frame_at(self, index: int):
+        path = super()._frame_at(index)
+        return cv2.imread(path) if path is not None else None
+
+
+class SyntheticSource(FrameSource):
+    """Deterministic generated frames: gradient background + moving blob."""
+
+    def __init__(
+        self,
+        width: int = 640,
+        height: int = 480,
+        fps: float = 30.0,
+        realtime: bool = False,
+        count: Optional[int] = None,
+        seed: int = 0,
+    ):
+        super().__init__(fps=fps, realtime=realtime, loop=False)
+        self.width = width
+        self.height = height
+        self.count = count
+        gradient = np.linspace(40, 200, width, dtype=np.uint8)
+        self._background = np.repeat(np.tile(gradient, (height, 1))[:, :, None], 3, axis=2)
+        self._noise = np.random.default_rng(seed).integers(0, 12, size=(height, width, 3), dtype=np.uint8)
+
+    def _frame_at(self, index: int):
+        if self.count is not None and index >= self.count:
+            return None
+        frame = self._background.copy()
+        frame += np.roll(self._noise, index, axis=1)
+        t = index / self.fps
+        cx = int(self.width * (0.5 + 0.2 * np.sin(t)))
+        cy = int(self.height * (0.5 + 0.1 * np.cos(t * 0.7)))
+        axes = (self.width // 8, self.height // 5)
+        cv2.ellipse(frame, (cx, cy), axes, 0, 0, 360, (150, 170, 210), -1)
+        return frame
+
+
+def open_frame_source(spec: Optional[str] = None, realtime: bool = True, loop: bool = False) -> FrameSource:
+    """
+    Build a source from a spec string:
+      "0", "1", …                 camera index (default "0")
+      "synthetic[:WxH]"           generated frames
+      path to a directory         image sequence
+      path to a file              video clip
+    """
+    spec = "0" if spec is None or spec == "" else str(spec)
+    if spec.isdigit():
+        return CameraSource(int(spec))
+    if spec.startswith("synthetic"):
+        width, height = 640, 480
+        if ":" in spec:
+            width, height = (int(v) for v in spec.split(":", 1)[1].lower().split("x"))
+        return SyntheticSource(width, height, realtime=realtime)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, realtime=realtime, loop=loop)
+    return VideoFileSource(spec, realtime=realtime, loop=loop)
+
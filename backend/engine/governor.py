@@ -0,0 +1,171 @@
+"""
+Adaptive Frame-Rate Governor
+
+Picks the capture/inference rate from what the eyes are doing instead of a
+fixed TARGET_FPS:
+
+  burst   – EAR is dipping toward a blink: run at max_fps so blinks are caught
+  stable  – eyes steadily open for a while: drop to stable_fps
+
+and backs off further whenever the measured per-frame work or the CPU used by
+this camera's stages exceeds its configured budget. Achieved rates per mode and budget use are
+reported so blink recall can be checked against the rate savings.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class FrameRateGovernor:
+    """Computes the target frame rate from observed eye state and CPU budget."""
+
+    def __init__(
+        self,
+        max_fps: float = 30.0,
+        stable_fps: float = 15.0,
+        min_fps: float = 5.0,
+        ear_alert: float = 0.28,
+        ear_alert_fraction: float = 0.9,
+        burst_hold_sec: float = 1.0,
+        stable_after_sec: float = 2.0,
+        cpu_budget: float = 0.5,
+        frame_budget: float = 0.6,
+        base_analysis_interval: float = 5.0,
+    ):
+        self.max_fps = max_fps
+        self.stable_fps = stable_fps
+        self.min_fps = min_fps
+        # EAR below this means a blink may be starting: the eye engine's
+        # "open" threshold (EyeGuardianEngine.EAR_THRESHOLD_OPEN), lowered to
+        # ear_alert_fraction of the user's own open EAR when observe() gets it,
+        # so eyes that rest below the fixed threshold can still reach stable
+        self.ear_alert = ear_alert
+        self.ear_alert_fraction = ear_alert_fraction
+        self.burst_hold_sec = burst_hold_sec
+        self.stable_after_sec = stable_after_sec
+        # Fraction of one core this camera's stages may use (see add_cpu)
+        self.cpu_budget = cpu_budget
+        # Fraction of each frame interval inference may be busy
+        self.frame_budget = frame_budget
+        self.base_analysis_interval = base_analysis_interval
+
+        self._lock = threading.Lock()
+        self.mode = "burst"
+        self.target_fps = max_fps
+        self._budget_cap = max_fps
+        self._last_alert = time.monotonic()
+        self._busy_ewma = 0.0
+        self._cpu_fraction = 0.0
+        self._cpu_seconds = 0.0
+        self._cpu_mark = (time.monotonic(), 0.0)
+        # Frames and seconds spent per mode, for achieved-rate reporting
+        self._mode_frames = {"burst": 0, "stable": 0}
+        self._mode_time = {"burst": 0.0, "stable": 0.0}
+        self._last_observe = None
+
+    @property
+    def capture_interval(self) -> float:
+        return 1.0 / self.target_fps
+
+    @property
+    def analysis_interval(self) -> float:
+        """Light/secondary analysis cadence, stretched while over budget."""
+        return self.base_analysis_interval * max(1.0, self.max_fps / max(self._budget_cap, self.min_fps))
+
+    def alert_level(self, ear_open: Optional[float] = None) -> float:
+        """EAR below which a blink may be starting, given the user's open EAR."""
+        if ear_open:
+            return min(self.ear_alert, self.ear_alert_fraction * ear_open)
+        return self.ear_alert
+
+    def add_cpu(self, seconds: float):
+        """
+        Charge CPU time used by one of this camera's stages: each stage thread
+        reports its time.thread_time() deltas, and a process-mode worker its
+        own process CPU. Other cameras and the API never count against it.
+        """
+        with self._lock:
+            self._cpu_seconds += seconds
+
+    def observe(self, ear: float, face_present: bool, busy_seconds: float, ear_open: Optional[float] = None):
+        """
+        Feed one processed frame's EAR, inference time and (optionally) the
+        user's open-eye EAR baseline; updates target_fps.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._last_observe is not None:
+                self._mode_time[self.mode] += now - self._last_observe
+            self._last_observe = now
+            self._mode_frames[self.mode] += 1
+
+            # -- eye state -> mode --------------------------------------------
+            if face_present and 0.0 < ear < self.alert_level(ear_open):
+                self._last_alert = now
+            if now - self._last_alert <= self.burst_hold_sec:
+                self.mode = "burst"
+            elif now - self._last_alert >= self.stable_after_sec:
+                self.mode = "stable"
+            mode_fps = self.max_fps if self.mode == "burst" else self.stable_fps
+
+            # -- budget -> cap -------------------------------------------------
+            self._busy_ewma = 0.9 * self._busy_ewma + 0.1 * busy_seconds
+            if self._update_cpu(now):
+                if self._cpu_fraction > self.cpu_budget:
+                    # Multiplicative decrease while over the CPU budget...
+                    self._budget_cap = max(self.min_fps, self._budget_cap * 0.8)
+                else:
+                    # ...additive recovery once back under it
+                    self._budget_cap = min(self.max_fps, self._budget_cap + 2.0)
+            cap = self._budget_cap
+            if self._busy_ewma > 0:
+                cap = min(cap, self.frame_budget / self._busy_ewma)
+
+            self.target_fps = max(self.min_fps, min(mode_fps, cap))
+
+    def _update_cpu(self, now: float) -> bool:
+        """Refresh the stages' CPU fraction about once a second; True if refreshed."""
+        mark_wall, mark_cpu = self._cpu_mark
+        elapsed = now - mark_wall
+        if elapsed < 1.0:
+            return False
+        cpu_now = self._cpu_seconds
+        self._cpu_fraction = (cpu_now - mark_cpu) / elapsed
+        self._cpu_mark = (now, cpu_now)
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            achieved = {
+                mode: round(self._mode_frames[mode] / self._mode_time[mode], 2) if self._mode_time[mode] > 0 else 0.0
+                for mode in self._mode_frames
+            }
+            return {
+                "mode": self.mode,
+                "target_fps": round(self.target_fps, 2),
+                "budget_cap_fps": round(min(self._budget_cap, self.max_fps), 2),
+                "analysis_interval_sec": round(self.analysis_interval, 2),
+                "achieved_fps": achieved,
+                "frames": dict(self._mode_frames),
+                "inference_ms": round(self._busy_ewma * 1000.0, 2),
+                "frame_budget_use": round(self._busy_ewma * self.target_fps / self.frame_budget, 3) if self.frame_budget else 0.0,
+                "cpu_fraction": round(self._cpu_fraction, 3),
+                "cpu_budget_use": round(self._cpu_fraction / self.cpu_budget, 3) if self.cpu_budget else 0.0,
+            }
+
+
+class ThreadCpuMeter:
+    """
+    Charges the calling thread's CPU time to a governor. Create it on the
+    stage thread itself and call tick() once per loop iteration.
+    """
+
+    def __init__(self, governor: FrameRateGovernor):
+        self.governor = governor
+        self._mark = time.thread_time()
+
+    def tick(self):
+        now = time.thread_time()
+        self.governor.add_cpu(now - self._mark)
+        self._mark = now
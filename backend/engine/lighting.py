@@ -0,0 +1,186 @@
+"""
+Ambient Lighting Analyzer
+
+Same brightness levels and risks as light/ambient_light.py (which is left
+untouched), but cheap enough to run on every frame: instead of converting the
+whole frame to gray it reads a strided luminance sample (every `stride`-th
+pixel in both axes, ~1/64 of the pixels by default) from the FrameContext.
+
+Across frames it keeps an exponentially decayed luminance histogram (for
+percentiles), fast and slow brightness averages (for a trend), and – when
+landmarks are available – compares the face region against the background to
+flag backlighting and glare on the face, which a global mean cannot see. Both
+are reported as extra fields; they only change level/risk when the analyzer
+is built with `contrast_risk=True`.
+"""
+
+import math
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from engine.frame_context import as_frame_context
+
+HIST_BINS = 32
+# Pixels at or above this are treated as clipped highlights
+GLARE_LEVEL = 245
+# Share of clipped pixels in the face region that counts as glare
+GLARE_FRACTION = 0.04
+# Background this much brighter than the face counts as backlit
+BACKLIGHT_DELTA = 60.0
+# Fast - slow brightness difference reported as a trend
+TREND_DELTA = 12.0
+
+
+def classify_brightness(brightness: float) -> Dict:
+    """Level + risk for a 0-255 mean brightness (thresholds from light/ambient_light.py)."""
+    if brightness < 60:
+        level, risk = "Dim", 4
+    elif brightness > 180:
+        level, risk = "Harsh", 3
+    else:
+        level, risk = "Good", 0
+    return {"brightness": round(float(brightness), 2), "level": level, "risk": risk}
+
+
+def _ewma_weight(dt: float, tau: float) -> float:
+    """Update weight for a time-constant `tau` EWMA after `dt` seconds."""
+    return 1.0 - math.exp(-max(dt, 0.0) / tau)
+
+
+class LightingAnalyzer:
+    """
+    Computes the ambient lighting condition from a frame or FrameContext.
+
+    Stateful: call analyze() on consecutive frames of one camera (every frame
+    is fine) so the histogram and trend accumulate.
+    """
+
+    def __init__(
+        self,
+        stride: int = 8,
+        histogram_tau: float = 10.0,
+        fast_tau: float = 1.0,
+        slow_tau: float = 30.0,
+        contrast_risk: bool = False,
+    ):
+        self.stride = stride
+        self.histogram_tau = histogram_tau
+        self.fast_tau = fast_tau
+        self.slow_tau = slow_tau
+        # Let backlight/glare raise otherwise Good light to risk 2
+        self.contrast_risk = contrast_risk
+        self.reset()
+
+    def reset(self):
+        self._histogram = np.zeros(HIST_BINS, dtype=np.float64)
+        self._fast: Optional[float] = None
+        self._slow: Optional[float] = None
+        self._last_time: Optional[float] = None
+
+    def analyze(self, frame, face=None, now: Optional[float] = None) -> Dict:
+        """
+        Light data for one frame. `face` (FaceLandmarks, optional) enables the
+        face/background split. brightness/level/risk are exactly those of
+        classify_brightness() unless `contrast_risk` is set, in which case
+        backlight or glare in otherwise Good light raise the level to
+        "Backlit"/"Glare" with risk 2.
+        """
+        ctx = as_frame_context(frame)
+        sample = ctx.luma_sample(self.stride)
+        now = time.time() if now is None else now
+        dt = 0.0 if self._last_time is None else now - self._last_time
+        self._last_time = now
+
+        brightness = float(sample.mean())
+        counts = np.bincount(sample.ravel() >> 3, minlength=HIST_BINS).astype(np.float64)
+        self._update_averages(brightness, counts / sample.size, dt)
+
+        clipped = float(np.count_nonzero(sample >= GLARE_LEVEL)) / sample.size
+        face_brightness = background_brightness = None
+        face_clipped = 0.0
+        region = self._face_region(face, sample.shape)
+        if region is not None:
+            y0, y1, x0, x1 = region
+            face_pixels = sample[y0:y1, x0:x1]
+            face_sum = float(face_pixels.sum())
+            face_brightness = face_sum / face_pixels.size
+            face_clipped = float(np.count_nonzero(face_pixels >= GLARE_LEVEL)) / face_pixels.size
+            rest = sample.size - face_pixels.size
+            if rest > 0:
+                background_brightness = (brightness * sample.size - face_sum) / rest
+
+        backlight = (
+            face_brightness is not None and background_brightness is not None
+            and background_brightness - face_brightness >= BACKLIGHT_DELTA
+        )
+        # Bright lamps or windows elsewhere in view are not glare on the user;
+        # whole-frame clipping is only reported as clipped_fraction
+        glare = face_clipped >= GLARE_FRACTION
+
+        result = classify_brightness(brightness)
+        if self.contrast_risk and result["risk"] == 0 and (backlight or glare):
+            result["level"] = "Backlit" if backlight else "Glare"
+            result["risk"] = 2
+
+        delta = self._fast - self._slow
+        if delta >= TREND_DELTA:
+            trend = "Brightening"
+        elif delta <= -TREND_DELTA:
+            trend = "Darkening"
+        else:
+            trend = "Stable"
+
+        p5, p50, p95 = self.percentiles((5, 50, 95))
+        result.update({
+            "p5": p5,
+            "p50": p50,
+            "p95": p95,
+            "face_brightness": None if face_brightness is None else round(face_brightness, 2),
+            "background_brightness": None if background_brightness is None else round(background_brightness, 2),
+            "backlight": bool(backlight),
+            "glare": bool(glare),
+            "clipped_fraction": round(clipped, 4),
+            "trend": trend,
+            "trend_delta": round(delta, 2),
+        })
+        return result
+
+    def percentiles(self, qs=(5, 50, 95)):
+        """Percentiles (0-255) of the decayed luminance histogram."""
+        total = self._histogram.sum()
+        if total <= 0:
+            return tuple(0.0 for _ in qs)
+        cumulative = np.cumsum(self._histogram) / total
+        width = 256 // HIST_BINS
+        values = []
+        for q in qs:
+            index = int(np.searchsorted(cumulative, q / 100.0))
+            values.append(float(min(index, HIST_BINS - 1) * width + width / 2))
+        return tuple(values)
+
+    def _update_averages(self, brightness: float, distribution, dt: float):
+        if self._fast is None:
+            self._fast = self._slow = brightness
+            self._histogram[:] = distribution
+            return
+        self._fast += _ewma_weight(dt, self.fast_tau) * (brightness - self._fast)
+        self._slow += _ewma_weight(dt, self.slow_tau) * (brightness - self._slow)
+        weight = _ewma_weight(dt, self.histogram_tau)
+        self._histogram += weight * (distribution - self._histogram)
+
+    @staticmethod
+    def _face_region(face, shape):
+        """(y0, y1, x0, x1) landmark bounding box in sample coordinates, or None."""
+        if face is None:
+            return None
+        h, w = shape[:2]
+        xy = face.points[:, :2]
+        x0, y0 = np.clip(xy.min(axis=0), 0.0, 1.0)
+        x1, y1 = np.clip(xy.max(axis=0), 0.0, 1.0)
+        x0, x1 = int(x0 * w), int(math.ceil(x1 * w))
+        y0, y1 = int(y0 * h), int(math.ceil(y1 * h))
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None
+        return y0, y1, x0, x1
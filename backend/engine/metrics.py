@@ -0,0 +1,240 @@
+"""
+Pipeline Metrics
+
+Low-overhead, fixed-bucket instrumentation for the camera pipeline, rendered
+in the Prometheus text exposition format by /api/metrics. Recording a timing
+is a perf_counter pair, a bisect and a locked increment, so it stays cheap
+enough to wrap every stage of every frame:
+
+    with STAGE_SECONDS.time("landmarks"):
+        face = landmark_stage.detect(frame)
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Upper bounds (seconds) for per-stage timings: 0.5 ms … 1 s covers a cheap
+# flip up to a stalled DB commit
+STAGE_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    """Label value escaped per the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(name, value, extra: str = "") -> str:
+    """Label set for one series; `name`/`value` may be tuples for several labels."""
+    parts = []
+    if isinstance(name, tuple):
+        parts.extend(f'{n}="{_escape(v)}"' for n, v in zip(name, value))
+    elif name is not None:
+        parts.append(f'{name}="{_escape(value)}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_label", "_start")
+
+    def __init__(self, histogram: "Histogram", label: Optional[str]):
+        self._histogram = histogram
+        self._label = label
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._start, self._label)
+        return False
+
+
+class Histogram:
+    """Cumulative fixed-bucket histogram, optionally split by one label."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, label: Optional[str] = None, buckets=STAGE_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label value -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Optional[str], list] = {}
+        # Raw observations kept for drain() (worker processes only)
+        self._recorded: Optional[list] = None
+
+    def observe(self, value: float, label: Optional[str] = None):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            if self._recorded is not None:
+                self._recorded.append((value, label))
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, label: Optional[str] = None) -> _Timer:
+        """Context manager recording the elapsed time of its block."""
+        return _Timer(self, label)
+
+    def start_recording(self):
+        """
+        Also keep raw observations until drain(). Used by inference worker
+        processes to forward their timings into the API process's registry.
+        """
+        with self._lock:
+            self._recorded = []
+
+    def drain(self) -> List[Tuple[float, Optional[str]]]:
+        with self._lock:
+            recorded = self._recorded or []
+            if self._recorded is not None:
+                self._recorded = []
+        return recorded
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = {k: (list(v[0]), v[1]) for k, v in self._series.items()}
+        lines = []
+        for value, (counts, total) in sorted(series.items(), key=lambda kv: kv[0] or ""):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label, value, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label, value)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label, value)} {cumulative}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter, optionally split by one label."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, label: Optional[str] = None):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self._lock = threading.Lock()
+        self._values: Dict[Optional[str], float] = {}
+
+    def inc(self, label: Optional[str] = None, amount: float = 1):
+        with self._lock:
+            self._values[label] = self._values.get(label, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f"{self.name}{_labels(self.label, k)} {_format_value(v)}"
+            for k, v in sorted(values.items(), key=lambda kv: kv[0] or "")
+        ]
+
+
+class Gauge:
+    """
+    Value read at scrape time from a callback returning a number or
+    {label value: number} (label values are tuples when `label` is a tuple).
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, fn: Callable, label=None):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        try:
+            value = self.fn()
+        except Exception:
+            return []
+        if isinstance(value, dict):
+            return [
+                f"{self.name}{_labels(self.label, k)} {_format_value(v)}"
+                for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))
+            ]
+        return [f"{self.name} {_format_value(value)}"]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None and not isinstance(metric, Gauge):
+                return existing
+            # Gauges are re-bound, so the latest owner's callback wins
+            self._metrics[metric.name] = metric
+            return metric
+
+    def histogram(self, name: str, help_text: str, label: Optional[str] = None, buckets=STAGE_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, label, buckets))
+
+    def counter(self, name: str, help_text: str, label: Optional[str] = None) -> Counter:
+        return self._register(Counter(name, help_text, label))
+
+    def gauge(self, name: str, help_text: str, fn: Callable, label=None) -> Gauge:
+        return self._register(Gauge(name, help_text, fn, label))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry and the pipeline's own series
+METRICS = MetricsRegistry()
+
+STAGE_SECONDS = METRICS.histogram(
+    "eyeguardian_stage_seconds",
+    "Time spent in each camera pipeline stage per frame.",
+    label="stage",
+)
+FRAMES_TOTAL = METRICS.counter(
+    "eyeguardian_frames_total",
+    "Items completed by each pipeline stage.",
+    label="stage",
+)
+FRAMES_DROPPED = METRICS.counter(
+    "eyeguardian_frames_dropped_total",
+    "Items discarded by a stage's drop-oldest queue because the stage fell behind.",
+    label="stage",
+)
+STAGE_ERRORS = METRICS.counter(
+    "eyeguardian_stage_errors_total",
+    "Errors raised inside each pipeline stage.",
+    label="stage",
+)
+READ_FAILURES = METRICS.counter(
+    "eyeguardian_read_failures_total",
+    "Failed frame reads from the camera / frame source.",
+)
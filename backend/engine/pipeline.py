@@ -0,0 +1,143 @@
+"""
+Pipeline primitives for the camera monitor
+
+Bounded drop-oldest queues connect the capture, inference, preview-encode and
+persistence stages so a slow consumer can never hold back camera acquisition,
+and StageStats lets every stage report its own throughput.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from engine.metrics import FRAMES_DROPPED, FRAMES_TOTAL, STAGE_ERRORS
+
+
+class StageStats:
+    """
+    Throughput / latency counters for one pipeline stage. The most recent
+    `samples` busy times are kept for latency percentiles (None keeps all of
+    them, which the benchmark harness uses for whole-run figures).
+    """
+
+    def __init__(self, name: str, window: int = 60, samples: Optional[int] = 2048):
+        self.name = name
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self._busy_total = 0.0
+        self._completions = deque(maxlen=window)
+        self._samples = deque(maxlen=samples)
+        self._lock = threading.Lock()
+
+    def record(self, busy_seconds: float):
+        """Record one processed item that took `busy_seconds` of work."""
+        with self._lock:
+            self.processed += 1
+            self._busy_total += busy_seconds
+            self._completions.append(time.monotonic())
+            self._samples.append(busy_seconds)
+        FRAMES_TOTAL.inc(self.name)
+
+    def record_drop(self, count: int = 1):
+        with self._lock:
+            self.dropped += count
+        FRAMES_DROPPED.inc(self.name, count)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+        STAGE_ERRORS.inc(self.name)
+
+    def percentiles(self, quantiles=(0.5, 0.95, 0.99)) -> List[float]:
+        """Busy-time percentiles in milliseconds over the kept samples."""
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return [0.0 for _ in quantiles]
+        last = len(ordered) - 1
+        return [round(ordered[min(last, int(round(q * last)))] * 1000.0, 2) for q in quantiles]
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p95, p99 = self.percentiles()
+        with self._lock:
+            fps = 0.0
+            if len(self._completions) >= 2:
+                span = self._completions[-1] - self._completions[0]
+                if span > 0:
+                    fps = (len(self._completions) - 1) / span
+            avg_ms = (self._busy_total / self.processed * 1000.0) if self.processed else 0.0
+            return {
+                "stage": self.name,
+                "processed": self.processed,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "fps": round(fps, 2),
+                "avg_ms": round(avg_ms, 2),
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99,
+            }
+
+
+class DropOldestQueue:
+    """
+    Bounded FIFO that never blocks the producer: when full, the oldest item is
+    discarded to make room (and counted against `stats`, if given).
+    """
+
+    def __init__(self, maxsize: int = 1, stats: Optional[StageStats] = None):
+        self.maxsize = max(1, maxsize)
+        self.stats = stats
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def put(self, item, block: bool = False) -> bool:
+        """
+        Enqueue `item`. Returns True if an older item had to be dropped.
+        With block=True the producer instead waits for room (used when
+        replaying recorded sources, where every frame must be processed).
+        """
+        with self._cond:
+            if block:
+                while len(self._items) >= self.maxsize and not self._closed:
+                    self._cond.wait()
+            if self._closed:
+                return False
+            dropped = False
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                dropped = True
+                if self.stats is not None:
+                    self.stats.record_drop()
+            self._items.append(item)
+            self._cond.notify()
+            return dropped
+
+    def get(self, timeout: Optional[float] = None):
+        """Dequeue the oldest item; returns None on timeout or once closed and drained."""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if self._items:
+                item = self._items.popleft()
+                # Wake a producer blocked in put(block=True)
+                self._cond.notify_all()
+                return item
+            return None
+
+    def close(self):
+        """Wake all consumers; remaining items can still be drained with get()."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
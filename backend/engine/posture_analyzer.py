@@ -5,13 +5,16 @@ Wraps the same algorithms from posture/ergonomics_module.py as a reusable class.
 Original posture modules are NOT modified.
 """
 
-import cv2
 import mediapipe as mp
 import numpy as np
 import math
+from typing import Optional
 from mediapipe.tasks import python as mp_python
 from mediapipe.tasks.python import vision
 
+from engine.face_landmarks import FaceLandmarks
+from engine.frame_context import as_frame_context
+
 
 def _rotation_matrix_to_euler_angles(R):
     """Same helper from posture/ergonomics_module.py"""
@@ -33,19 +36,23 @@ def _rotation_matrix_to_euler_angles(R):
 class PostureAnalyzer:
     """Analyzes head posture and screen distance from a single frame."""
 
-    def __init__(self, model_path: str):
-        # MediaPipe Tasks API on some versions prepends its package path
-        # to the model_asset_path. To avoid this, read the model as bytes.
-        with open(model_path, "rb") as f:
-            model_data = f.read()
-        
-        base_options = mp_python.BaseOptions(model_asset_buffer=model_data)
-        options = vision.FaceLandmarkerOptions(
-            base_options=base_options,
-            output_facial_transformation_matrixes=True,
-            num_faces=1,
-        )
-        self.landmarker = vision.FaceLandmarker.create_from_options(options)
+    def __init__(self, model_path: Optional[str] = None):
+        # Without a model path the analyzer only works on landmarks handed to
+        # analyze_landmarks() by a shared FaceLandmarkStage.
+        self.landmarker = None
+        if model_path:
+            # MediaPipe Tasks API on some versions prepends its package path
+            # to the model_asset_path. To avoid this, read the model as bytes.
+            with open(model_path, "rb") as f:
+                model_data = f.read()
+            
+            base_options = mp_python.BaseOptions(model_asset_buffer=model_data)
+            options = vision.FaceLandmarkerOptions(
+                base_options=base_options,
+                output_facial_transformation_matrixes=True,
+                num_faces=1,
+            )
+            self.landmarker = vision.FaceLandmarker.create_from_options(options)
 
         # Distance calibration (same constants as ergonomics_module.py)
         self.REAL_EYE_DISTANCE_CM = 6.3
@@ -54,9 +61,9 @@ class PostureAnalyzer:
         self.alpha = 0.5  # smoothing factor (lower = more responsive)
 
     def analyze(self, frame):
-        """Analyze a single BGR frame and return posture + distance data."""
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+        """Analyze a single BGR frame (or FrameContext) and return posture + distance data."""
+        ctx = as_frame_context(frame)
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=ctx.rgb)
         
         try:
             result = self.landmarker.detect(mp_image)
@@ -72,6 +79,19 @@ class PostureAnalyzer:
                 "posture_score": 100,
             }
 
+        face = None
+        if result.face_landmarks:
+            matrix = None
+            if result.facial_transformation_matrixes:
+                matrix = result.facial_transformation_matrixes[0]
+            face = FaceLandmarks(result.face_landmarks[0], matrix)
+        return self.analyze_landmarks(face, ctx.shape)
+
+    def analyze_landmarks(self, face, frame_shape):
+        """
+        Posture + distance from landmarks computed elsewhere (e.g. a shared
+        FaceLandmarkStage). `face` is a FaceLandmarks or None.
+        """
         data = {
             "head_position": "No Face",
             "overall": "Unknown",
@@ -87,14 +107,12 @@ class PostureAnalyzer:
         distance_valid = False
 
         # --- Face landmarks -> screen distance ---
-        if result.face_landmarks:
-            face_landmarks = result.face_landmarks[0]
-            h, w, _ = frame.shape
+        if face is not None:
+            h, w = frame_shape[:2]
 
-            left_eye = face_landmarks[33]
-            right_eye = face_landmarks[263]
-            x1, y1 = int(left_eye.x * w), int(left_eye.y * h)
-            x2, y2 = int(right_eye.x * w), int(right_eye.y * h)
+            # Outer eye corners from the shared (N, 2) pixel array
+            eyes = face.pixel_points(w, h)[[33, 263]].astype(np.int32)
+            (x1, y1), (x2, y2) = eyes.tolist()
             pixel_eye_distance = math.hypot(x2 - x1, y2 - y1)
 
             if pixel_eye_distance > 20:
@@ -114,8 +132,8 @@ class PostureAnalyzer:
                 data["distance_risk"] = 0.3
 
         # --- Head pose estimation ---
-        if result.facial_transformation_matrixes:
-            matrix = np.array(result.facial_transformation_matrixes[0]).reshape(4, 4)
+        if face is not None and face.transformation_matrix is not None:
+            matrix = np.array(face.transformation_matrix).reshape(4, 4)
             rotation_matrix = matrix[:3, :3]
             pitch, yaw, roll = _rotation_matrix_to_euler_angles(rotation_matrix)
 
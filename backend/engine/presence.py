@@ -0,0 +1,89 @@
+"""
+Presence Gate
+
+Absence state machine for the camera pipeline. While a face is in view the
+full landmark/eye/posture pipeline runs; after `absence_timeout` seconds
+without a face the monitor drops to a cheap low-rate presence check (a
+downscaled frame through the BlazeFace detector only) and suspends the heavy
+engines, resuming on the first frame a face is detected again.
+"""
+
+import threading
+import time
+from typing import Any, Dict
+
+import mediapipe as mp
+
+from engine.frame_context import as_frame_context
+
+
+class PresenceGate:
+    """Tracks whether the user is at the desk and runs the cheap idle check."""
+
+    def __init__(self, absence_timeout: float = 10.0, idle_fps: float = 2.0, check_width: int = 256):
+        self.absence_timeout = absence_timeout
+        self.idle_fps = idle_fps
+        self.check_width = check_width
+
+        self._lock = threading.Lock()
+        self.present = True
+        self._last_seen = time.monotonic()
+        self._changed_at = self._last_seen
+        self.absences = 0
+        self.idle_checks = 0
+        self._detector = None
+
+    @property
+    def idle_interval(self) -> float:
+        return 1.0 / self.idle_fps
+
+    def update(self, face_seen: bool) -> bool:
+        """Feed the full pipeline's result for one frame. Returns True on a state change."""
+        now = time.monotonic()
+        with self._lock:
+            if face_seen:
+                self._last_seen = now
+                if not self.present:
+                    self._set_present(True, now)
+                    return True
+            elif self.present and now - self._last_seen >= self.absence_timeout:
+                self._set_present(False, now)
+                self.absences += 1
+                return True
+        return False
+
+    def check(self, frame) -> bool:
+        """Cheap presence test on a downscaled frame (or FrameContext); flips back to present on a hit."""
+        if self._detector is None:
+            self._detector = mp.solutions.face_detection.FaceDetection(
+                model_selection=0, min_detection_confidence=0.5
+            )
+        results = self._detector.process(as_frame_context(frame).rgb_at(self.check_width))
+        self.idle_checks += 1
+
+        found = bool(results.detections)
+        if found:
+            now = time.monotonic()
+            with self._lock:
+                self._last_seen = now
+                if not self.present:
+                    self._set_present(True, now)
+        return found
+
+    def _set_present(self, present: bool, now: float):
+        self.present = present
+        self._changed_at = now
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "present": self.present,
+                "seconds_in_state": round(time.monotonic() - self._changed_at, 1),
+                "absences": self.absences,
+                "idle_checks": self.idle_checks,
+            }
+
+    def close(self):
+        if self._detector is not None:
+            self._detector.close()
+            self._detector = None
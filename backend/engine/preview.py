@@ -0,0 +1,122 @@
+"""
+Demand-driven Preview Encoding
+
+Subscribers register the preview they want (rate, width, JPEG quality, and
+whether they need a base64 data URL). The preview stage annotates and encodes
+only while at least one subscriber wants frames, runs at the highest rate any
+of them asked for, and encodes each distinct (width, quality) variant once per
+frame no matter how many clients share it.
+
+Clients that draw the landmark overlay themselves ask for unannotated
+variants; those carry the frame's quantized landmarks instead, so the server
+skips drawing entirely when nobody wants a server-drawn mesh.
+"""
+
+import base64
+import itertools
+import threading
+from typing import Dict, Optional, Tuple
+
+import cv2
+
+from engine.face_landmarks import draw_face_landmarks
+from engine.frame_context import as_frame_context
+from engine.metrics import STAGE_SECONDS
+
+# (width, jpeg_quality, annotated); width 0 means the frame context's default
+# preview size (native resolution if it has none)
+PreviewVariant = Tuple[int, int, bool]
+
+
+class PreviewFrame:
+    """One encoded preview variant of one frame."""
+
+    __slots__ = ("frame_seq", "jpeg", "data_url", "landmarks")
+
+    def __init__(self, frame_seq: int, jpeg: bytes, data_url: Optional[str] = None, landmarks: Optional[bytes] = None):
+        self.frame_seq = frame_seq
+        self.jpeg = jpeg
+        self.data_url = data_url
+        # Unannotated variants only: quantized x/y pairs (b"" if no face)
+        self.landmarks = landmarks
+
+
+class PreviewDemand:
+    """Thread-safe registry of the preview variants subscribers currently want."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        # token -> (fps, variant, wants_data_url)
+        self._requests: Dict[int, Tuple[float, PreviewVariant, bool]] = {}
+
+    def add(self, fps: float, width: int = 0, quality: int = 55, data_url: bool = False, annotate: bool = True):
+        """Register a request. Returns (token, variant) – pass the token to remove()."""
+        variant = (max(0, int(width)), max(1, min(100, int(quality))), bool(annotate))
+        with self._lock:
+            token = next(self._ids)
+            self._requests[token] = (float(fps), variant, bool(data_url))
+        return token, variant
+
+    def remove(self, token: int):
+        with self._lock:
+            self._requests.pop(token, None)
+
+    @property
+    def active(self) -> bool:
+        return bool(self._requests)
+
+    def snapshot(self):
+        """
+        Returns (max_fps, {variant: wants_data_url}); ({} if nobody wants
+        frames). A variant needs a data URL if any of its requesters does.
+        """
+        with self._lock:
+            requests = list(self._requests.values())
+        max_fps = 0.0
+        variants: Dict[PreviewVariant, bool] = {}
+        for fps, variant, wants_data_url in requests:
+            max_fps = max(max_fps, fps)
+            variants[variant] = variants.get(variant, False) or wants_data_url
+        return max_fps, variants
+
+
+def encode_previews(frame, face, frame_seq: int, variants: Dict[PreviewVariant, bool]):
+    """
+    Encode every requested variant of `frame` (a BGR frame or FrameContext).
+    Sizes come from the context's memoized downscales, and the mesh is drawn
+    onto each downscaled image at most once, only if an annotated variant of
+    that size is wanted. Returns {variant: PreviewFrame}.
+    """
+    ctx = as_frame_context(frame)
+
+    landmarks = None
+    if not all(annotated for _, _, annotated in variants):
+        landmarks = face.quantized_xy().tobytes() if face is not None else b""
+
+    annotated_images = {}
+    encoded: Dict[PreviewVariant, PreviewFrame] = {}
+    for (width, quality, annotated), wants_data_url in variants.items():
+        scaled = ctx.preview if width <= 0 else ctx.resized(width)
+        if annotated and face is not None:
+            image = annotated_images.get(width)
+            if image is None:
+                # Landmarks are normalized, so drawing at preview size is exact
+                with STAGE_SECONDS.time("annotation"):
+                    image = scaled.copy()
+                    draw_face_landmarks(image, face)
+                annotated_images[width] = image
+            scaled = image
+
+        with STAGE_SECONDS.time("encode"):
+            ok, buffer = cv2.imencode(".jpg", scaled, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            continue
+        jpeg = buffer.tobytes()
+        data_url = None
+        if wants_data_url:
+            data_url = "data:image/jpeg;base64," + base64.b64encode(jpeg).decode("utf-8")
+        encoded[(width, quality, annotated)] = PreviewFrame(
+            frame_seq, jpeg, data_url, None if annotated else landmarks
+        )
+    return encoded
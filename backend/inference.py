@@ -0,0 +1,299 @@
+"""
+Frame Analysis and Process-Isolated Inference Workers
+
+FrameAnalyzer owns one camera's analysis engines (landmarks, eye, posture,
+light, presence check) and turns a frame into a FrameAnalysis. The monitor
+runs it either on its own inference thread or, in process mode, inside an
+InferenceWorker: a child process per camera that also encodes previews, so
+MediaPipe, OpenCV drawing and JPEG encoding never contend with the FastAPI
+event loop and REST handlers for the GIL. Frames reach the worker as slot
+numbers in the camera's SharedFrameRing, and only small messages come back:
+metrics, blink rates, encoded previews and stage timings.
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+from typing import Dict, Optional
+
+from engine.eye_processor import EyeGuardianEngine
+from engine.posture_analyzer import PostureAnalyzer
+from engine.face_landmarks import FaceLandmarkStage
+from engine.presence import PresenceGate
+from engine.preview import encode_previews
+from engine.metrics import STAGE_SECONDS
+from engine.frame_ring import SharedFrameRing
+from engine.frame_context import FrameContext
+from engine.lighting import LightingAnalyzer
+
+DEFAULT_EYE_DATA: Dict = {"blinks": 0, "incomplete_blinks": 0, "redness": 0.0, "is_dry": False, "ear": 0.0}
+POSTURE_ERROR_DATA: Dict = {
+    "head_position": "Error", "overall": "Unknown",
+    "pitch": 0, "yaw": 0, "roll": 0, "posture_risk": 0,
+    "distance_cm": 50, "distance_risk": 0, "posture_score": 100,
+}
+
+# Result of analyzing one frame. `face` (FaceLandmarks) stays in the process
+# that ran the analysis; it is None in results sent back by a worker.
+FrameAnalysis = namedtuple(
+    "FrameAnalysis",
+    ["face", "face_seen", "eye_data", "blink_rates", "posture", "light", "eye_error"],
+)
+
+
+class FrameAnalyzer:
+    """All per-frame analysis for one camera, shared by thread and process mode."""
+
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        tracking: bool = True,
+        redetect_interval: int = 30,
+        redness_alpha: Optional[float] = None,
+        presence: Optional[PresenceGate] = None,
+        posture_defaults: Optional[Dict] = None,
+        light_defaults: Optional[Dict] = None,
+        preview_size=None,
+        inference_width: Optional[int] = None,
+        light_every_frame: bool = True,
+        light_stride: int = 8,
+    ):
+        self.preview_size = tuple(preview_size) if preview_size else None
+        self.inference_width = inference_width
+        self.eye_engine = EyeGuardianEngine(redness_alpha=redness_alpha)
+        self.light_analyzer = LightingAnalyzer(stride=light_stride)
+        # Sampled light analysis is cheap enough for every frame; otherwise it
+        # runs once per analysis_interval
+        self.light_every_frame = light_every_frame
+        # Only its cheap detector is used here; presence state is tracked by
+        # the monitor from FrameAnalysis.face_seen
+        self.presence = presence or PresenceGate()
+
+        # One landmark model per frame, shared by the eye and posture engines
+        try:
+            self.landmark_stage = FaceLandmarkStage(
+                model_path, tracking=tracking, redetect_interval=redetect_interval,
+            )
+        except Exception as e:
+            print(f"Warning: Could not load face landmarker, falling back to FaceMesh: {e}")
+            self.landmark_stage = FaceLandmarkStage(
+                tracking=tracking, redetect_interval=redetect_interval,
+            )
+
+        self.posture_analyzer = None
+        if self.landmark_stage.has_pose:
+            self.posture_analyzer = PostureAnalyzer()
+            print("Posture analyzer initialized successfully")
+
+        self.last_analysis_time = 0.0
+        self.last_posture_data: Dict = dict(posture_defaults or {})
+        self.last_light_data: Dict = dict(light_defaults or {})
+
+    def context(self, frame) -> FrameContext:
+        """FrameContext for `frame` with this camera's preview/inference sizes."""
+        return FrameContext(frame, self.preview_size, self.inference_width)
+
+    def analyze(self, frame, present: bool, analysis_interval: float) -> Optional[FrameAnalysis]:
+        """
+        Analyze one frame (raw BGR or a FrameContext from context()). While
+        the user is away (`present` False) only the presence check runs, and
+        None is returned unless it finds a face.
+        """
+        if not isinstance(frame, FrameContext):
+            frame = self.context(frame)
+        woke = False
+        if not present:
+            # Idle: cheap detector-only check, heavy engines suspended
+            try:
+                woke = self.presence.check(frame)
+            except Exception as e:
+                print(f"[Presence] Check error: {e}")
+            if not woke:
+                return None
+            # Back in view: run the full pipeline on this same frame
+            self.landmark_stage.reset_tracking()
+
+        try:
+            with STAGE_SECONDS.time("landmarks"):
+                face = self.landmark_stage.detect(frame)
+        except Exception as e:
+            print(f"[Landmarks] Detection error: {e}")
+            face = None
+
+        eye_error = False
+        try:
+            eye_data = self.eye_engine.process_landmarks(frame, face)
+        except Exception:
+            eye_error = True
+            eye_data = dict(DEFAULT_EYE_DATA)
+
+        if self.posture_analyzer:
+            try:
+                with STAGE_SECONDS.time("posture"):
+                    self.last_posture_data = self.posture_analyzer.analyze_landmarks(face, frame.shape)
+            except Exception:
+                self.last_posture_data = dict(POSTURE_ERROR_DATA)
+
+        now = time.time()
+        if self.light_every_frame or now - self.last_analysis_time >= analysis_interval:
+            self.last_analysis_time = now
+            try:
+                with STAGE_SECONDS.time("light"):
+                    self.last_light_data = self.light_analyzer.analyze(frame, face, now)
+            except Exception:
+                pass
+
+        return FrameAnalysis(
+            face=face,
+            face_seen=face is not None or woke,
+            eye_data=eye_data,
+            # Computed once per frame by the engine's windowed counter
+            blink_rates=self.eye_engine.blink_rates,
+            posture=self.last_posture_data,
+            light=self.last_light_data,
+            eye_error=eye_error,
+        )
+
+    def close(self):
+        self.landmark_stage.close()
+        self.presence.close()
+
+
+# -- process mode -------------------------------------------------------------
+
+def _worker_main(config: Dict, requests, results, reader: int = 0):
+    """
+    Child process loop. Requests are (seq, frame_ref, ring_descriptor,
+    present, analysis_interval, preview_variants) tuples, or None to exit;
+    frame_ref is a slot sequence number in the ring (or, after a resolution
+    change, the frame itself). Every request gets exactly one reply:
+    (seq, analysis or None, busy_seconds, previews or None, preview_seconds,
+    stage_timings, cpu_seconds), where cpu_seconds is the worker's process
+    CPU since its previous reply (charged to the camera's governor).
+    """
+    STAGE_SECONDS.start_recording()
+    analyzer = FrameAnalyzer(**config)
+    ring = None
+    results.put(("ready", os.getpid()))
+    cpu_mark = time.process_time()
+    try:
+        while True:
+            request = requests.get()
+            if request is None:
+                break
+            seq, frame_ref, descriptor, present, analysis_interval, variants = request
+            started = time.time()
+            analysis, previews, preview_seconds = None, None, 0.0
+
+            frame = frame_ref
+            if isinstance(frame_ref, int):
+                if ring is None or ring.descriptor != descriptor:
+                    if ring is not None:
+                        ring.close()
+                    ring = SharedFrameRing.attach(descriptor)
+                frame = ring.pin(reader, frame_ref)
+
+            if frame is not None:
+                try:
+                    # One context: analysis and preview share conversions
+                    frame = analyzer.context(frame)
+                    analysis = analyzer.analyze(frame, present, analysis_interval)
+                    if variants:
+                        encode_started = time.time()
+                        face = analysis.face if analysis is not None else None
+                        try:
+                            previews = encode_previews(frame, face, seq, variants)
+                        except Exception as e:
+                            print(f"Error encoding preview in worker: {e}")
+                        preview_seconds = time.time() - encode_started
+                finally:
+                    frame = None
+                    if isinstance(frame_ref, int) and not ring.unpin(reader):
+                        # Slot was rewritten underneath us; discard
+                        analysis, previews = None, None
+            busy = time.time() - started - preview_seconds
+
+            if analysis is not None:
+                # FaceLandmarks stays here; the parent only needs the numbers
+                analysis = analysis._replace(face=None)
+            cpu_now = time.process_time()
+            results.put((seq, analysis, busy, previews, preview_seconds, STAGE_SECONDS.drain(), cpu_now - cpu_mark))
+            cpu_mark = cpu_now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        analyzer.close()
+        if ring is not None:
+            ring.close()
+
+
+class InferenceWorker:
+    """
+    Parent-side handle for one camera's analysis process.
+
+    At most `max_inflight` frames are outstanding at once: submit() gives up
+    (or, with block=True, waits) while the worker is that far behind, so
+    frames are dropped in the API process instead of piling up in the pipe.
+    """
+
+    def __init__(self, config: Dict, max_inflight: int = 1):
+        # spawn: a fork of the threaded API process could inherit held locks
+        ctx = mp.get_context("spawn")
+        self._requests = ctx.Queue()
+        self._results = ctx.Queue()
+        self._slots = threading.Semaphore(max_inflight)
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self.process = ctx.Process(
+            target=_worker_main, args=(config, self._requests, self._results),
+            name="eg-inference-worker", daemon=True,
+        )
+        self.process.start()
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    @property
+    def pending(self) -> int:
+        """Frames submitted but not yet answered."""
+        return self._pending
+
+    def submit(self, seq, frame_ref, ring_descriptor, present, analysis_interval, variants=None,
+               block=False, timeout=None) -> bool:
+        """Send one frame reference for analysis; False if the worker is still busy."""
+        if not self._slots.acquire(blocking=block, timeout=timeout if block else None):
+            return False
+        with self._pending_lock:
+            self._pending += 1
+        self._requests.put((seq, frame_ref, ring_descriptor, present, analysis_interval, variants))
+        return True
+
+    def result(self, timeout: float):
+        """Next reply from the worker (see _worker_main), or None on timeout."""
+        try:
+            message = self._results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if message[0] == "ready":
+            return None
+        with self._pending_lock:
+            self._pending -= 1
+        self._slots.release()
+        return message
+
+    def close(self, timeout: float = 5.0):
+        if self.process.is_alive():
+            try:
+                self._requests.put(None)
+            except Exception:
+                pass
+            self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(1.0)
+        self._requests.close()
+        self._results.close()
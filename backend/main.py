@@ -1,19 +1,15 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 import asyncio
 import json
-import threading
+import struct
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 import random
-import base64
-import time
 import os
-import sys
-from typing import Dict
 from datetime import date
 
 try:
@@ -21,270 +17,30 @@ try:
 except ImportError:
     cv2 = None
 
-from engine.eye_processor import EyeGuardianEngine
-from engine.posture_analyzer import PostureAnalyzer
-
-# Import light modules from the light/ directory without modifying originals
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-PROJECT_DIR = os.path.dirname(BASE_DIR)
-sys.path.insert(0, os.path.join(PROJECT_DIR, "light"))
-
-from ambient_light import AmbientLightAnalyzer
-from risk_fusion import RiskFusionEngine
+from monitor import (
+    MonitorRegistry,
+    MonitorUnavailable,
+    BASE_DIR,
+    POSTURE_MODEL_PATH,
+    PREVIEW_ENCODE_FPS_DEFAULT,
+    PREVIEW_JPEG_QUALITY,
+)
 from database import EyeGuardianDB
 from engine.ai_insights_manager import AIInsightsManager
+from engine.metrics import METRICS
+from engine.face_landmarks import landmark_topology
 
-POSTURE_MODEL_PATH = os.path.join(PROJECT_DIR, "posture", "face_landmarker.task")
-
-# How often (seconds) to persist a snapshot row – keeps DB lean
-SNAPSHOT_INTERVAL = 30
-
-# --- Performance knobs ---
-# Keep preview smooth, but throttle heavy analysis
-ANALYSIS_INTERVAL_SEC = 5.0  # posture/light/distance cadence
-# How often to encode a new preview image (UI will keep showing last frame between encodes)
-PREVIEW_ENCODE_FPS_DEFAULT = 10.0
-# Reduce preview clarity to cut CPU/network/memory
-PREVIEW_JPEG_QUALITY = 55
-PREVIEW_WIDTH = 640
-PREVIEW_HEIGHT = 360
-
-# Target FPS for the camera read loop (caps CPU usage)
-TARGET_FPS = 30.0
-# How many consecutive frame-read failures before giving up
-MAX_CONSECUTIVE_FAILURES = 30
-
-# ---------------------------------------------------------------------------
-# Shared Background Camera Monitor – manages camera and ML engines in one thread
-# to prevent event loop blocking and duplicate model initialization
-# ---------------------------------------------------------------------------
-
-class GlobalCameraMonitor:
-    def __init__(self):
-        self.lock = threading.Lock()
-        self.refcount = 0
-        self.thread = None
-        self.running = False
-        self.latest_payload = None
-        self.session_id = None
-        self.user_email = None
-        self.error_state = None
-
-    def start(self, db, user_email: str = None):
-        with self.lock:
-            self.refcount += 1
-            if self.refcount == 1:
-                self.running = True
-                self.error_state = None
-                self.latest_payload = None
-                self.user_email = user_email
-                self.session_id = db.start_session(user_email)
-                self.thread = threading.Thread(target=self._run_loop, args=(db,), daemon=True)
-                self.thread.start()
-            return self.session_id
-
-    def stop(self, db):
-        with self.lock:
-            self.refcount -= 1
-            if self.refcount <= 0:
-                self.running = False
-                self.refcount = 0
-                if self.session_id:
-                    try:
-                        db.end_session(self.session_id)
-                    except Exception as e:
-                        print(f"Error ending session: {e}")
-                    self.session_id = None
-
-    def get_latest(self):
-        return self.latest_payload, self.error_state
-
-    def _run_loop(self, db):
-        cap = cv2.VideoCapture(0)
-        # Use default camera resolution
-
-        if not cap.isOpened():
-            self.error_state = "Could not open camera"
-            self.running = False
-            return
-
-        eye_engine = EyeGuardianEngine()
-        light_analyzer = AmbientLightAnalyzer()
-        risk_engine = RiskFusionEngine()
-
-        posture_analyzer = None
-        if os.path.exists(POSTURE_MODEL_PATH):
-            try:
-                posture_analyzer = PostureAnalyzer(POSTURE_MODEL_PATH)
-                print("Posture analyzer initialized successfully")
-            except Exception as e:
-                print(f"Warning: Could not initialize posture analyzer: {e}")
-
-        last_analysis_time = 0.0
-        last_preview_time = 0.0
-        last_snapshot_time = 0.0
-        last_camera_frame_str = None
-        consecutive_read_failures = 0
-
-        last_posture_data: Dict = {
-            "head_position": "N/A", "overall": "N/A",
-            "pitch": 0, "yaw": 0, "roll": 0,
-            "posture_risk": 0, "distance_cm": 50,
-            "distance_risk": 0, "posture_score": 100,
-        }
-        last_light_data: Dict = {"brightness": 0, "level": "Unknown", "risk": 0}
-
-        try:
-            while self.running:
-                loop_start = time.time()
-
-                ret, frame = cap.read()
-                if not ret:
-                    consecutive_read_failures += 1
-                    if consecutive_read_failures > MAX_CONSECUTIVE_FAILURES:
-                        self.error_state = "Camera lost after repeated failures"
-                        break
-                    time.sleep(0.033)
-                    continue
-                consecutive_read_failures = 0
-
-                frame = cv2.flip(frame, 1)
-
-                try:
-                    eye_data, annotated_frame = eye_engine.process_frame(frame, return_annotated=True)
-                except Exception as e:
-                    eye_data = {"blinks": 0, "incomplete_blinks": 0, "redness": 0.0, "is_dry": False, "ear": 0.0}
-                    annotated_frame = frame
-
-                now = time.time()
-
-                if now - last_analysis_time >= ANALYSIS_INTERVAL_SEC:
-                    last_analysis_time = now
-                    if posture_analyzer:
-                        try:
-                            last_posture_data = posture_analyzer.analyze(frame)
-                        except Exception as e:
-                            last_posture_data = {
-                                "head_position": "Error", "overall": "Unknown",
-                                "pitch": 0, "yaw": 0, "roll": 0, "posture_risk": 0,
-                                "distance_cm": 50, "distance_risk": 0, "posture_score": 100,
-                            }
-                    try:
-                        last_light_data = light_analyzer.analyze(frame)
-                    except Exception:
-                        pass
-
-                recent_blinks = sum(1 for t in eye_engine.blink_timestamps if now - t <= 60)
-                redness = eye_data.get("redness", 0.0)
-                redness_level = "High" if redness > 0.8 else ("Elevated" if redness > 0.6 else "Normal")
-
-                blink_risk = 2 if recent_blinks < 10 else (1 if recent_blinks < 15 else 0)
-                redness_risk = 2 if redness > 0.8 else (1 if redness > 0.6 else 0)
-
-                risks = {
-                    "blink": blink_risk,
-                    "redness": redness_risk,
-                    "posture": last_posture_data["posture_risk"] * 2,
-                    "distance": last_posture_data["distance_risk"] * 2,
-                    "lighting": last_light_data["risk"],
-                }
-                fusion = risk_engine.compute(risks)
-                strain_index = min(100, int(fusion["risk_score"] / 2.0 * 100))
-
-                # Always encode frame at 10 fps for the shared UI state
-                if now - last_preview_time >= (1.0 / 10.0):
-                    last_preview_time = now
-                    _, buffer = cv2.imencode(".jpg", annotated_frame, [cv2.IMWRITE_JPEG_QUALITY, PREVIEW_JPEG_QUALITY])
-                    frame_b64 = base64.b64encode(buffer).decode("utf-8")
-                    last_camera_frame_str = f"data:image/jpeg;base64,{frame_b64}"
-
-                payload = {
-                    "blink_rate": recent_blinks,
-                    "distance_cm": last_posture_data["distance_cm"],
-                    "posture_score": last_posture_data["posture_score"],
-                    "ambient_light": round(last_light_data["brightness"]),
-                    "overall_strain_index": strain_index,
-                    "redness": round(redness, 2),
-                    "camera_frame": last_camera_frame_str,
-                    "details": {
-                        "blink": {
-                            "ear": round(eye_data.get("ear", 0), 3),
-                            "total_blinks": eye_data.get("blinks", 0),
-                            "incomplete_blinks": eye_data.get("incomplete_blinks", 0),
-                            "is_dry": eye_data.get("is_dry", False),
-                        },
-                        "distance": {
-                            "value_cm": last_posture_data["distance_cm"],
-                            "risk_score": last_posture_data["distance_risk"],
-                            "status": "Too Close" if last_posture_data["distance_risk"] >= 1.0 else ("Too Far" if last_posture_data["distance_risk"] > 0 else "Safe"),
-                        },
-                        "light": {
-                            "brightness": last_light_data["brightness"],
-                            "level": last_light_data["level"],
-                            "risk": last_light_data["risk"],
-                        },
-                        "posture": {
-                            "head_position": last_posture_data["head_position"],
-                            "overall": last_posture_data["overall"],
-                            "pitch": last_posture_data["pitch"],
-                            "yaw": last_posture_data["yaw"],
-                            "roll": last_posture_data["roll"],
-                            "risk": last_posture_data["posture_risk"],
-                        },
-                        "redness": {
-                            "score": round(redness, 2),
-                            "level": redness_level,
-                        },
-                        "risk_fusion": {
-                            "score": fusion["risk_score"],
-                            "level": fusion["risk_level"],
-                        },
-                    },
-                }
-
-                self.latest_payload = payload
-
-                now_db = time.time()
-                if now_db - last_snapshot_time >= SNAPSHOT_INTERVAL and self.session_id:
-                    last_snapshot_time = now_db
-                    try:
-                        snap_payload = {k: v for k, v in payload.items() if k != "camera_frame"}
-                        db.insert_snapshot(self.session_id, snap_payload, self.user_email)
-
-                        if strain_index >= 70:
-                            db.insert_alert(self.session_id, "high_strain", "danger", f"Strain index critically high: {strain_index}%", self.user_email)
-                        elif strain_index >= 50:
-                            db.insert_alert(self.session_id, "elevated_strain", "warning", f"Strain index elevated: {strain_index}%", self.user_email)
-
-                        if eye_data.get("is_dry", False):
-                            db.insert_alert(self.session_id, "dry_eyes", "warning", f"Low blink rate ({recent_blinks}/min) – eyes may be dry", self.user_email)
-
-                        if last_posture_data["posture_risk"] >= 1.0:
-                            db.insert_alert(self.session_id, "bad_posture", "danger", f"Poor posture detected: {last_posture_data['head_position']}", self.user_email)
-                        elif last_posture_data["posture_risk"] >= 0.5:
-                            db.insert_alert(self.session_id, "bad_posture", "warning", f"Posture needs attention: {last_posture_data['head_position']}", self.user_email)
-
-                        if last_posture_data["distance_risk"] >= 1.0:
-                            db.insert_alert(self.session_id, "too_close", "warning", f"Too close to screen: {last_posture_data['distance_cm']} cm", self.user_email)
-
-                        if last_light_data["risk"] >= 2:
-                            db.insert_alert(self.session_id, "bad_lighting", "warning", f"Lighting is {last_light_data['level']} (brightness {last_light_data['brightness']:.0f})", self.user_email)
-                    except Exception as db_err:
-                        print(f"[DB] Error saving snapshot/alert: {db_err}")
-
-                elapsed = time.time() - loop_start
-                sleep_time = max(0.001, (1.0 / TARGET_FPS) - elapsed)
-                time.sleep(sleep_time)
 
-        except Exception as e:
-            print(f"Error in background camera loop: {e}")
-        finally:
-            if cap:
-                cap.release()
-            self.running = False
+# One camera monitor per device, handed out per websocket subscriber
+camera_monitors = MonitorRegistry()
 
-
-camera_monitor = GlobalCameraMonitor()
+# Binary-mode preview frames: 8-byte big-endian frame sequence number, then JPEG bytes
+FRAME_HEADER = struct.Struct(">Q")
+# overlay=client binary frames: frame_seq, kind, landmark count (0 for JPEG).
+# 12 bytes, so the uint16 landmark array that follows is 2-byte aligned.
+OVERLAY_HEADER = struct.Struct(">QHH")
+OVERLAY_KIND_JPEG = 0
+OVERLAY_KIND_LANDMARKS = 1
 
 app = FastAPI()
     
@@ -297,6 +53,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 db = EyeGuardianDB()          # single DB instance shared across requests
+METRICS.gauge(
+    "eyeguardian_db_write_queue_depth", "Snapshot/alert rows queued but not yet committed.",
+    lambda: db.pending_writes,
+)
 insights_manager = AIInsightsManager(
     api_key=os.environ.get("GROQ_API_KEY"),
     cache_path=os.path.join(BASE_DIR, "ai_insights_cache.json"),
@@ -313,7 +73,7 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    db.close()
+    db.close()  # flushes queued snapshots/alerts first
     print("Database connection closed")
 
 @app.websocket("/ws/health-stream")
@@ -326,43 +86,129 @@ async def health_stream_endpoint(websocket: WebSocket):
         return
 
     include_frame = websocket.query_params.get("include_frame", "1") != "0"
+    # mode=binary: raw JPEG previews in binary frames + metrics as JSON text
+    # frames; default "json" keeps the base64 data URL inside the payload
+    binary_mode = websocket.query_params.get("mode", "json") == "binary"
+    # overlay=client: unannotated frames + quantized landmarks; the UI draws
+    # the mesh from /api/landmark-topology. Always uses binary framing.
+    client_overlay = websocket.query_params.get("overlay", "server") == "client"
+    binary_mode = binary_mode or client_overlay
     try:
         send_fps = float(websocket.query_params.get("send_fps", str(PREVIEW_ENCODE_FPS_DEFAULT)))
     except Exception:
         send_fps = PREVIEW_ENCODE_FPS_DEFAULT
     send_fps = max(0.5, min(30.0, send_fps))
+    # Optional preview size/quality; clients asking for the same pair share one encode
+    try:
+        frame_width = int(websocket.query_params.get("frame_width", "0"))
+        frame_quality = int(websocket.query_params.get("frame_quality", str(PREVIEW_JPEG_QUALITY)))
+    except Exception:
+        frame_width, frame_quality = 0, PREVIEW_JPEG_QUALITY
     
     # Extract user email from query parameters
     user_email = websocket.query_params.get("user")
+    # Camera index (or a spec from EYEGUARDIAN_ALLOWED_DEVICES); defaults to
+    # EYEGUARDIAN_FRAME_SOURCE. Anything else is refused by the registry.
+    device = websocket.query_params.get("device")
 
-    camera_monitor.start(db, user_email)
+    try:
+        # Starting a session waits on the DB writer (e.g. during a summary
+        # rebuild); keep that off the event loop
+        camera_monitor = await asyncio.to_thread(camera_monitors.acquire, db, device, user_email)
+    except MonitorUnavailable as e:
+        await websocket.send_json({"error": str(e)})
+        await websocket.close()
+        return
+    broadcaster = camera_monitor.broadcaster
+    broadcaster.add_subscriber()
+    preview_token, preview_variant = None, None
+    if include_frame:
+        preview_token, preview_variant = camera_monitor.preview_demand.add(
+            send_fps, frame_width, frame_quality, data_url=not binary_mode, annotate=not client_overlay
+        )
 
     try:
+        if client_overlay:
+            await websocket.send_json({
+                "type": "hello",
+                "mode": "binary",
+                "overlay": "client",
+                "frame_header": "uint64 frame_seq, uint16 kind, uint16 landmark_count (big-endian)",
+                "frame_kinds": {"jpeg": OVERLAY_KIND_JPEG, "landmarks": OVERLAY_KIND_LANDMARKS},
+                "frame_format": "jpeg",
+                "landmark_format": "uint16 little-endian x,y pairs / 65535",
+                "topology_url": "/api/landmark-topology",
+            })
+        elif binary_mode:
+            await websocket.send_json({
+                "type": "hello",
+                "mode": "binary",
+                "frame_header": "uint64 big-endian frame_seq",
+                "frame_format": "jpeg",
+            })
+
+        loop = asyncio.get_running_loop()
+        min_interval = 1.0 / send_fps
         last_sent_time = 0.0
+        last_version = 0
+        last_frame_seq = None
         while True:
-            # Check latest payload
-            payload, error = camera_monitor.get_latest()
-            
+            # Sleep until the monitor publishes a newer version (no polling)
+            version, payload, error = await broadcaster.wait_for_update(last_version, timeout=1.0)
+
             if error:
                 await websocket.send_json({"error": error})
                 break
-                
-            now = time.time()
-            if payload and (now - last_sent_time) >= (1.0 / send_fps):
-                last_sent_time = now
-                if not include_frame:
-                    payload = payload.copy()
-                    payload["camera_frame"] = None
-                await websocket.send_json(payload)
-                
-            await asyncio.sleep(0.05)
+            if payload is None:
+                continue
+
+            # Respect this subscriber's send_fps budget, then send the
+            # freshest version available at that point
+            wait = last_sent_time + min_interval - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                version, payload, error = broadcaster.latest()
+                if error:
+                    await websocket.send_json({"error": error})
+                    break
+                if payload is None:
+                    continue
+
+            last_sent_time = loop.time()
+            last_version = version
+            preview = camera_monitor.get_preview(preview_variant) if include_frame else None
+            if binary_mode:
+                if preview is not None and preview.frame_seq != last_frame_seq:
+                    last_frame_seq = preview.frame_seq
+                    if client_overlay:
+                        await websocket.send_bytes(
+                            OVERLAY_HEADER.pack(preview.frame_seq, OVERLAY_KIND_JPEG, 0) + preview.jpeg
+                        )
+                        count = len(preview.landmarks) // 4
+                        await websocket.send_bytes(
+                            OVERLAY_HEADER.pack(preview.frame_seq, OVERLAY_KIND_LANDMARKS, count) + preview.landmarks
+                        )
+                    else:
+                        await websocket.send_bytes(FRAME_HEADER.pack(preview.frame_seq) + preview.jpeg)
+                await websocket.send_text(broadcaster.serialized(version, payload))
+            elif preview is not None:
+                await websocket.send_text(broadcaster.serialized(
+                    version, payload, preview.data_url, (preview_variant, preview.frame_seq)
+                ))
+            else:
+                await websocket.send_text(broadcaster.serialized(version, payload))
 
     except WebSocketDisconnect:
         print("Client disconnected from health stream")
     except Exception as e:
         print(f"Error in subscriber stream: {e}")
     finally:
-        camera_monitor.stop(db)
+        if preview_token is not None:
+            camera_monitor.preview_demand.remove(preview_token)
+        broadcaster.remove_subscriber()
+        # Stopping the last subscriber's monitor waits for persistence to
+        # drain; keep that off the event loop
+        await asyncio.to_thread(camera_monitors.release, db, camera_monitor)
 
 
 # Keep /ws for backward compatibility (mock data matching new structure)
@@ -434,6 +280,25 @@ async def websocket_endpoint(websocket: WebSocket):
 # REST API – query stored data (for charts, AI analysis, etc.)
 # ---------------------------------------------------------------------------
 
+@app.get("/api/pipeline-stats")
+def api_pipeline_stats():
+    """Return per-stage throughput and governor state for every running camera."""
+    return dict(camera_monitors.get_pipeline_stats(), db_writes=db.get_write_stats(),
+                db_connections=db.get_connection_stats())
+
+
+@app.get("/api/landmark-topology")
+def api_landmark_topology():
+    """Mesh connections for client-side landmark overlays (static; fetch once)."""
+    return landmark_topology()
+
+
+@app.get("/api/metrics")
+def api_metrics():
+    """Per-stage timing histograms and pipeline counters in Prometheus text format."""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/api/sessions")
 def api_sessions(limit: int = 20):
     """Return recent monitoring sessions."""
@@ -453,15 +318,21 @@ def api_session_alerts(session_id: int, limit: int = 100):
 
 
 @app.get("/api/snapshots")
-def api_snapshots(limit: int = 500):
-    """Return recent snapshots across all sessions."""
-    return db.get_snapshots(limit=limit)
+def api_snapshots(limit: int = 500, user: str = None, start: str = None, end: str = None):
+    """Return recent snapshots across all sessions, optionally for one user and/or a YYYY-MM-DD range."""
+    try:
+        return db.get_snapshots(limit=limit, user_email=user, start=start, end=end)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"detail": str(e)})
 
 
 @app.get("/api/alerts")
-def api_alerts(limit: int = 100):
-    """Return recent alerts across all sessions."""
-    return db.get_alerts(limit=limit)
+def api_alerts(limit: int = 100, user: str = None, start: str = None, end: str = None):
+    """Return recent alerts across all sessions, optionally for one user and/or a YYYY-MM-DD range."""
+    try:
+        return db.get_alerts(limit=limit, user_email=user, start=start, end=end)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"detail": str(e)})
 
 
 @app.get("/api/daily-summaries")
@@ -508,6 +379,14 @@ def api_monthly_summary(year: int, month: int):
         return JSONResponse(status_code=404, content={"detail": "No data for this month"})
     return summary
 
+@app.post("/api/summaries/rebuild")
+def api_rebuild_summaries(prune: bool = False):
+    """Recompute all daily/weekly/monthly summaries from history (see rebuild_summaries.py)."""
+    def progress(step, done, total):
+        print(f"[DB] Rebuilding summaries [{done}/{total}] {step}")
+
+    return db.rebuild_all_summaries(prune=prune, progress=progress)
+
 @app.get("/api/insights-data")
 def api_insights_data(user: str = None):
     """Return the aggregated weekly/monthly stats used by AI insights."""
@@ -0,0 +1,951 @@
+"""
+Shared Background Camera Monitor
+
+Manages the camera and ML engines in background threads to prevent event loop
+blocking and duplicate model initialization. The work is split into pipelined
+stages connected by bounded drop-oldest queues:
+
+    capture ──► inference ──► preview-encode
+                    │
+                    └───────► persistence (SQLite)
+
+so a slow consumer (a DB commit, a JPEG encode) can never stall cap.read().
+With EYEGUARDIAN_INFERENCE_MODE=process, inference and preview encoding run in
+a worker process per camera instead (see inference.py), and this process only
+captures, publishes and persists.
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from typing import Dict, List
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+from engine.pipeline import DropOldestQueue, StageStats
+from engine.broadcaster import PayloadBroadcaster
+from engine.preview import PreviewDemand, encode_previews
+from engine.governor import FrameRateGovernor, ThreadCpuMeter
+from engine.presence import PresenceGate
+from engine.frame_source import open_frame_source
+from engine.frame_ring import SharedFrameRing
+from engine.frame_context import FrameContext
+from engine.metrics import METRICS, READ_FAILURES, STAGE_SECONDS
+from inference import FrameAnalyzer, InferenceWorker
+
+# Import light modules from the light/ directory without modifying originals
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BASE_DIR)
+sys.path.insert(0, os.path.join(PROJECT_DIR, "light"))
+
+from risk_fusion import RiskFusionEngine
+
+POSTURE_MODEL_PATH = os.path.join(PROJECT_DIR, "posture", "face_landmarker.task")
+
+# Where frames come from: camera index ("0"), video file, image directory or
+# "synthetic[:WxH]" (see engine/frame_source.py). Non-camera sources replay in
+# real time unless EYEGUARDIAN_FRAME_SOURCE_REALTIME=0.
+FRAME_SOURCE = os.environ.get("EYEGUARDIAN_FRAME_SOURCE", "0")
+FRAME_SOURCE_REALTIME = os.environ.get("EYEGUARDIAN_FRAME_SOURCE_REALTIME", "1") != "0"
+# Most cameras monitored at once; each runs its own set of pipeline threads
+# and engines, so CPU grows by one pipeline per camera up to this bound
+MAX_CAMERAS = int(os.environ.get("EYEGUARDIAN_MAX_CAMERAS", "2"))
+# Devices a /ws/health-stream client may ask for besides plain camera indices
+# (comma-separated source specs). File, directory and synthetic sources are
+# otherwise only reachable from server config (FRAME_SOURCE) and the CLI.
+ALLOWED_DEVICES = frozenset(
+    spec.strip() for spec in os.environ.get("EYEGUARDIAN_ALLOWED_DEVICES", "").split(",") if spec.strip()
+)
+# "thread": analysis runs on an inference thread in the API process.
+# "process": each camera's analysis and preview encoding run in their own
+# worker process (see inference.py), off the API process's GIL.
+INFERENCE_MODE = os.environ.get("EYEGUARDIAN_INFERENCE_MODE", "thread")
+# Frames a worker process may have outstanding before capture drops frames
+WORKER_MAX_INFLIGHT = 1
+
+# How often (seconds) to persist a snapshot row – keeps DB lean
+SNAPSHOT_INTERVAL = 30
+
+# --- Performance knobs ---
+# Keep preview smooth, but throttle heavy analysis. Posture/distance reuse the
+# shared per-frame landmarks, so only lighting can be throttled. This is the
+# base cadence; the governor stretches it while over budget.
+ANALYSIS_INTERVAL_SEC = 5.0  # light cadence when LIGHT_EVERY_FRAME is off
+# Light analysis reads a strided luminance sample (every Nth pixel in both
+# axes), cheap enough to run per frame and catch rapid lighting changes
+LIGHT_EVERY_FRAME = True
+LIGHT_SAMPLE_STRIDE = 8
+# Default preview rate for a subscriber that doesn't ask for one. The preview
+# stage only runs while someone wants frames, at the highest requested rate.
+PREVIEW_ENCODE_FPS_DEFAULT = 10.0
+# Reduce preview clarity to cut CPU/network/memory
+PREVIEW_JPEG_QUALITY = 55
+# Default preview box; frames are downscaled to fit before annotation/encode
+PREVIEW_WIDTH = 640
+PREVIEW_HEIGHT = 360
+# Full-frame landmark detection input width (the model itself runs at
+# 192-256 px, so converting a full-res frame to RGB for it is wasted work)
+INFERENCE_WIDTH = 640
+
+# Run landmark inference on a tracked face ROI instead of the full frame;
+# full-frame detection only on loss or every LANDMARK_REDETECT_INTERVAL frames.
+# Off by default: the model then runs per image (IMAGE mode / static FaceMesh),
+# re-running its face detector on every crop, which can cost more than the
+# smaller input saves. VIDEO mode tracks the face itself. Measure with
+# benchmark.py before enabling.
+LANDMARK_TRACKING = False
+LANDMARK_REDETECT_INTERVAL = 30
+
+# Frame-rate governor: capture/inference run at TARGET_FPS around blinks,
+# STABLE_FPS while the eyes are steadily open, and never below MIN_FPS.
+TARGET_FPS = 30.0
+STABLE_FPS = 15.0
+MIN_FPS = 5.0
+# Fraction of one core each camera's stages (or its worker) may use before its
+# governor backs off
+CPU_BUDGET = 0.5
+# Fraction of each frame interval inference may be busy
+FRAME_BUDGET = 0.6
+# Presence gate: after ABSENCE_TIMEOUT_SEC without a face, suspend the heavy
+# engines and only run a downscaled face-detector check at IDLE_FPS
+ABSENCE_TIMEOUT_SEC = 10.0
+IDLE_FPS = 2.0
+
+# EWMA weight for new eye-redness samples (None for raw per-frame values)
+REDNESS_EWMA_ALPHA = 0.2
+
+# How many consecutive frame-read failures before giving up
+MAX_CONSECUTIVE_FAILURES = 30
+
+# Queue depths between stages. Inference/preview only ever want the freshest
+# frame; persistence keeps a few jobs so a slow commit doesn't lose snapshots.
+INFERENCE_QUEUE_SIZE = 1
+PREVIEW_QUEUE_SIZE = 1
+PERSIST_QUEUE_SIZE = 8
+# How long an idle stage waits on its queue before re-checking if it was closed
+QUEUE_POLL_SEC = 0.2
+# How long stop() waits for queued snapshots to be persisted before it closes
+# the session
+PERSIST_DRAIN_TIMEOUT_SEC = 5.0
+# Busy-time samples kept per stage for latency percentiles
+STAGE_LATENCY_SAMPLES = 2048
+# Shared-memory frame slots between capture and its consumers: one being
+# written, one per reader cursor and a spare. Frames travel as slot sequence
+# numbers, so frame memory stays at FRAME_RING_SLOTS frames per camera.
+FRAME_RING_SLOTS = 4
+# Reader cursors into the ring (a worker process uses the inference cursor)
+RING_READER_INFERENCE = 0
+RING_READER_PREVIEW = 1
+
+DEFAULT_POSTURE_DATA: Dict = {
+    "head_position": "N/A", "overall": "N/A",
+    "pitch": 0, "yaw": 0, "roll": 0,
+    "posture_risk": 0, "distance_cm": 50,
+    "distance_risk": 0, "posture_score": 100,
+}
+DEFAULT_LIGHT_DATA: Dict = {"brightness": 0, "level": "Unknown", "risk": 0}
+
+
+class MonitorUnavailable(Exception):
+    """A camera monitor can't be handed out (device busy or camera limit reached)."""
+
+
+class GlobalCameraMonitor:
+    def __init__(self, source_factory=None, device: str = FRAME_SOURCE):
+        # Frame source spec this monitor owns (see open_frame_source)
+        self.device = device
+        # Callable returning a FrameSource; defaults to `device`
+        self.source_factory = source_factory or (
+            lambda: open_frame_source(device, realtime=FRAME_SOURCE_REALTIME)
+        )
+        self.lock = threading.Lock()
+        self.refcount = 0
+        self.threads: List[threading.Thread] = []
+        self.running = False
+        self.latest_payload = None
+        # Preview variants subscribers currently want, and the newest encodes
+        self.preview_demand = PreviewDemand()
+        self.latest_previews = {}
+        self.latest_preview_seq = None
+        self.session_id = None
+        self.user_email = None
+        self.error_state = None
+        # Versioned hand-off to the websocket subscribers
+        self.broadcaster = PayloadBroadcaster()
+        self._seq = 0
+        self.inference_mode = INFERENCE_MODE
+        self._risk_engine = RiskFusionEngine()
+        self._last_snapshot_time = 0.0
+
+        # None keeps every sample (whole-run percentiles for benchmarks)
+        self.stage_latency_samples = STAGE_LATENCY_SAMPLES
+        self.stats = {
+            name: StageStats(name, samples=self.stage_latency_samples)
+            for name in ("capture", "inference", "preview", "persistence")
+        }
+        self.inference_queue = None
+        self.preview_queue = None
+        self.persist_queue = None
+        self._stop_event = threading.Event()
+        self.governor = self._make_governor()
+        self.presence = PresenceGate(ABSENCE_TIMEOUT_SEC, IDLE_FPS)
+
+    def start(self, db, user_email: str = None):
+        with self.lock:
+            self.refcount += 1
+            if self.refcount == 1:
+                try:
+                    self._start_run(db, user_email)
+                except Exception:
+                    # Leave the monitor idle, as if this start never happened
+                    self.refcount -= 1
+                    self.running = False
+                    self._stop_event.set()
+                    if self.session_id:
+                        try:
+                            db.end_session(self.session_id)
+                        except Exception as e:
+                            print(f"Error ending session: {e}")
+                        self.session_id = None
+                    raise
+            return self.session_id
+
+    def _start_run(self, db, user_email):
+        self.running = True
+        self.error_state = None
+        self.latest_payload = None
+        self.latest_previews = {}
+        self.latest_preview_seq = None
+        self.broadcaster.reset()
+        self.user_email = user_email
+        self.session_id = db.start_session(user_email)
+
+        self.stats = {name: StageStats(name, samples=self.stage_latency_samples) for name in self.stats}
+        self.governor = self._make_governor()
+        self.presence = PresenceGate(ABSENCE_TIMEOUT_SEC, IDLE_FPS)
+        self.inference_queue = DropOldestQueue(INFERENCE_QUEUE_SIZE, self.stats["inference"])
+        self.preview_queue = DropOldestQueue(PREVIEW_QUEUE_SIZE, self.stats["preview"])
+        self.persist_queue = DropOldestQueue(PERSIST_QUEUE_SIZE, self.stats["persistence"])
+        self._last_snapshot_time = 0.0
+        # Fresh event per run so threads of a previous run that are still
+        # winding down can never pick up the new run's state
+        self._stop_event = threading.Event()
+
+        if self.inference_mode == "process":
+            self.threads = self._process_mode_threads(db)
+        else:
+            self.threads = self._thread_mode_threads(db)
+        for t in self.threads:
+            t.start()
+
+    def _thread_mode_threads(self, db) -> List[threading.Thread]:
+        stop = self._stop_event
+        inference_q, preview_q, persist_q = self.inference_queue, self.preview_queue, self.persist_queue
+        # Shared by capture, inference and preview
+        ring = SharedFrameRing(FRAME_RING_SLOTS, readers=2, refs=3)
+
+        def handoff(frame_ref, block):
+            inference_q.put((time.time(), frame_ref), block=block)
+
+        def finished():
+            # Inference drains whatever is left, then closes the preview and
+            # persistence queues behind its last outputs
+            inference_q.close()
+
+        return [
+            threading.Thread(target=self._capture_loop, args=(stop, ring, handoff, finished), name="eg-capture", daemon=True),
+            threading.Thread(target=self._inference_loop, args=(ring, inference_q, preview_q, persist_q), name="eg-inference", daemon=True),
+            threading.Thread(target=self._preview_loop, args=(ring, preview_q), name="eg-preview", daemon=True),
+            threading.Thread(target=self._persist_loop, args=(db, persist_q), name="eg-persist", daemon=True),
+        ]
+
+    def _process_mode_threads(self, db) -> List[threading.Thread]:
+        stop = self._stop_event
+        persist_q = self.persist_queue
+        worker = InferenceWorker(self._analyzer_config(), max_inflight=WORKER_MAX_INFLIGHT)
+        capture_done = threading.Event()
+        inference_stats = self.stats["inference"]
+        last_preview = [0.0]
+        # Written by capture, read by the worker; the result loop frees it
+        # once the worker is gone
+        ring = SharedFrameRing(FRAME_RING_SLOTS, readers=2, refs=2)
+
+        def handoff(frame_ref, block):
+            # Previews are encoded in the worker too, at the highest rate
+            # any subscriber asked for
+            variants = None
+            max_fps, wanted = self.preview_demand.snapshot()
+            now = time.time()
+            if wanted and now - last_preview[0] >= 1.0 / max(max_fps, 0.5):
+                variants = wanted
+            self._seq += 1
+            while True:
+                if worker.submit(self._seq, frame_ref, ring.descriptor, self.presence.present,
+                                 self.governor.analysis_interval, variants, block=block, timeout=QUEUE_POLL_SEC):
+                    if variants:
+                        last_preview[0] = now
+                    return
+                if not block or stop.is_set() or not worker.alive:
+                    inference_stats.record_drop()
+                    return
+
+        return [
+            threading.Thread(target=self._capture_loop, args=(stop, ring, handoff, capture_done.set), name="eg-capture", daemon=True),
+            threading.Thread(target=self._worker_result_loop, args=(stop, ring, worker, capture_done, persist_q), name="eg-inference-results", daemon=True),
+            threading.Thread(target=self._persist_loop, args=(db, persist_q), name="eg-persist", daemon=True),
+        ]
+
+    def stop(self, db):
+        """Drop one reference; the last one stops the run and closes its session."""
+        run = self.detach()
+        if run is not None:
+            self.wind_down(db, *run)
+
+    def detach(self):
+        """
+        Drop one reference without blocking. The last one signals the run's
+        threads to stop and returns (threads, session_id) for wind_down();
+        otherwise returns None.
+        """
+        with self.lock:
+            self.refcount -= 1
+            if self.refcount > 0:
+                return None
+            self.running = False
+            self._stop_event.set()
+            self.refcount = 0
+            session_id, self.session_id = self.session_id, None
+            return list(self.threads), session_id
+
+    def wind_down(self, db, threads, session_id):
+        """
+        Wait for a detached run's persistence to drain its queue, so the
+        session's last snapshots/alerts land before its summaries are
+        computed, then close the session (end_session() also flushes the
+        DB's write-behind queue). Blocks for up to PERSIST_DRAIN_TIMEOUT_SEC.
+        """
+        for t in threads:
+            if t.name == "eg-persist" and t is not threading.current_thread():
+                t.join(PERSIST_DRAIN_TIMEOUT_SEC)
+                if t.is_alive():
+                    print("Warning: persistence did not drain before the session closed")
+        if session_id:
+            try:
+                db.end_session(session_id)
+            except Exception as e:
+                print(f"Error ending session: {e}")
+
+    def get_latest(self):
+        return self.latest_payload, self.error_state
+
+    def get_preview(self, variant):
+        """Newest PreviewFrame for `variant` (from PreviewDemand.add), or None."""
+        return self.latest_previews.get(variant)
+
+    def _set_error(self, error: str):
+        self.error_state = error
+        self.broadcaster.publish_error(error)
+
+    @staticmethod
+    def _make_governor():
+        return FrameRateGovernor(
+            max_fps=TARGET_FPS,
+            stable_fps=STABLE_FPS,
+            min_fps=MIN_FPS,
+            cpu_budget=CPU_BUDGET,
+            frame_budget=FRAME_BUDGET,
+            base_analysis_interval=ANALYSIS_INTERVAL_SEC,
+        )
+
+    def get_pipeline_stats(self) -> Dict:
+        """Per-stage throughput and queue depth, plus governor state."""
+        return {
+            "stages": self.get_stage_stats(),
+            "governor": self.governor.snapshot(),
+            "presence": self.presence.snapshot(),
+        }
+
+    def get_stage_stats(self) -> List[Dict]:
+        """Per-stage throughput plus current queue depth."""
+        queues = {
+            "inference": self.inference_queue,
+            "preview": self.preview_queue,
+            "persistence": self.persist_queue,
+        }
+        result = []
+        for name, stats in self.stats.items():
+            snap = stats.snapshot()
+            q = queues.get(name)
+            snap["queue_depth"] = len(q) if q is not None else 0
+            result.append(snap)
+        return result
+
+    # -- stage 1: capture ----------------------------------------------------
+
+    def _capture_loop(self, stop_event, ring, handoff, finished):
+        """
+        Read, flip into a ring slot and hand the frame's reference to
+        analysis via `handoff(frame_ref, block)`; calls `finished()` when the
+        source ends or the run is stopped.
+        """
+        stats = self.stats["capture"]
+        governor = self.governor
+        presence = self.presence
+        cpu = ThreadCpuMeter(governor)
+        cap = None
+
+        try:
+            # Inside the try: a bad source spec or unreadable path must still
+            # publish an error and release the downstream stages
+            try:
+                cap = self.source_factory()
+            except Exception as e:
+                self._set_error(f"Could not open frame source: {e}")
+                self.running = False
+                return
+            # Use default camera resolution
+            if not cap.isOpened():
+                self._set_error("Could not open camera")
+                self.running = False
+                return
+
+            consecutive_read_failures = 0
+            while not stop_event.is_set():
+                cpu.tick()
+                loop_start = time.time()
+
+                with STAGE_SECONDS.time("read"):
+                    ret, frame = cap.read()
+                if not ret and not cap.live:
+                    # Recorded / synthetic source reached its end
+                    self._set_error("Frame source ended")
+                    break
+                if not ret:
+                    consecutive_read_failures += 1
+                    stats.record_error()
+                    READ_FAILURES.inc()
+                    if consecutive_read_failures > MAX_CONSECUTIVE_FAILURES:
+                        self._set_error("Camera lost after repeated failures")
+                        break
+                    time.sleep(0.033)
+                    continue
+                consecutive_read_failures = 0
+
+                # Live sources drop stale frames; as-fast-as-possible replays
+                # wait for inference so every frame is analyzed
+                block = not cap.realtime
+                with STAGE_SECONDS.time("flip"):
+                    frame_ref = self._store_frame(ring, frame, block, stop_event)
+                if frame_ref is None:
+                    # Every slot it could use is still being read
+                    stats.record_drop()
+                else:
+                    handoff(frame_ref, block)
+                    stats.record(time.time() - loop_start)
+
+                elapsed = time.time() - loop_start
+                if cap.realtime:
+                    interval = governor.capture_interval if presence.present else presence.idle_interval
+                    sleep_time = max(0.001, interval - elapsed)
+                    time.sleep(sleep_time)
+
+        except Exception as e:
+            print(f"Error in camera capture loop: {e}")
+            self._set_error(f"Camera capture failed: {e}")
+        finally:
+            if cap is not None:
+                cap.release()
+            finished()
+            ring.release()
+
+    @staticmethod
+    def _store_frame(ring, frame, block, stop_event):
+        """
+        Mirror `frame` straight into the next ring slot. Returns the slot's
+        sequence number (the frame reference consumers pin), a plain array if
+        the resolution no longer matches the ring, or None if no slot is free.
+        """
+        if not ring.allocated:
+            ring.allocate(frame.shape)
+        if frame.shape != ring.shape:
+            return cv2.flip(frame, 1)
+        claimed = ring.claim()
+        while claimed is None and block and not stop_event.is_set():
+            time.sleep(0.002)
+            claimed = ring.claim()
+        if claimed is None:
+            return None
+        seq, slot = claimed
+        cv2.flip(frame, 1, dst=slot)
+        ring.publish(seq)
+        return seq
+
+    @staticmethod
+    def _pin_frame(ring, reader, frame_ref):
+        """Frame for a reference from _store_frame (None if its slot was reused)."""
+        if isinstance(frame_ref, int):
+            return ring.pin(reader, frame_ref)
+        return frame_ref
+
+    @staticmethod
+    def _unpin_frame(ring, reader, frame_ref) -> bool:
+        """Release a _pin_frame; False if the slot was reused meanwhile (discard the results)."""
+        if isinstance(frame_ref, int):
+            return ring.unpin(reader)
+        return True
+
+    # -- stage 2: inference --------------------------------------------------
+
+    def _analyzer_config(self) -> Dict:
+        """FrameAnalyzer arguments; plain values so they can go to a worker process."""
+        return {
+            "model_path": POSTURE_MODEL_PATH,
+            "tracking": LANDMARK_TRACKING,
+            "redetect_interval": LANDMARK_REDETECT_INTERVAL,
+            "redness_alpha": REDNESS_EWMA_ALPHA,
+            "posture_defaults": DEFAULT_POSTURE_DATA,
+            "light_defaults": DEFAULT_LIGHT_DATA,
+            "preview_size": (PREVIEW_WIDTH, PREVIEW_HEIGHT),
+            "inference_width": INFERENCE_WIDTH,
+            "light_every_frame": LIGHT_EVERY_FRAME,
+            "light_stride": LIGHT_SAMPLE_STRIDE,
+        }
+
+    def _inference_loop(self, ring, inference_queue, preview_queue, persist_queue):
+        stats = self.stats["inference"]
+        governor = self.governor
+        presence = self.presence
+        analyzer = FrameAnalyzer(presence=presence, **self._analyzer_config())
+        cpu = ThreadCpuMeter(governor)
+
+        try:
+            while True:
+                cpu.tick()
+                item = inference_queue.get(timeout=QUEUE_POLL_SEC)
+                if item is None:
+                    if inference_queue.closed:
+                        break
+                    continue
+                started = time.time()
+                _, frame_ref = item
+                frame = self._pin_frame(ring, RING_READER_INFERENCE, frame_ref)
+                if frame is None:
+                    stats.record_drop()
+                    continue
+
+                try:
+                    analysis = analyzer.analyze(frame, presence.present, governor.analysis_interval)
+                finally:
+                    frame = None
+                    intact = self._unpin_frame(ring, RING_READER_INFERENCE, frame_ref)
+                if not intact:
+                    stats.record_drop()
+                    continue
+                if analysis is None:
+                    # Nobody there: keep the preview live, skip everything else
+                    if self.preview_demand.active:
+                        self._seq += 1
+                        preview_queue.put((self._seq, frame_ref, None))
+                    stats.record(time.time() - started)
+                    continue
+
+                self._seq += 1
+                seq = self._seq
+
+                # Annotation + encode happen on the preview stage, and only
+                # while some subscriber actually wants frames
+                if self.preview_demand.active:
+                    preview_queue.put((seq, frame_ref, analysis.face))
+
+                self._publish_analysis(seq, analysis, time.time() - started, persist_queue)
+
+        except Exception as e:
+            print(f"Error in inference loop: {e}")
+            self._set_error("Analysis pipeline failed")
+        finally:
+            # Never leave the capture stage blocked on a dead consumer
+            inference_queue.close()
+            # Only now: closing these earlier drops the final snapshot
+            preview_queue.close()
+            persist_queue.close()
+            analyzer.close()
+            ring.release()
+
+    def _worker_result_loop(self, stop_event, ring, worker, capture_done, persist_queue):
+        """Process mode: turn the worker's replies into payloads, previews and snapshots."""
+        stats = self.stats["inference"]
+        preview_stats = self.stats["preview"]
+        governor = self.governor
+        cpu = ThreadCpuMeter(governor)
+        try:
+            while True:
+                cpu.tick()
+                message = worker.result(timeout=QUEUE_POLL_SEC)
+                if message is None:
+                    if not worker.alive:
+                        self._set_error("Analysis worker exited")
+                        stop_event.set()
+                        break
+                    if capture_done.is_set() and worker.pending == 0:
+                        break
+                    continue
+
+                seq, analysis, busy, previews, preview_seconds, timings, worker_cpu = message
+                governor.add_cpu(worker_cpu)
+                # Stage timings recorded inside the worker process
+                for value, label in timings:
+                    STAGE_SECONDS.observe(value, label)
+                if previews is not None:
+                    self.latest_previews = previews
+                    self.latest_preview_seq = seq
+                    preview_stats.record(preview_seconds)
+                if analysis is None:
+                    stats.record(busy)
+                    continue
+                self._publish_analysis(seq, analysis, busy, persist_queue)
+
+        except Exception as e:
+            print(f"Error in inference result loop: {e}")
+            self._set_error("Analysis pipeline failed")
+            stop_event.set()
+        finally:
+            # Let persistence drain while the worker is joined (up to
+            # several seconds) rather than after
+            persist_queue.close()
+            worker.close()
+            ring.release()
+
+    def _publish_analysis(self, seq, analysis, busy, persist_queue):
+        """Everything after analysis, identical in thread and process mode."""
+        stats = self.stats["inference"]
+        presence = self.presence
+        eye_data = analysis.eye_data
+        if analysis.eye_error:
+            stats.record_error()
+
+        presence.update(analysis.face_seen)
+
+        blink_rates = analysis.blink_rates
+        recent_blinks = blink_rates.last_minute
+        with STAGE_SECONDS.time("fusion"):
+            payload, strain_index = self._build_payload(
+                eye_data, blink_rates, analysis.posture, analysis.light, self._risk_engine
+            )
+        payload["seq"] = seq
+        payload["user_present"] = presence.present
+        self.latest_payload = payload
+        self.broadcaster.publish(seq, payload)
+
+        # Don't record snapshots of a user who isn't there
+        now = time.time()
+        if presence.present and now - self._last_snapshot_time >= SNAPSHOT_INTERVAL and self.session_id:
+            self._last_snapshot_time = now
+            snap_payload = {k: v for k, v in payload.items() if k not in ("camera_frame", "frame_seq", "seq", "user_present")}
+            persist_queue.put({
+                "session_id": self.session_id,
+                "user_email": self.user_email,
+                "payload": snap_payload,
+                "strain_index": strain_index,
+                "is_dry": eye_data.get("is_dry", False),
+                "recent_blinks": recent_blinks,
+                "posture": analysis.posture,
+                "light": analysis.light,
+            })
+
+        stats.record(busy)
+        self.governor.observe(eye_data.get("ear", 0.0), analysis.face_seen, busy, eye_data.get("ear_open"))
+
+    def _build_payload(self, eye_data, blink_rates, posture_data, light_data, risk_engine):
+        recent_blinks = blink_rates.last_minute
+        redness = eye_data.get("redness", 0.0)
+        redness_level = "High" if redness > 0.8 else ("Elevated" if redness > 0.6 else "Normal")
+
+        blink_risk = 2 if recent_blinks < 10 else (1 if recent_blinks < 15 else 0)
+        redness_risk = 2 if redness > 0.8 else (1 if redness > 0.6 else 0)
+
+        risks = {
+            "blink": blink_risk,
+            "redness": redness_risk,
+            "posture": posture_data["posture_risk"] * 2,
+            "distance": posture_data["distance_risk"] * 2,
+            "lighting": light_data["risk"],
+        }
+        fusion = risk_engine.compute(risks)
+        strain_index = min(100, int(fusion["risk_score"] / 2.0 * 100))
+
+        payload = {
+            "blink_rate": recent_blinks,
+            "distance_cm": posture_data["distance_cm"],
+            "posture_score": posture_data["posture_score"],
+            "ambient_light": round(light_data["brightness"]),
+            "overall_strain_index": strain_index,
+            "redness": round(redness, 2),
+            # Filled per subscriber variant at send time (JSON mode only)
+            "camera_frame": None,
+            "frame_seq": self.latest_preview_seq,
+            "details": {
+                "blink": {
+                    "ear": round(eye_data.get("ear", 0), 3),
+                    "total_blinks": eye_data.get("blinks", 0),
+                    "incomplete_blinks": eye_data.get("incomplete_blinks", 0),
+                    "is_dry": eye_data.get("is_dry", False),
+                    "rate_10m": round(blink_rates.per_minute_10m, 1),
+                    "rate_session": round(blink_rates.per_minute_session, 1),
+                },
+                "distance": {
+                    "value_cm": posture_data["distance_cm"],
+                    "risk_score": posture_data["distance_risk"],
+                    "status": "Too Close" if posture_data["distance_risk"] >= 1.0 else ("Too Far" if posture_data["distance_risk"] > 0 else "Safe"),
+                },
+                "light": {
+                    "brightness": light_data["brightness"],
+                    "level": light_data["level"],
+                    "risk": light_data["risk"],
+                    "face_brightness": light_data.get("face_brightness"),
+                    "background_brightness": light_data.get("background_brightness"),
+                    "backlight": light_data.get("backlight", False),
+                    "glare": light_data.get("glare", False),
+                    "trend": light_data.get("trend", "Stable"),
+                    "p5": light_data.get("p5"),
+                    "p95": light_data.get("p95"),
+                },
+                "posture": {
+                    "head_position": posture_data["head_position"],
+                    "overall": posture_data["overall"],
+                    "pitch": posture_data["pitch"],
+                    "yaw": posture_data["yaw"],
+                    "roll": posture_data["roll"],
+                    "risk": posture_data["posture_risk"],
+                },
+                "redness": {
+                    "score": round(redness, 2),
+                    "level": redness_level,
+                },
+                "risk_fusion": {
+                    "score": fusion["risk_score"],
+                    "level": fusion["risk_level"],
+                },
+            },
+        }
+        return payload, strain_index
+
+    # -- stage 3: preview encode ---------------------------------------------
+
+    def _preview_loop(self, ring, preview_queue):
+        stats = self.stats["preview"]
+        cpu = ThreadCpuMeter(self.governor)
+        try:
+            while True:
+                cpu.tick()
+                item = preview_queue.get(timeout=QUEUE_POLL_SEC)
+                if item is None:
+                    if preview_queue.closed:
+                        break
+                    continue
+                max_fps, variants = self.preview_demand.snapshot()
+                if not variants:
+                    # Last frame subscriber left while this frame was queued
+                    continue
+                started = time.time()
+                frame_seq, frame_ref, face = item
+                frame = self._pin_frame(ring, RING_READER_PREVIEW, frame_ref)
+                if frame is None:
+                    # Slot already reused; a fresher frame is on its way
+                    stats.record_drop()
+                    continue
+
+                previews = None
+                try:
+                    ctx = FrameContext(frame, (PREVIEW_WIDTH, PREVIEW_HEIGHT))
+                    previews = encode_previews(ctx, face, frame_seq, variants)
+                except Exception as e:
+                    stats.record_error()
+                    print(f"Error in preview loop: {e}")
+                finally:
+                    frame = ctx = None
+                    intact = self._unpin_frame(ring, RING_READER_PREVIEW, frame_ref)
+                if not intact:
+                    stats.record_drop()
+                    continue
+                if previews is not None:
+                    self.latest_previews = previews
+                    self.latest_preview_seq = frame_seq
+
+                elapsed = time.time() - started
+                stats.record(elapsed)
+                # Frames arriving meanwhile replace each other in the queue,
+                # so the next encode always picks up the freshest one
+                time.sleep(max(0.0, 1.0 / max(max_fps, 0.5) - elapsed))
+        finally:
+            ring.release()
+
+    # -- stage 4: persistence ------------------------------------------------
+
+    def _persist_loop(self, db, persist_queue):
+        stats = self.stats["persistence"]
+        while True:
+            job = persist_queue.get(timeout=QUEUE_POLL_SEC)
+            if job is None:
+                if persist_queue.closed:
+                    break
+                continue
+            started = time.time()
+            try:
+                with STAGE_SECONDS.time("db_write"):
+                    self._persist_snapshot(db, job)
+                stats.record(time.time() - started)
+            except Exception as db_err:
+                stats.record_error()
+                print(f"[DB] Error saving snapshot/alert: {db_err}")
+
+    @staticmethod
+    def _persist_snapshot(db, job):
+        session_id = job["session_id"]
+        user_email = job["user_email"]
+        strain_index = job["strain_index"]
+        posture = job["posture"]
+        light = job["light"]
+
+        db.insert_snapshot(session_id, job["payload"], user_email)
+
+        if strain_index >= 70:
+            db.insert_alert(session_id, "high_strain", "danger", f"Strain index critically high: {strain_index}%", user_email)
+        elif strain_index >= 50:
+            db.insert_alert(session_id, "elevated_strain", "warning", f"Strain index elevated: {strain_index}%", user_email)
+
+        if job["is_dry"]:
+            db.insert_alert(session_id, "dry_eyes", "warning", f"Low blink rate ({job['recent_blinks']}/min) – eyes may be dry", user_email)
+
+        if posture["posture_risk"] >= 1.0:
+            db.insert_alert(session_id, "bad_posture", "danger", f"Poor posture detected: {posture['head_position']}", user_email)
+        elif posture["posture_risk"] >= 0.5:
+            db.insert_alert(session_id, "bad_posture", "warning", f"Posture needs attention: {posture['head_position']}", user_email)
+
+        if posture["distance_risk"] >= 1.0:
+            db.insert_alert(session_id, "too_close", "warning", f"Too close to screen: {posture['distance_cm']} cm", user_email)
+
+        if light["risk"] >= 2:
+            db.insert_alert(session_id, "bad_lighting", "warning", f"Lighting is {light['level']} (brightness {light['brightness']:.0f})", user_email)
+
+
+class MonitorRegistry:
+    """
+    One GlobalCameraMonitor per device, each with its own threads, engines
+    and session. A device belongs to one user while it is running: another
+    user asking for it is refused instead of silently joining that session,
+    and at most `max_cameras` devices run at once. The process-wide CPU
+    budget scales with the number of running cameras.
+    """
+
+    def __init__(self, max_cameras: int = MAX_CAMERAS, default_device: str = FRAME_SOURCE,
+                 allowed_devices=ALLOWED_DEVICES):
+        self.max_cameras = max(1, max_cameras)
+        self.default_device = default_device
+        self.allowed_devices = frozenset(allowed_devices) | {default_device}
+        self.lock = threading.Lock()
+        self.monitors: Dict[str, GlobalCameraMonitor] = {}
+        self._register_gauges()
+
+    def acquire(self, db, device: str = None, user_email: str = None) -> GlobalCameraMonitor:
+        """Start (or join) the monitor for `device`; pair every call with release()."""
+        device = self.resolve_device(device)
+        with self.lock:
+            monitor = self.monitors.get(device)
+            if monitor is None:
+                if len(self.monitors) >= self.max_cameras:
+                    raise MonitorUnavailable(f"Camera limit reached ({self.max_cameras} in use)")
+                monitor = GlobalCameraMonitor(device=device)
+                self.monitors[device] = monitor
+            elif user_email and monitor.user_email != user_email:
+                raise MonitorUnavailable(f"Camera {device} is in use by another user")
+            try:
+                monitor.start(db, user_email)
+            except Exception:
+                # A monitor that never started must not hold the device or
+                # count towards max_cameras
+                if monitor.refcount == 0 and self.monitors.get(device) is monitor:
+                    del self.monitors[device]
+                raise
+            return monitor
+
+    def resolve_device(self, device: str = None) -> str:
+        """
+        Validate a client-supplied device: a camera index, or a spec from the
+        server's allow-list. Anything else raises MonitorUnavailable, so
+        clients can never make the server open arbitrary paths.
+        """
+        if device in (None, ""):
+            return self.default_device
+        device = str(device)
+        if re.fullmatch(r"[0-9]{1,3}", device):
+            # "7" and "007" are the same camera and must share one monitor
+            return str(int(device))
+        if device in self.allowed_devices:
+            return device
+        raise MonitorUnavailable("Unknown device; use a camera index")
+
+    def release(self, db, monitor: GlobalCameraMonitor):
+        with self.lock:
+            run = monitor.detach()
+            if monitor.refcount == 0 and self.monitors.get(monitor.device) is monitor:
+                del self.monitors[monitor.device]
+        # Draining persistence and closing the session take seconds; other
+        # cameras and clients must not wait on the registry meanwhile
+        if run is not None:
+            monitor.wind_down(db, *run)
+
+    def get(self, device: str = None):
+        with self.lock:
+            return self.monitors.get(device if device not in (None, "") else self.default_device)
+
+    def get_pipeline_stats(self) -> Dict:
+        with self.lock:
+            monitors = list(self.monitors.values())
+        return {
+            "max_cameras": self.max_cameras,
+            "devices": {
+                m.device: dict(m.get_pipeline_stats(), user_email=m.user_email, session_id=m.session_id)
+                for m in monitors
+            },
+        }
+
+    def _per_device(self, fn):
+        with self.lock:
+            monitors = list(self.monitors.values())
+        return {m.device: fn(m) for m in monitors}
+
+    def _register_gauges(self):
+        """Scrape-time views of the running monitors for /api/metrics."""
+        METRICS.gauge(
+            "eyeguardian_cameras_running", "Camera monitors currently running.",
+            lambda: len(self.monitors),
+        )
+        METRICS.gauge(
+            "eyeguardian_subscribers", "Connected /ws/health-stream subscribers per camera.",
+            lambda: self._per_device(lambda m: m.broadcaster.subscriber_count),
+            label="device",
+        )
+        METRICS.gauge(
+            "eyeguardian_queue_depth", "Items waiting in each stage's input queue.",
+            lambda: {
+                (device, s["stage"]): s["queue_depth"]
+                for device, stages in self._per_device(lambda m: m.get_stage_stats()).items()
+                for s in stages
+            },
+            label=("device", "stage"),
+        )
+        METRICS.gauge(
+            "eyeguardian_target_fps", "Frame rate currently chosen by each camera's governor.",
+            lambda: self._per_device(lambda m: m.governor.target_fps),
+            label="device",
+        )
+        METRICS.gauge(
+            "eyeguardian_user_present", "1 while a face is in view, 0 while the presence gate is idle.",
+            lambda: self._per_device(lambda m: int(m.presence.present)),
+            label="device",
+        )
@@ -106,39 +106,15 @@ def populate_sample_data():
     conn.commit()
     print(f"\n✅ Inserted {snapshot_count} snapshots across {session_count} sessions")
     
-    # Rebuild summaries for all days
+    # Rebuild summaries for all days (rows above bypassed EyeGuardianDB)
     print("Rebuilding daily/weekly/monthly summaries...")
     from database import EyeGuardianDB
     db = EyeGuardianDB(DB_PATH)
-    
-    for day_offset in range(180):
-        current_date = base_date + timedelta(days=day_offset)
-        iso_date = current_date.date().isoformat()
-        
-        try:
-            db._rebuild_daily_summary(iso_date, user_email)
-        except Exception as e:
-            print(f"  Warning rebuilding daily {iso_date}: {e}")
-        
-        if day_offset % 7 == 0:
-            try:
-                db._rebuild_weekly_summary(current_date.date(), user_email)
-            except Exception as e:
-                print(f"  Warning rebuilding weekly: {e}")
-        
-        if day_offset % 30 == 0:
-            try:
-                db._rebuild_monthly_summary(current_date.year, current_date.month, user_email)
-            except Exception as e:
-                print(f"  Warning rebuilding monthly: {e}")
-        
-        if day_offset % 30 == 0:
-            print(f"  Rebuilt summaries up to day {day_offset}...")
-    
-    # Final rebuild for current month
-    now = datetime.now()
-    db._rebuild_weekly_summary(now.date(), user_email)
-    db._rebuild_monthly_summary(now.year, now.month, user_email)
+    report = db.rebuild_all_summaries(
+        progress=lambda step, done, total: print(f"  [{done}/{total}] {step}"),
+    )
+    db.close()
+    print(f"  Rebuilt summaries in {report['seconds']:.2f}s")
     
     conn.close()
     print(f"\n✅ Database populated with 6 months of data for {user_email}!")
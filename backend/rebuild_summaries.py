@@ -0,0 +1,44 @@
+"""
+Rebuild EyeGuardian's summary tables from history.
+
+Recomputes the per-day running totals and every daily, weekly and monthly
+summary for all users in one transaction (see
+EyeGuardianDB.rebuild_all_summaries). Use it after importing snapshots,
+restoring a backup or changing how summaries are computed. The same rebuild
+is available as POST /api/summaries/rebuild.
+
+Usage:
+    python rebuild_summaries.py
+    python rebuild_summaries.py --db path/to/eyeguardian.db --prune
+"""
+
+import argparse
+
+from database import DB_PATH, EyeGuardianDB
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild EyeGuardian summary tables")
+    parser.add_argument("--db", default=DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--prune", action="store_true",
+                        help="also delete summary rows with no underlying data (e.g. seed_data.py rows)")
+    args = parser.parse_args()
+
+    def progress(step, done, total):
+        print(f"  [{done}/{total}] {step}")
+
+    print(f"Rebuilding summaries in {args.db}...")
+    db = EyeGuardianDB(args.db)
+    try:
+        report = db.rebuild_all_summaries(prune=args.prune, progress=progress)
+    finally:
+        db.close()
+
+    print(f"\n✅ Rebuilt in {report['seconds']:.2f}s")
+    for step in ("daily_totals", "daily", "weekly", "monthly", "prune"):
+        if step in report:
+            print(f"   - {step}: {report[step]} rows")
+
+
+if __name__ == "__main__":
+    main()
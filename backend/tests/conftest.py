@@ -0,0 +1,129 @@
+import os
+import sys
+
+import pytest
+
+# Modules import each other as top-level packages (engine.*, database, ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# EyeGuardianEngine.LEFT_EYE_INDICES / RIGHT_EYE_INDICES
+LEFT_EYE = (362, 385, 387, 263, 373, 380)
+RIGHT_EYE = (33, 160, 158, 133, 153, 144)
+
+
+def _face_points(ear: float = 0.3, eye_width: float = 0.1, num_landmarks: int = 478):
+    """
+    (N, 3) normalized landmarks of a frontal face whose eyes both have the
+    given EAR in a square frame. Landmarks not on the eyes sit at the centre.
+    """
+    import numpy as np
+
+    points = np.full((num_landmarks, 3), 0.5, dtype=np.float32)
+    points[:, 2] = 0.0
+    half_height = ear * eye_width / 2.0
+    for (p0, p1, p2, p3, p4, p5), cx in ((LEFT_EYE, 0.6), (RIGHT_EYE, 0.4)):
+        x0, x1, cy = cx - eye_width / 2.0, cx + eye_width / 2.0, 0.45
+        points[p0, :2] = (x0, cy)
+        points[p3, :2] = (x1, cy)
+        points[p1, :2] = (x0 + eye_width / 3.0, cy - half_height)
+        points[p2, :2] = (x1 - eye_width / 3.0, cy - half_height)
+        points[p4, :2] = (x1 - eye_width / 3.0, cy + half_height)
+        points[p5, :2] = (x0 + eye_width / 3.0, cy + half_height)
+    return points
+
+
+@pytest.fixture
+def face_points():
+    """Factory for synthetic landmark arrays with a chosen eye aspect ratio."""
+    return _face_points
+
+
+# -- database --------------------------------------------------------------------
+
+class Clock:
+    """Stands in for the wall clock inside database.py."""
+
+    def __init__(self, now):
+        self.now = now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    from datetime import date, datetime
+
+    import database
+
+    clock = Clock(datetime(2025, 12, 1, 9, 0))
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return clock.now
+
+    class FrozenDate(date):
+        @classmethod
+        def today(cls):
+            return clock.now.date()
+
+    monkeypatch.setattr(database, "datetime", FrozenDatetime)
+    monkeypatch.setattr(database, "date", FrozenDate)
+    return clock
+
+
+@pytest.fixture
+def db(tmp_path):
+    from database import EyeGuardianDB
+
+    db = EyeGuardianDB(str(tmp_path / "eyeguardian.db"), batch_size=1000, flush_interval=60.0)
+    yield db
+    db.close()
+
+
+def _snapshot_payload(i: int):
+    return {
+        "blink_rate": 8 + i % 9,
+        "distance_cm": 50.0 + i,
+        "posture_score": 60 + i % 30,
+        "ambient_light": 120,
+        "overall_strain_index": 30 + i % 50,
+        "redness": 0.4 + (i % 5) / 10.0,
+        "details": {
+            "blink": {"ear": 0.3, "total_blinks": i, "incomplete_blinks": 0, "is_dry": i % 3 == 0},
+            "distance": {"risk_score": 0.0},
+            # Every fourth snapshot has no brightness: averages skip NULLs
+            "light": {"brightness": None if i % 4 == 0 else 100.0 + i, "level": "Good", "risk": 0},
+            "posture": {"head_position": "Centered", "overall": "Good", "pitch": 0.0, "yaw": 0.0,
+                        "roll": 0.0, "risk": 0.5 if i % 2 else 0.0},
+            "redness": {"score": 0.5, "level": "Normal"},
+            "risk_fusion": {"score": 0.4, "level": "Low"},
+        },
+    }
+
+
+@pytest.fixture
+def snapshot_payload():
+    """Factory for WS-style payloads whose metrics vary with `i`."""
+    return _snapshot_payload
+
+
+@pytest.fixture
+def run_session(db, clock):
+    """
+    Factory recording one 20-minute session at `start`: a snapshot every
+    30 s, `alerts` alerts, then end_session().
+    """
+    from datetime import timedelta
+
+    def run(start, user_email, snapshots, alerts=1):
+        clock.now = start
+        session_id = db.start_session(user_email)
+        for i in range(snapshots):
+            clock.now = start + timedelta(seconds=30 * (i + 1))
+            db.insert_snapshot(session_id, _snapshot_payload(i + start.day), user_email)
+        for _ in range(alerts):
+            db.insert_alert(session_id, "dry_eyes", "warning", "Low blink rate", user_email)
+        clock.now = start + timedelta(minutes=20)
+        db.end_session(session_id)
+        return session_id
+
+    return run
@@ -0,0 +1,43 @@
+import pytest
+
+from engine.blink_counter import BlinkRateCounter, SlidingWindowCounter
+
+
+def test_sliding_window_keeps_events_on_the_cutoff():
+    counter = SlidingWindowCounter(60.0)
+    for t in (0.0, 10.0, 30.0):
+        counter.add(t)
+
+    assert counter.count(60.0) == 3
+    assert counter.count(60.5) == 2
+    assert counter.count(90.0) == 1
+    assert counter.count(91.0) == 0
+
+
+def test_rates_per_window():
+    counter = BlinkRateCounter(session_start=0.0)
+    # 12 blinks in minute 0, then 6 blinks in minute 9
+    for i in range(12):
+        counter.add(i * 5.0)
+    for i in range(6):
+        counter.add(540.0 + i * 10.0)
+
+    rates = counter.rates(now=600.0)
+    assert rates.last_minute == 6
+    assert rates.per_minute_1m == 6.0
+    assert rates.per_minute_10m == pytest.approx(1.8)
+    assert rates.per_minute_session == pytest.approx(1.8)
+
+    # 20 minutes in: only the session rate still remembers them
+    later = counter.rates(now=1200.0)
+    assert later.last_minute == 0
+    assert later.per_minute_10m == 0.0
+    assert later.per_minute_session == pytest.approx(18 / 20.0)
+    assert counter.total == 18
+
+
+def test_session_rate_uses_at_least_one_second():
+    counter = BlinkRateCounter(session_start=100.0)
+    counter.add(100.0)
+
+    assert counter.rates(now=100.0).per_minute_session == pytest.approx(60.0)
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+
+from engine.broadcaster import PayloadBroadcaster
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_publish_from_thread_wakes_subscriber():
+    async def scenario():
+        broadcaster = PayloadBroadcaster()
+        broadcaster.add_subscriber()
+        waiter = asyncio.ensure_future(broadcaster.wait_for_update(0, timeout=2))
+        await asyncio.sleep(0)
+        threading.Thread(target=broadcaster.publish, args=(1, {"value": 1})).start()
+        return await waiter
+
+    assert _run(scenario()) == (1, {"value": 1}, None)
+
+
+def test_bursts_coalesce_into_latest_version():
+    async def scenario():
+        broadcaster = PayloadBroadcaster()
+        broadcaster.add_subscriber()
+        for version in range(1, 6):
+            broadcaster.publish(version, {"value": version})
+        # The loop has not run yet: one delivery is scheduled for all five
+        result = await broadcaster.wait_for_update(0, timeout=2)
+        return result, broadcaster.version
+
+    (version, payload, error), latest = _run(scenario())
+    assert (version, payload, error) == (5, {"value": 5}, None)
+    assert latest == 5
+
+
+def test_state_published_without_subscribers_is_picked_up():
+    async def scenario():
+        broadcaster = PayloadBroadcaster()
+        broadcaster.publish(3, {"value": 3})
+        broadcaster.add_subscriber()
+        return broadcaster.latest()
+
+    assert _run(scenario()) == (3, {"value": 3}, None)
+
+
+def test_wait_times_out_without_payload():
+    async def scenario():
+        broadcaster = PayloadBroadcaster()
+        broadcaster.add_subscriber()
+        return await broadcaster.wait_for_update(0, timeout=0.05)
+
+    assert _run(scenario()) == (0, None, None)
+
+
+def test_error_wakes_subscriber_without_new_version():
+    async def scenario():
+        broadcaster = PayloadBroadcaster()
+        broadcaster.add_subscriber()
+        broadcaster.publish(1, {"value": 1})
+        await broadcaster.wait_for_update(0, timeout=2)
+        broadcaster.publish_error("Camera lost")
+        return await broadcaster.wait_for_update(1, timeout=2)
+
+    assert _run(scenario()) == (1, None, "Camera lost")
+
+
+def test_reset_clears_error_but_keeps_version():
+    async def scenario():
+        broadcaster = PayloadBroadcaster()
+        broadcaster.add_subscriber()
+        broadcaster.publish(4, {"value": 4})
+        broadcaster.publish_error("boom")
+        await asyncio.sleep(0)
+        broadcaster.reset()
+        return broadcaster.latest()
+
+    assert _run(scenario()) == (4, None, None)
+
+
+def test_serialized_text_is_shared_per_version_and_frame():
+    broadcaster = PayloadBroadcaster()
+    payload = {"value": 1, "camera_frame": None}
+
+    first = broadcaster.serialized(1, payload)
+    assert broadcaster.serialized(1, payload) is first
+    with_frame = broadcaster.serialized(1, payload, frame="data:x", frame_key="jpeg")
+    assert '"camera_frame": "data:x"' in with_frame
+    assert broadcaster.serialized(1, payload, frame="data:x", frame_key="jpeg") is with_frame
+    assert payload["camera_frame"] is None
+
+    assert broadcaster.serialized(2, {"value": 2}) == '{"value": 2}'
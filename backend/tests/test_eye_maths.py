@@ -0,0 +1,55 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("mediapipe")
+
+from engine.eye_processor import EyeGuardianEngine  # noqa: E402
+
+
+@pytest.fixture
+def engine():
+    return EyeGuardianEngine()
+
+
+def _eye(ear, width=30.0):
+    half = ear * width / 2.0
+    return np.array([
+        (0.0, 0.0), (10.0, -half), (20.0, -half), (width, 0.0), (20.0, half), (10.0, half),
+    ], dtype=np.float32)
+
+
+def test_calculate_ear_single_and_batched(engine):
+    assert float(engine._calculate_ear(_eye(0.3))) == pytest.approx(0.3)
+
+    batch = np.stack([np.stack([_eye(0.3), _eye(0.2)]), np.stack([_eye(0.1), _eye(0.0)])])
+    assert batch.shape == (2, 2, 6, 2)
+    np.testing.assert_allclose(engine._calculate_ear(batch), [[0.3, 0.2], [0.1, 0.0]], atol=1e-6)
+
+
+def test_calculate_ear_zero_width_eye_is_zero(engine):
+    collapsed = np.zeros((6, 2), dtype=np.float32)
+    assert float(engine._calculate_ear(collapsed)) == 0.0
+
+
+def test_process_points_batch_matches_per_frame_ear(engine, face_points):
+    ears = [0.32, 0.30, 0.18, 0.32]
+    points = np.stack([face_points(ear) for ear in ears])
+
+    avg_ears = engine.process_points_batch(points, 640, 640, timestamps=[0.0, 0.1, 0.2, 0.3])
+
+    assert avg_ears.shape == (4,)
+    np.testing.assert_allclose(avg_ears, ears, atol=1e-4)
+
+
+def test_process_points_batch_runs_blink_state_machine(engine, face_points):
+    # complete blink, incomplete blink, then a closure that is still open-ended
+    ears = [0.32, 0.15, 0.32, 0.32, 0.23, 0.32, 0.10]
+    points = np.stack([face_points(ear) for ear in ears])
+
+    engine.process_points_batch(points, 640, 640, timestamps=[10.0 + i for i in range(len(ears))])
+
+    assert engine.blink_count == 1
+    assert engine.incomplete_blink_count == 1
+    assert engine.is_blinking
+    assert engine.blink_counter.rates(now=20.0).last_minute == 1
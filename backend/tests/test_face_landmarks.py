@@ -0,0 +1,41 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("mediapipe")
+
+from engine.face_landmarks import LANDMARK_QUANT_SCALE, FaceLandmarks  # noqa: E402
+
+
+def test_quantized_xy_scales_rounds_and_clips():
+    points = np.array([
+        (0.0, 1.0, 0.2),
+        (0.5, 0.25, 0.0),
+        (-0.1, 1.3, 0.0),
+    ], dtype=np.float32)
+
+    quantized = FaceLandmarks(points=points).quantized_xy()
+
+    assert quantized.dtype == np.dtype("<u2")
+    assert quantized.shape == (3, 2)
+    assert quantized.tolist() == [[0, 65535], [32768, 16384], [0, 65535]]
+
+
+def test_quantized_xy_round_trips_within_one_step(face_points):
+    points = face_points(0.3)
+    recovered = FaceLandmarks(points=points).quantized_xy() / float(LANDMARK_QUANT_SCALE)
+
+    np.testing.assert_allclose(recovered, points[:, :2], atol=1.0 / LANDMARK_QUANT_SCALE)
+    # Little-endian x0, y0, x1, y1, ... as the client unpacks it
+    raw = FaceLandmarks(points=points).quantized_xy().tobytes()
+    assert len(raw) == points.shape[0] * 4
+
+
+def test_points_and_landmarks_convert_lazily():
+    points = np.array([(0.1, 0.2, 0.3)], dtype=np.float32)
+    face = FaceLandmarks(points=points)
+
+    (landmark,) = face.landmarks
+    assert (landmark.x, landmark.y, landmark.z) == pytest.approx((0.1, 0.2, 0.3))
+    assert face.pixel_points(100, 50) is face.pixel_points(100, 50)
+    np.testing.assert_allclose(face.pixel_points(100, 50), [[10.0, 10.0]], atol=1e-5)
@@ -0,0 +1,80 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+import engine.frame_context as frame_context  # noqa: E402
+from engine.frame_context import FrameContext, as_frame_context  # noqa: E402
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=(480, 640, 3), dtype=np.uint8)
+
+
+@pytest.fixture
+def conversions(monkeypatch):
+    """Counts cv2.cvtColor / cv2.resize calls made by FrameContext."""
+    calls = {"cvtColor": 0, "resize": 0}
+    for name in calls:
+        original = getattr(cv2, name)
+
+        def counted(*args, _name=name, _original=original, **kwargs):
+            calls[_name] += 1
+            return _original(*args, **kwargs)
+
+        monkeypatch.setattr(frame_context.cv2, name, counted)
+    return calls
+
+
+def test_conversions_are_memoized(frame, conversions):
+    ctx = FrameContext(frame)
+
+    assert ctx.rgb is ctx.rgb
+    assert ctx.gray is ctx.gray
+    assert conversions["cvtColor"] == 2
+    np.testing.assert_array_equal(ctx.rgb, frame[:, :, ::-1])
+
+
+def test_resized_variants_share_one_resize(frame, conversions):
+    ctx = FrameContext(frame, preview_size=(320, 240), inference_width=320)
+
+    assert ctx.resized(320).shape == (240, 320, 3)
+    assert ctx.preview is ctx.resized(320)
+    assert ctx.rgb_at(320) is ctx.inference_rgb
+    assert ctx.gray_at(320).shape == (240, 320)
+    assert conversions["resize"] == 1
+    assert conversions["cvtColor"] == 2
+
+
+def test_sizes_at_or_above_the_frame_return_full_resolution(frame, conversions):
+    ctx = FrameContext(frame, preview_size=(1280, 720))
+
+    assert ctx.resized(640) is frame
+    assert ctx.resized(None) is frame
+    assert ctx.preview is frame
+    assert ctx.inference_rgb is ctx.rgb
+    assert conversions["resize"] == 0
+
+
+def test_preview_fits_the_box(frame):
+    ctx = FrameContext(frame, preview_size=(200, 200))
+    assert ctx.preview.shape == (150, 200, 3)
+
+
+def test_luma_sample(frame):
+    ctx = FrameContext(frame)
+
+    sample = ctx.luma_sample(8)
+    assert sample.shape == (60, 80)
+    assert ctx.luma_sample(8) is sample
+    np.testing.assert_array_equal(sample, cv2.cvtColor(np.ascontiguousarray(frame[::8, ::8]), cv2.COLOR_BGR2GRAY))
+    assert ctx.luma_sample(1) is ctx.gray
+
+
+def test_as_frame_context_passes_contexts_through(frame):
+    ctx = as_frame_context(frame)
+    assert isinstance(ctx, FrameContext)
+    assert ctx.frame is frame
+    assert as_frame_context(ctx) is ctx
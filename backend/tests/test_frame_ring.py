@@ -0,0 +1,94 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from engine.frame_ring import SharedFrameRing  # noqa: E402
+
+SHAPE = (4, 6, 3)
+
+
+@pytest.fixture
+def ring():
+    ring = SharedFrameRing(slots=2, readers=2)
+    ring.allocate(SHAPE)
+    yield ring
+    ring.close()
+
+
+def _write(ring, value):
+    seq, slot = ring.claim()
+    slot[:] = value
+    ring.publish(seq)
+    return seq
+
+
+def test_claim_publish_pin_roundtrip(ring):
+    seq = _write(ring, 7)
+
+    frame = ring.pin(0, seq)
+    assert frame is not None
+    assert frame.shape == SHAPE
+    assert (frame == 7).all()
+    assert ring.valid(seq)
+    assert ring.unpin(0) is True
+
+
+def test_claim_refuses_to_reuse_a_pinned_slot(ring):
+    first = _write(ring, 1)
+    _write(ring, 2)
+    assert ring.pin(0, first) is not None
+
+    # The next claim would overwrite `first`
+    assert ring.claim() is None
+    assert ring.valid(first)
+
+    assert ring.unpin(0) is True
+    third = _write(ring, 3)
+    assert not ring.valid(first)
+    assert ring.valid(third)
+
+
+def test_pin_of_replaced_frame_returns_none(ring):
+    first = _write(ring, 1)
+    _write(ring, 2)
+    _write(ring, 3)
+
+    assert ring.pin(1, first) is None
+    # A failed pin leaves nothing pinned
+    assert ring.claim() is not None
+
+
+def test_unpin_reports_frame_replaced_while_pinned(ring):
+    seq = _write(ring, 1)
+    assert ring.pin(0, seq) is not None
+    # What a claim() racing the pin from another process can do
+    ring._header[1 + seq % ring.slots] = seq + ring.slots
+
+    assert ring.valid(seq) is False
+    assert ring.unpin(0) is False
+    assert ring.unpin(0) is False
+
+
+def test_attach_shares_frames(ring):
+    seq = _write(ring, 9)
+    reader = SharedFrameRing.attach(ring.descriptor)
+    try:
+        frame = reader.pin(1, seq)
+        assert (frame == 9).all()
+        frame = None
+        # The writer sees the reader's pin through the shared header
+        _write(ring, 10)
+        assert ring.claim() is None
+        assert reader.unpin(1) is True
+    finally:
+        reader.close()
+
+
+def test_release_closes_after_last_reference():
+    ring = SharedFrameRing(slots=2, readers=1, refs=2)
+    ring.allocate(SHAPE)
+
+    ring.release()
+    assert ring.allocated
+    ring.release()
+    assert not ring.allocated
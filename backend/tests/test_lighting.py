@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from engine.lighting import LightingAnalyzer, classify_brightness  # noqa: E402
+
+# Face box in normalized coordinates: a quarter of the frame
+FACE = SimpleNamespace(points=np.array([(0.25, 0.25, 0.0), (0.75, 0.75, 0.0)], dtype=np.float32))
+FACE_ROWS, FACE_COLS = slice(120, 360), slice(160, 480)
+
+
+def _frame(value):
+    return np.full((480, 640, 3), value, dtype=np.uint8)
+
+
+@pytest.mark.parametrize("value", [30, 120, 220])
+def test_level_and_risk_match_classify_brightness(value):
+    result = LightingAnalyzer().analyze(_frame(value), now=0.0)
+
+    expected = classify_brightness(value)
+    assert (result["brightness"], result["level"], result["risk"]) == (
+        expected["brightness"], expected["level"], expected["risk"])
+    assert result["backlight"] is False
+    assert result["glare"] is False
+
+
+def _backlit():
+    frame = _frame(200)
+    frame[FACE_ROWS, FACE_COLS] = 100
+    return frame
+
+
+def test_backlight_is_reported_without_changing_risk():
+    result = LightingAnalyzer().analyze(_backlit(), face=FACE, now=0.0)
+
+    assert result["face_brightness"] == pytest.approx(100.0)
+    assert result["background_brightness"] == pytest.approx(200.0)
+    assert result["backlight"] is True
+    assert (result["level"], result["risk"]) == ("Good", 0)
+
+
+def test_backlight_raises_risk_when_opted_in():
+    result = LightingAnalyzer(contrast_risk=True).analyze(_backlit(), face=FACE, now=0.0)
+
+    assert (result["level"], result["risk"]) == ("Backlit", 2)
+
+
+def test_backlight_needs_a_face():
+    result = LightingAnalyzer(contrast_risk=True).analyze(_backlit(), now=0.0)
+
+    assert result["face_brightness"] is None
+    assert result["backlight"] is False
+    assert result["risk"] == 0
+
+
+def test_clipping_outside_the_face_is_not_glare():
+    frame = _frame(120)
+    # A bright lamp above the user's head
+    frame[:80] = 255
+
+    result = LightingAnalyzer(contrast_risk=True).analyze(frame, face=FACE, now=0.0)
+
+    assert result["clipped_fraction"] > 0.1
+    assert result["glare"] is False
+    assert (result["level"], result["risk"]) == ("Good", 0)
+
+
+def test_clipping_on_the_face_is_glare():
+    frame = _frame(120)
+    frame[120:200, FACE_COLS] = 255
+
+    plain = LightingAnalyzer().analyze(frame, face=FACE, now=0.0)
+    opted_in = LightingAnalyzer(contrast_risk=True).analyze(frame, face=FACE, now=0.0)
+
+    assert plain["glare"] is True
+    assert (plain["level"], plain["risk"]) == ("Good", 0)
+    assert (opted_in["level"], opted_in["risk"]) == ("Glare", 2)
+
+
+def test_trend_follows_fast_and_slow_averages():
+    analyzer = LightingAnalyzer()
+    assert analyzer.analyze(_frame(100), now=0.0)["trend"] == "Stable"
+
+    result = analyzer.analyze(_frame(160), now=2.0)
+    assert result["trend"] == "Brightening"
+    assert result["trend_delta"] > 0
+
+    for t in range(3, 300, 5):
+        result = analyzer.analyze(_frame(160), now=float(t))
+    assert result["trend"] == "Stable"
+
+    assert analyzer.analyze(_frame(60), now=301.0)["trend"] == "Darkening"
+
+
+def test_percentiles_of_decayed_histogram():
+    analyzer = LightingAnalyzer()
+    assert analyzer.percentiles() == (0.0, 0.0, 0.0)
+
+    frame = _frame(40)
+    frame[240:] = 200
+    result = analyzer.analyze(frame, now=0.0)
+
+    # 8-wide bins, reported at their centres
+    assert result["p5"] == pytest.approx(44.0)
+    assert result["p95"] == pytest.approx(204.0)
+
+    analyzer.reset()
+    assert analyzer.percentiles() == (0.0, 0.0, 0.0)
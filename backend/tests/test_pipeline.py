@@ -0,0 +1,81 @@
+import threading
+import time
+
+from engine.pipeline import DropOldestQueue, StageStats
+
+
+def test_put_drops_oldest_when_full():
+    stats = StageStats("test")
+    q = DropOldestQueue(2, stats)
+
+    assert q.put(1) is False
+    assert q.put(2) is False
+    assert q.put(3) is True
+
+    assert len(q) == 2
+    assert stats.dropped == 1
+    assert q.get(timeout=0) == 2
+    assert q.get(timeout=0) == 3
+
+
+def test_get_times_out_with_none():
+    q = DropOldestQueue(1)
+    started = time.monotonic()
+    assert q.get(timeout=0.05) is None
+    assert time.monotonic() - started >= 0.04
+
+
+def test_close_drains_remaining_items_then_returns_none():
+    q = DropOldestQueue(3)
+    q.put("a")
+    q.put("b")
+    q.close()
+
+    assert q.closed
+    assert q.put("c") is False
+    assert q.get(timeout=1) == "a"
+    assert q.get(timeout=1) == "b"
+    assert q.get(timeout=1) is None
+
+
+def test_close_wakes_waiting_consumer():
+    q = DropOldestQueue(1)
+    result = []
+    consumer = threading.Thread(target=lambda: result.append(q.get(timeout=5)))
+    consumer.start()
+    time.sleep(0.05)
+    q.close()
+    consumer.join(1)
+
+    assert not consumer.is_alive()
+    assert result == [None]
+
+
+def test_blocking_put_waits_for_room_instead_of_dropping():
+    stats = StageStats("test")
+    q = DropOldestQueue(1, stats)
+    q.put(1)
+    producer = threading.Thread(target=q.put, args=(2,), kwargs={"block": True})
+    producer.start()
+    time.sleep(0.05)
+    assert producer.is_alive()
+
+    assert q.get(timeout=1) == 1
+    producer.join(1)
+    assert not producer.is_alive()
+    assert q.get(timeout=1) == 2
+    assert stats.dropped == 0
+
+
+def test_close_releases_blocked_producer():
+    q = DropOldestQueue(1)
+    q.put(1)
+    results = []
+    producer = threading.Thread(target=lambda: results.append(q.put(2, block=True)))
+    producer.start()
+    time.sleep(0.05)
+    q.close()
+    producer.join(1)
+
+    assert results == [False]
+    assert len(q) == 1
@@ -0,0 +1,83 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("mediapipe")
+
+from engine.face_landmarks import FaceLandmarks  # noqa: E402
+from engine.posture_analyzer import PostureAnalyzer  # noqa: E402
+from inference import FrameAnalyzer  # noqa: E402
+
+IDENTITY = np.eye(4, dtype=np.float32)
+
+
+class CountingStage:
+    """Stands in for FaceLandmarkStage: replays faces and counts detections."""
+
+    has_pose = True
+
+    def __init__(self, faces):
+        self.faces = list(faces)
+        self.calls = 0
+
+    def detect(self, frame):
+        self.calls += 1
+        return self.faces.pop(0)
+
+    def reset_tracking(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def analyzer():
+    analyzer = FrameAnalyzer(tracking=False)
+    analyzer.landmark_stage.close()
+    analyzer.posture_analyzer = PostureAnalyzer()
+    yield analyzer
+    analyzer.close()
+
+
+def _frame():
+    return np.zeros((200, 200, 3), dtype=np.uint8)
+
+
+def test_one_detection_feeds_eye_and_posture(analyzer, face_points):
+    face = FaceLandmarks(transformation_matrix=IDENTITY, points=face_points(0.3))
+    stage = analyzer.landmark_stage = CountingStage([face])
+
+    analysis = analyzer.analyze(_frame(), present=True, analysis_interval=5.0)
+
+    assert stage.calls == 1
+    assert analysis.face is face
+    assert analysis.face_seen
+    assert analysis.eye_data["ear"] == pytest.approx(0.3, abs=1e-3)
+    assert analysis.posture["head_position"] == "Good Posture"
+    assert analysis.posture["pitch"] == 0.0
+
+
+def test_blinks_are_counted_from_shared_landmarks(analyzer, face_points):
+    ears = [0.32, 0.32, 0.15, 0.32, 0.23, 0.32]
+    stage = analyzer.landmark_stage = CountingStage(
+        FaceLandmarks(transformation_matrix=IDENTITY, points=face_points(ear)) for ear in ears
+    )
+
+    for _ in ears:
+        analysis = analyzer.analyze(_frame(), present=True, analysis_interval=5.0)
+
+    assert stage.calls == len(ears)
+    assert analysis.eye_data["blinks"] == 1
+    assert analysis.eye_data["incomplete_blinks"] == 1
+    assert analysis.blink_rates.last_minute == 1
+
+
+def test_no_face_reaches_both_engines_as_none(analyzer):
+    analyzer.landmark_stage = CountingStage([None])
+
+    analysis = analyzer.analyze(_frame(), present=True, analysis_interval=5.0)
+
+    assert not analysis.face_seen
+    assert analysis.eye_data["ear"] == 0.0
+    assert analysis.posture["head_position"] == "No Face"
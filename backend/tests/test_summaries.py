@@ -0,0 +1,128 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+SUMMARY_KEYS = {
+    "daily_summaries": ("user_email", "date"),
+    "weekly_summaries": ("user_email", "year", "week"),
+    "monthly_summaries": ("user_email", "year", "month"),
+}
+
+
+def _summaries(db, table):
+    with db._read() as conn:
+        rows = [dict(r) for r in conn.execute(f"SELECT * FROM {table}")]
+    result = {}
+    for row in rows:
+        row.pop("id")
+        result[tuple(row[k] for k in SUMMARY_KEYS[table])] = row
+    return result
+
+
+def _assert_same(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key, row in expected.items():
+        assert actual[key] == pytest.approx(row), key
+
+
+@pytest.fixture
+def history(db, run_session):
+    """Sessions for two users across a month and an ISO-year boundary."""
+    start = datetime(2025, 12, 26, 9, 0)
+    for day in range(9):
+        for hour, user in ((9, "a@example.com"), (14, "b@example.com")):
+            if (day + hour) % 4 == 0:
+                continue
+            run_session(start + timedelta(days=day, hours=hour - 9), user, snapshots=3 + day % 4)
+    # Anonymous data last: the incremental NULL rows aggregate all users as
+    # of the moment they are refreshed
+    run_session(datetime(2026, 1, 3, 20, 0), None, snapshots=5, alerts=2)
+    return db
+
+
+def test_incremental_summaries_match_full_rescans(history):
+    db = history
+    incremental = {table: _summaries(db, table) for table in SUMMARY_KEYS}
+
+    for user_email, iso_date in incremental["daily_summaries"]:
+        db._rebuild_daily_summary(iso_date, user_email)
+    for (user_email, _, _), row in incremental["weekly_summaries"].items():
+        db._rebuild_weekly_summary(date.fromisoformat(row["week_start"]), user_email)
+    for user_email, year, month in incremental["monthly_summaries"]:
+        db._rebuild_monthly_summary(year, month, user_email)
+
+    for table in SUMMARY_KEYS:
+        _assert_same(_summaries(db, table), incremental[table])
+
+
+def test_rebuild_daily_totals_reproduces_running_totals(history):
+    db = history
+    with db._read() as conn:
+        before = [dict(r) for r in conn.execute("SELECT * FROM daily_totals ORDER BY user_email, date")]
+    db.rebuild_daily_totals()
+    with db._read() as conn:
+        after = [dict(r) for r in conn.execute("SELECT * FROM daily_totals ORDER BY user_email, date")]
+
+    assert len(after) == len(before)
+    for rebuilt, running in zip(after, before):
+        assert rebuilt == pytest.approx(running)
+
+
+def test_rebuild_all_summaries_matches_incremental(history):
+    db = history
+    incremental = {table: _summaries(db, table) for table in SUMMARY_KEYS}
+    db._get_conn().executescript(
+        "DELETE FROM daily_summaries; DELETE FROM weekly_summaries; DELETE FROM monthly_summaries;"
+    )
+
+    steps = []
+    report = db.rebuild_all_summaries(progress=lambda step, done, total: steps.append((step, done, total)))
+
+    assert [s[0] for s in steps] == ["daily_totals", "daily", "weekly", "monthly"]
+    assert report["daily"] == len(incremental["daily_summaries"])
+    for table in SUMMARY_KEYS:
+        _assert_same(_summaries(db, table), incremental[table])
+
+
+def test_rebuild_all_summaries_groups_by_iso_week(history):
+    db = history
+    db.rebuild_all_summaries()
+    weeks = {
+        (year, week): (row["week_start"], row["week_end"])
+        for (user_email, year, week), row in _summaries(db, "weekly_summaries").items()
+        if user_email == "a@example.com"
+    }
+
+    # 2025-12-29 (Monday) starts ISO week 1 of 2026; Dec 26-28 are 2025-W52
+    assert weeks == {
+        (2025, 52): ("2025-12-22", "2025-12-28"),
+        (2026, 1): ("2025-12-29", "2026-01-04"),
+    }
+    for (year, week), (week_start, _) in weeks.items():
+        assert date.fromisoformat(week_start).isocalendar()[:2] == (year, week)
+
+    months = {(year, month) for user_email, year, month in _summaries(db, "monthly_summaries")}
+    assert months == {(2025, 12), (2026, 1)}
+
+
+def test_rebuild_all_summaries_iso_week_53(db, run_session):
+    # 2021-01-01 (Friday) belongs to 2020-W53
+    run_session(datetime(2021, 1, 1, 9, 0), "a@example.com", snapshots=2)
+    run_session(datetime(2021, 1, 4, 9, 0), "a@example.com", snapshots=2)
+    db.rebuild_all_summaries()
+
+    weeks = sorted((year, week, row["week_start"]) for (_, year, week), row
+                   in _summaries(db, "weekly_summaries").items())
+    assert weeks == [(2020, 53, "2020-12-28"), (2021, 1, "2021-01-04")]
+
+
+def test_prune_removes_rows_without_data(history):
+    db = history
+    conn = db._get_conn()
+    conn.execute("INSERT INTO daily_summaries (user_email, date) VALUES ('ghost@example.com', '2024-01-01')")
+    conn.commit()
+
+    report = db.rebuild_all_summaries(prune=True)
+
+    assert report["prune"] == 1
+    assert ("ghost@example.com", "2024-01-01") not in _summaries(db, "daily_summaries")
@@ -0,0 +1,118 @@
+import time
+from datetime import datetime
+
+import pytest
+
+import database
+from database import WRITE_MAX_ATTEMPTS, EyeGuardianDB
+
+
+def test_rows_are_queued_until_flush(db, clock, snapshot_payload):
+    session_id = db.start_session("a@example.com")
+    for i in range(3):
+        db.insert_snapshot(session_id, snapshot_payload(i), "a@example.com")
+    db.insert_alert(session_id, "dry_eyes", "warning", "Low blink rate", "a@example.com")
+
+    assert db.pending_writes == 4
+    assert db.get_snapshots(session_id) == []
+
+    assert db.flush() is True
+    assert db.pending_writes == 0
+    assert len(db.get_snapshots(session_id)) == 3
+    assert len(db.get_alerts(session_id)) == 1
+    stats = db.get_write_stats()
+    assert stats["rows_written"] == 4
+    assert stats["queue_depth"] == 0
+
+
+def test_writer_thread_writes_full_batches(tmp_path, clock, snapshot_payload):
+    db = EyeGuardianDB(str(tmp_path / "eyeguardian.db"), batch_size=2, flush_interval=60.0)
+    try:
+        session_id = db.start_session()
+        db.insert_snapshot(session_id, snapshot_payload(0))
+        db.insert_snapshot(session_id, snapshot_payload(1))
+        for _ in range(100):
+            if db.pending_writes == 0 and db.get_write_stats()["batches"]:
+                break
+            time.sleep(0.02)
+        assert len(db.get_snapshots(session_id)) == 2
+    finally:
+        db.close()
+
+
+def test_close_flushes_queued_rows(tmp_path, clock, snapshot_payload):
+    path = str(tmp_path / "eyeguardian.db")
+    db = EyeGuardianDB(path, batch_size=1000, flush_interval=60.0)
+    session_id = db.start_session()
+    db.insert_snapshot(session_id, snapshot_payload(0))
+    db.close()
+
+    reopened = EyeGuardianDB(path)
+    try:
+        assert len(reopened.get_snapshots(session_id)) == 1
+    finally:
+        reopened.close()
+
+
+def test_failing_row_is_retried_then_dropped_without_losing_the_batch(db, clock, snapshot_payload):
+    session_id = db.start_session()
+    db.insert_snapshot(session_id, snapshot_payload(0))
+    # No such session: the foreign key rejects this row on every attempt
+    db.insert_snapshot(9999, snapshot_payload(1))
+    db.insert_snapshot(session_id, snapshot_payload(2))
+
+    assert db.flush() is False
+    assert len(db.get_snapshots(session_id)) == 2
+    assert db.pending_writes == 1
+
+    for _ in range(WRITE_MAX_ATTEMPTS - 2):
+        assert db.flush() is False
+        assert db.pending_writes == 1
+    assert db.flush() is False
+    assert db.pending_writes == 0
+    assert db.flush() is True
+
+    stats = db.get_write_stats()
+    assert stats["dropped_rows"] == 1
+    assert stats["retried_rows"] == WRITE_MAX_ATTEMPTS - 1
+    assert stats["rows_written"] == 2
+
+
+def test_transient_failure_keeps_rows_queued(db, clock, monkeypatch, snapshot_payload):
+    session_id = db.start_session()
+    db.insert_snapshot(session_id, snapshot_payload(0))
+    db.insert_snapshot(session_id, snapshot_payload(1))
+    commit_rows = db._commit_rows
+
+    def locked(batch):
+        raise database.sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(db, "_commit_rows", locked)
+    assert db.flush() is False
+    assert db.pending_writes == 2
+
+    monkeypatch.setattr(db, "_commit_rows", commit_rows)
+    assert db.flush() is True
+    assert len(db.get_snapshots(session_id)) == 2
+    assert db.get_write_stats()["dropped_rows"] == 0
+
+
+def test_without_write_behind_errors_raise(tmp_path, clock, snapshot_payload):
+    db = EyeGuardianDB(str(tmp_path / "eyeguardian.db"), write_behind=False)
+    try:
+        session_id = db.start_session()
+        db.insert_snapshot(session_id, snapshot_payload(0))
+        assert len(db.get_snapshots(session_id)) == 1
+        with pytest.raises(database.sqlite3.IntegrityError):
+            db.insert_snapshot(9999, snapshot_payload(1))
+    finally:
+        db.close()
+
+
+def test_end_session_sees_queued_snapshots(db, run_session):
+    run_session(datetime(2025, 12, 3, 10, 0), "a@example.com", snapshots=4)
+
+    summary = db.get_daily_summary("2025-12-03")
+    assert summary["total_session_minutes"] == pytest.approx(20.0)
+    assert summary["alert_count"] == 1
+    assert summary["avg_distance_cm"] == pytest.approx(50.0 + 3 + 1.5)
@@ -1,7 +1,14 @@
+import os
+import sys
 import cv2
 from ambient_light import AmbientLightAnalyzer
 
-cap = cv2.VideoCapture(0)
+# Frame sources live in the backend engine package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+from engine.frame_source import open_frame_source
+
+# Camera index, video file, image directory or "synthetic[:WxH]"
+cap = open_frame_source(sys.argv[1] if len(sys.argv) > 1 else "0")
 analyzer = AmbientLightAnalyzer()
 
 for _ in range(200):   # runs ~200 frames, then stops